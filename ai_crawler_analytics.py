@@ -27,21 +27,890 @@ AI systems are indexing and how to optimize for better citation.
 
 import os
 import re
+import io
+import bz2
+import glob
+import gzip
 import json
+import zlib
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 import logging
 from pathlib import Path
-import geoip2.database
-import geoip2.errors
+
+from crawler_checkpoints import CrawlerCheckpointStore, file_key
+from crawler_dns_verification import CrawlerDNSVerifier
+from crawler_event_store import EVENT_FORMATS, CrawlerEventBuffer, CrawlerEventStore
+from crawler_geoip import CrawlerGeoIP
+from crawler_ip_ranges import CrawlerIPRanges, parse_range_file_specs
+from crawler_log_formats import LOG_FORMATS, LOG_PARSERS, SNIFF_LINES, detect_log_format
+from crawler_rollup_store import CrawlerRollupStore
+from crawler_sampling import CONFIDENCE_Z, StratifiedReservoirSample
+from crawler_sessions import SESSION_GAP, CrawlerSessionizer
+from crawler_sketches import HyperLogLog, SpaceSavingCounter
+from crawler_vectorized import CRAWL_PATTERN_BACKENDS, crawl_patterns_from_requests, crawl_patterns_from_table
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tolerance for out-of-order log lines when seeking to the analysis window
+SEEK_CUTOFF_SLACK = timedelta(minutes=5)
+
+# Combined Log Format, used for lines the fast tokenizer can't split
+COMBINED_LOG_PATTERN = re.compile(
+    r'(\S+) \S+ \S+ \[([^\]]+)\] "(\S+) (\S+) (\S+)" (\d+) (\S+) "([^"]*)" "([^"]*)"'
+)
+
+# Distinct timestamp strings kept before the parse cache is reset
+TIMESTAMP_CACHE_SIZE = 100000
+
+# Rotated log names such as access.log.3 or access.log.3.gz
+ROTATED_LOG_PATTERN = re.compile(r'\.(\d+)(?:\.(?:gz|bz2|zst))?$')
+COMPRESSED_LOG_SUFFIXES = ('.gz', '.bz2', '.zst')
+
+# Longest line kept while waiting for its newline in an uploaded stream
+STREAM_MAX_LINE_BYTES = 1 << 20
+
+# Most decompressed bytes produced from an uploaded gzip stream at a time, so a
+# tiny, highly compressed upload can't expand all at once in memory
+STREAM_DECOMPRESS_BYTES = 1 << 20
+
+# HyperLogLog registers per distinct counter in sketch mode (2^12 bytes, ~1.6% standard error)
+SKETCH_HLL_PRECISION = 12
+
+MONTH_NUMBERS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+class PartialStats:
+    """
+    Mergeable request counters for one crawler or one page
+    
+    Tracks request and success counts, first/last timestamps and the set of
+    related members (pages for a crawler, crawler names for a page). Partials
+    built from different chunks or days combine with merge().
+    """
+    
+    __slots__ = ('requests', 'successful', 'first_seen', 'last_seen', 'members')
+    
+    def __init__(self):
+        self.requests = 0
+        self.successful = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.members = set()
+    
+    def add(self, timestamp: datetime, status: int, member: str):
+        """Count one request"""
+        self.requests += 1
+        if status == 200:
+            self.successful += 1
+        if self.first_seen is None or timestamp < self.first_seen:
+            self.first_seen = timestamp
+        if self.last_seen is None or timestamp > self.last_seen:
+            self.last_seen = timestamp
+        if member is not None:
+            self.members.add(member)
+    
+    def add_span(self, first_seen: datetime, last_seen: datetime, status: int, member: str, count: int):
+        """Count `count` requests seen between two timestamps (rolled-up data)"""
+        self.requests += count
+        if status == 200:
+            self.successful += count
+        if self.first_seen is None or first_seen < self.first_seen:
+            self.first_seen = first_seen
+        if self.last_seen is None or last_seen > self.last_seen:
+            self.last_seen = last_seen
+        self.members.add(member)
+    
+    def merge(self, other: 'PartialStats') -> 'PartialStats':
+        """Fold another partial into this one"""
+        self.requests += other.requests
+        self.successful += other.successful
+        if other.first_seen is not None and (self.first_seen is None or other.first_seen < self.first_seen):
+            self.first_seen = other.first_seen
+        if other.last_seen is not None and (self.last_seen is None or other.last_seen > self.last_seen):
+            self.last_seen = other.last_seen
+        self.members |= other.members
+        return self
+    
+    @property
+    def success_rate(self) -> float:
+        """Share of 200 responses as a percentage"""
+        return round(self.successful / max(1, self.requests) * 100, 1)
+    
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, used to persist partials between runs"""
+        return {
+            'requests': self.requests,
+            'successful': self.successful,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'members': sorted(self.members)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PartialStats':
+        """Rebuild a partial saved with to_dict()"""
+        partial = cls()
+        partial.requests = data['requests']
+        partial.successful = data['successful']
+        partial.first_seen = datetime.fromisoformat(data['first_seen']) if data['first_seen'] else None
+        partial.last_seen = datetime.fromisoformat(data['last_seen']) if data['last_seen'] else None
+        partial.members = set(data['members'])
+        return partial
+
+
+def _merge_partials(target: Dict[str, PartialStats], source: Dict[str, PartialStats]):
+    """Merge a dict of partials into another, keeping first-seen key order"""
+    for key, partial in source.items():
+        if key in target:
+            target[key].merge(partial)
+        else:
+            target[key] = partial
+
+
+class CrawlerStatsAggregator:
+    """
+    Streaming aggregator for AI crawler activity
+    
+    Folds each parsed log entry straight into running counters so memory
+    depends on the number of distinct crawlers and pages, not on log size.
+    Produces the same result sections as the list-based analyzers.
+    
+    With `collect_rollups`, it also keeps hourly rollups (crawler type × URL
+    × status, with hits and bytes) for a CrawlerRollupStore.
+    
+    With `sketch_size`, pages are tracked in a Space-Saving top-K summary and
+    distinct pages and IPs per crawler in HyperLogLog sketches, so memory
+    stays fixed however many distinct URLs the log contains.
+    
+    With `count_ips`, AI crawler hits are also counted per (crawler type,
+    client IP) pair, so GeoIP and reverse DNS verification can resolve each
+    distinct pair once after the scan.
+    
+    With `collect_events`, every AI crawler request is also kept in a
+    columnar CrawlerEventBuffer for a CrawlerEventStore.
+    
+    Hits are grouped into crawl sessions per (crawler type, IP), ending after
+    `session_gap` seconds of inactivity, and recrawl intervals are tracked per
+    (crawler type, URL) in a CrawlerSessionizer; `session_gap=None` turns
+    this off (e.g. for hour-level rollups, which have no per-hit timestamps).
+    """
+    
+    def __init__(self, collect_rollups: bool = False, sketch_size: Optional[int] = None,
+                 count_ips: bool = False, collect_events: bool = False,
+                 session_gap: Optional[float] = SESSION_GAP):
+        """Initialize empty aggregates"""
+        self.total_requests = 0
+        self.ai_requests = 0
+        self.crawler_stats: Dict[str, PartialStats] = {}
+        self.page_stats: Dict[str, PartialStats] = {}
+        self.hourly_distribution = Counter()
+        self.daily_distribution = Counter()
+        self.response_codes = Counter()
+        self.crawl_depth = Counter()
+        self.file_types = Counter()
+        self.ip_range_checks: Dict[str, Counter] = {}
+        self.ai_ips: Optional[Counter] = Counter() if count_ips else None
+        # {(hour_start, crawler_type, url, status): [hits, bytes, first_seen, last_seen, crawler_name]}
+        self.rollups: Optional[Dict[Tuple, List]] = {} if collect_rollups else None
+        self.hourly_traffic: Optional[Counter] = Counter() if collect_rollups or collect_events else None
+        self.events: Optional[CrawlerEventBuffer] = CrawlerEventBuffer() if collect_events else None
+        self.sessions: Optional[CrawlerSessionizer] = CrawlerSessionizer(session_gap) if session_gap else None
+        # Sketch mode replaces page_stats and the per-crawler page sets
+        self.page_sketch = SpaceSavingCounter(sketch_size, PartialStats) if sketch_size else None
+        self.unique_pages: Dict[str, HyperLogLog] = {}
+        self.unique_ips: Dict[str, HyperLogLog] = {}
+    
+    def add_request(self, parsed: Dict):
+        """Count a request that falls inside the analysis window"""
+        self.total_requests += 1
+        if self.hourly_traffic is not None:
+            self.hourly_traffic[parsed['timestamp'].replace(minute=0, second=0, microsecond=0)] += 1
+    
+    def add_ai_request(self, parsed: Dict):
+        """Fold an AI crawler request into the running aggregates"""
+        self.ai_requests += 1
+        url = parsed['url']
+        status = parsed['status']
+        timestamp = parsed['timestamp']
+        
+        # Per-crawler and per-page partials
+        crawler_type = parsed.get('crawler_type', 'unknown')
+        crawler = self.crawler_stats.get(crawler_type)
+        if crawler is None:
+            crawler = self.crawler_stats[crawler_type] = PartialStats()
+        if self.page_sketch is None:
+            crawler.add(timestamp, status, url)
+            
+            page = self.page_stats.get(url)
+            if page is None:
+                page = self.page_stats[url] = PartialStats()
+        else:
+            crawler.add(timestamp, status, None)
+            pages = self.unique_pages.get(crawler_type)
+            if pages is None:
+                pages = self.unique_pages[crawler_type] = HyperLogLog(SKETCH_HLL_PRECISION)
+                self.unique_ips[crawler_type] = HyperLogLog(SKETCH_HLL_PRECISION)
+            pages.add(url)
+            self.unique_ips[crawler_type].add(parsed['ip'])
+            
+            page = self.page_sketch.add(url)
+        page.add(timestamp, status, parsed.get('crawler_name', 'Unknown'))
+        
+        # Published IP range verification outcome, when ranges are loaded
+        ip_verified = parsed.get('ip_verified')
+        if ip_verified is not None:
+            checks = self.ip_range_checks.get(crawler_type)
+            if checks is None:
+                checks = self.ip_range_checks[crawler_type] = Counter()
+            checks[ip_verified] += 1
+        
+        if self.ai_ips is not None:
+            self.ai_ips[(crawler_type, parsed['ip'])] += 1
+        
+        if self.sessions is not None:
+            self.sessions.add(crawler_type, parsed['ip'], url, timestamp)
+        
+        # Crawl pattern histograms
+        self.hourly_distribution[timestamp.hour] += 1
+        self.daily_distribution[timestamp.strftime('%Y-%m-%d')] += 1
+        self.response_codes[status] += 1
+        self._count_url_shape(url, 1)
+        
+        if self.events is not None:
+            self.events.add(parsed)
+        
+        if self.rollups is not None:
+            key = (timestamp.replace(minute=0, second=0, microsecond=0), crawler_type, url, status)
+            size = parsed.get('size', 0)
+            size = int(size) if isinstance(size, int) or size.isdecimal() else 0
+            rollup = self.rollups.get(key)
+            if rollup is None:
+                self.rollups[key] = [1, size, timestamp, timestamp, parsed.get('crawler_name', 'Unknown')]
+            else:
+                rollup[0] += 1
+                rollup[1] += size
+                if timestamp < rollup[2]:
+                    rollup[2] = timestamp
+                if timestamp > rollup[3]:
+                    rollup[3] = timestamp
+    
+    def add_rollup(self, hour_label: str, crawler_type: str, crawler_name: str, url: str, status: int,
+                   hits: int, first_seen: datetime, last_seen: datetime):
+        """Fold one stored hourly rollup (see CrawlerRollupStore) into the aggregates"""
+        self.ai_requests += hits
+        
+        crawler = self.crawler_stats.get(crawler_type)
+        if crawler is None:
+            crawler = self.crawler_stats[crawler_type] = PartialStats()
+        crawler.add_span(first_seen, last_seen, status, url, hits)
+        
+        page = self.page_stats.get(url)
+        if page is None:
+            page = self.page_stats[url] = PartialStats()
+        page.add_span(first_seen, last_seen, status, crawler_name, hits)
+        
+        # hour_label is the ISO hour start in the log's own UTC offset
+        self.hourly_distribution[int(hour_label[11:13])] += hits
+        self.daily_distribution[hour_label[:10]] += hits
+        self.response_codes[status] += hits
+        self._count_url_shape(url, hits)
+    
+    def _count_url_shape(self, url: str, hits: int):
+        """Update crawl depth and file type histograms for a URL"""
+        depth, file_type = url_shape(url)
+        self.crawl_depth[depth] += hits
+        self.file_types[file_type] += hits
+    
+    def merge(self, other: 'CrawlerStatsAggregator') -> 'CrawlerStatsAggregator':
+        """Combine aggregates from another chunk, file or day into this one"""
+        self.total_requests += other.total_requests
+        self.ai_requests += other.ai_requests
+        _merge_partials(self.crawler_stats, other.crawler_stats)
+        _merge_partials(self.page_stats, other.page_stats)
+        self.hourly_distribution.update(other.hourly_distribution)
+        self.daily_distribution.update(other.daily_distribution)
+        self.response_codes.update(other.response_codes)
+        self.crawl_depth.update(other.crawl_depth)
+        self.file_types.update(other.file_types)
+        for crawler_type, checks in other.ip_range_checks.items():
+            self.ip_range_checks.setdefault(crawler_type, Counter()).update(checks)
+        if self.ai_ips is not None and other.ai_ips is not None:
+            self.ai_ips.update(other.ai_ips)
+        if self.rollups is not None and other.rollups is not None:
+            for key, rollup in other.rollups.items():
+                existing = self.rollups.get(key)
+                if existing is None:
+                    self.rollups[key] = rollup
+                    continue
+                existing[0] += rollup[0]
+                existing[1] += rollup[1]
+                existing[2] = min(existing[2], rollup[2])
+                existing[3] = max(existing[3], rollup[3])
+        if self.hourly_traffic is not None and other.hourly_traffic is not None:
+            self.hourly_traffic.update(other.hourly_traffic)
+        if self.events is not None and other.events is not None:
+            self.events.merge(other.events)
+        if self.sessions is not None and other.sessions is not None:
+            self.sessions.merge(other.sessions)
+        if self.page_sketch is not None and other.page_sketch is not None:
+            self.page_sketch.merge(other.page_sketch)
+            for distinct, other_distinct in ((self.unique_pages, other.unique_pages),
+                                             (self.unique_ips, other.unique_ips)):
+                for crawler_type, sketch in other_distinct.items():
+                    if crawler_type in distinct:
+                        distinct[crawler_type].merge(sketch)
+                    else:
+                        distinct[crawler_type] = sketch
+        return self
+    
+    def to_dict(self) -> Dict:
+        """
+        JSON-serializable form; counters are stored as pairs to keep integer keys
+        
+        Rollups and events are not included: they are flushed to their stores after each run.
+        """
+        return {
+            'total_requests': self.total_requests,
+            'ai_requests': self.ai_requests,
+            'crawler_stats': {key: stats.to_dict() for key, stats in self.crawler_stats.items()},
+            'page_stats': {key: stats.to_dict() for key, stats in self.page_stats.items()},
+            'hourly_distribution': list(self.hourly_distribution.items()),
+            'daily_distribution': list(self.daily_distribution.items()),
+            'response_codes': list(self.response_codes.items()),
+            'crawl_depth': list(self.crawl_depth.items()),
+            'file_types': list(self.file_types.items()),
+            'ip_range_checks': {key: list(checks.items()) for key, checks in self.ip_range_checks.items()},
+            'ai_ips': ([[crawler_type, ip, hits] for (crawler_type, ip), hits in self.ai_ips.items()]
+                       if self.ai_ips is not None else None),
+            'sessions': self.sessions.to_dict() if self.sessions is not None else None,
+            'page_sketch': self.page_sketch.to_dict(PartialStats.to_dict) if self.page_sketch else None,
+            'unique_pages': {key: sketch.to_dict() for key, sketch in self.unique_pages.items()},
+            'unique_ips': {key: sketch.to_dict() for key, sketch in self.unique_ips.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CrawlerStatsAggregator':
+        """Rebuild an aggregator saved with to_dict()"""
+        aggregator = cls()
+        aggregator.total_requests = data['total_requests']
+        aggregator.ai_requests = data['ai_requests']
+        aggregator.crawler_stats = {key: PartialStats.from_dict(stats) for key, stats in data['crawler_stats'].items()}
+        aggregator.page_stats = {key: PartialStats.from_dict(stats) for key, stats in data['page_stats'].items()}
+        aggregator.hourly_distribution = Counter(dict(data['hourly_distribution']))
+        aggregator.daily_distribution = Counter(dict(data['daily_distribution']))
+        aggregator.response_codes = Counter(dict(data['response_codes']))
+        aggregator.crawl_depth = Counter(dict(data['crawl_depth']))
+        aggregator.file_types = Counter(dict(data['file_types']))
+        aggregator.ip_range_checks = {
+            key: Counter(dict(checks)) for key, checks in data.get('ip_range_checks', {}).items()
+        }
+        if data.get('ai_ips') is not None:
+            aggregator.ai_ips = Counter({(crawler_type, ip): hits for crawler_type, ip, hits in data['ai_ips']})
+        # Aggregates saved before sessions were tracked can't report them
+        aggregator.sessions = CrawlerSessionizer.from_dict(data['sessions']) if data.get('sessions') else None
+        if data.get('page_sketch'):
+            aggregator.page_sketch = SpaceSavingCounter.from_dict(
+                data['page_sketch'], PartialStats, PartialStats.from_dict
+            )
+        aggregator.unique_pages = {key: HyperLogLog.from_dict(sketch) for key, sketch in data.get('unique_pages', {}).items()}
+        aggregator.unique_ips = {key: HyperLogLog.from_dict(sketch) for key, sketch in data.get('unique_ips', {}).items()}
+        return aggregator
+    
+    def crawlers_detected(self, dns_verification: Optional[Dict[Tuple[str, str], Optional[bool]]] = None) -> Dict:
+        """
+        Per-crawler summary in the `crawlers_detected` result format
+        
+        Args:
+            dns_verification: (crawler type, IP) -> reverse DNS outcome from a
+                CrawlerDNSVerifier; adds `verified` and `spoofed` request counts
+        """
+        crawler_stats = format_crawler_stats(self.crawler_stats)
+        if self.page_sketch is not None:
+            # Estimates with ~95% error bounds instead of exact set sizes
+            for crawler_type, stats in crawler_stats.items():
+                for field, sketches in (('unique_pages', self.unique_pages), ('unique_ips', self.unique_ips)):
+                    sketch = sketches.get(crawler_type)
+                    estimate = sketch.estimate() if sketch else 0
+                    stats[field] = estimate
+                    stats[f'{field}_error'] = sketch.error_bound(estimate) if sketch else 0
+        for crawler_type, checks in self.ip_range_checks.items():
+            crawler_stats[crawler_type]['in_published_ranges'] = checks[True]
+            crawler_stats[crawler_type]['outside_published_ranges'] = checks[False]
+        if dns_verification is not None and self.ai_ips:
+            for (crawler_type, ip), hits in self.ai_ips.items():
+                verified = dns_verification.get((crawler_type, ip))
+                if verified is None:
+                    continue
+                stats = crawler_stats[crawler_type]
+                stats.setdefault('verified', 0)
+                stats.setdefault('spoofed', 0)
+                stats['verified' if verified else 'spoofed'] += hits
+        return crawler_stats
+    
+    def top_crawled_pages(self, limit: int = 20) -> Dict:
+        """Most visited pages in the `top_crawled_pages` result format"""
+        if self.page_sketch is not None:
+            return format_page_sketch(self.page_sketch, limit)
+        return format_page_stats(self.page_stats, limit)
+    
+    def crawl_sessions(self) -> Optional[Dict]:
+        """Crawl sessions and recrawl intervals in the `crawl_sessions` result format, when tracked"""
+        return self.sessions.report() if self.sessions is not None else None
+    
+    def crawl_patterns(self, geo_lookup: Optional[Callable[[str], Tuple]] = None) -> Dict:
+        """
+        Crawl behaviour histograms in the `crawl_patterns` result format
+        
+        Args:
+            geo_lookup: IP -> (country, ASN) resolver; with per-IP counts, adds
+                `countries` and `asns` breakdowns of AI crawler hits
+        """
+        patterns = {
+            'hourly_distribution': dict(sorted(self.hourly_distribution.items())),
+            'daily_distribution': dict(sorted(self.daily_distribution.items())),
+            'response_codes': dict(sorted(self.response_codes.items())),
+            'crawl_depth': dict(sorted(self.crawl_depth.items())),
+            'file_types': dict(sorted(self.file_types.items(), key=lambda x: x[1], reverse=True))
+        }
+        if geo_lookup is not None and self.ai_ips:
+            countries = Counter()
+            asns = Counter()
+            for (_, ip), hits in self.ai_ips.items():
+                country, asn = geo_lookup(ip)
+                countries[country or 'unknown'] += hits
+                asns[asn or 'unknown'] += hits
+            patterns['countries'] = dict(countries.most_common())
+            patterns['asns'] = dict(asns.most_common())
+        return patterns
+
+
+def format_crawler_stats(crawler_stats: Dict[str, PartialStats]) -> Dict:
+    """Convert per-crawler partials into the `crawlers_detected` format"""
+    return {
+        crawler_type: {
+            'requests': stats.requests,
+            'unique_pages': len(stats.members),
+            'success_rate': stats.success_rate,
+            # Approximate requests per day (assumes 30-day period)
+            'avg_requests_per_day': round(stats.requests / 30, 1)
+        }
+        for crawler_type, stats in crawler_stats.items()
+    }
+
+
+def format_page_stats(page_stats: Dict[str, PartialStats], limit: int = 20) -> Dict:
+    """Convert per-page partials into the `top_crawled_pages` format"""
+    top_pages = []
+    for url, stats in page_stats.items():
+        top_pages.append({
+            'url': url,
+            'visits': stats.requests,
+            'crawlers': list(stats.members),
+            'first_crawled': stats.first_seen.isoformat() if stats.first_seen else None,
+            'last_crawled': stats.last_seen.isoformat() if stats.last_seen else None,
+            'success_rate': stats.success_rate
+        })
+    
+    # Sort by visits and return top N
+    top_pages.sort(key=lambda x: x['visits'], reverse=True)
+    return {'pages': top_pages[:limit]}
+
+
+def format_page_sketch(page_sketch: SpaceSavingCounter, limit: int = 20) -> Dict:
+    """
+    Convert a Space-Saving page summary into the `top_crawled_pages` format
+    
+    `visits` may overcount by up to `visits_error`; crawlers, timestamps and
+    success rate cover the visits since the page entered the summary.
+    """
+    top_pages = []
+    for url, visits, error, stats in page_sketch.top(limit):
+        top_pages.append({
+            'url': url,
+            'visits': visits,
+            'visits_error': error,
+            'crawlers': list(stats.members),
+            'first_crawled': stats.first_seen.isoformat() if stats.first_seen else None,
+            'last_crawled': stats.last_seen.isoformat() if stats.last_seen else None,
+            'success_rate': stats.success_rate
+        })
+    return {'pages': top_pages, 'tracked_pages': len(page_sketch), 'capacity': page_sketch.capacity}
+
+
+def url_shape(url: str) -> Tuple[int, str]:
+    """Crawl depth (number of path segments) and file type of a URL"""
+    segments = url.split('/')
+    depth = len([p for p in segments if p])
+    if '.' in segments[-1]:
+        return depth, url.split('.')[-1].lower()
+    return depth, 'html'
+
+
+class DailyCrawlerAggregators:
+    """
+    Drop-in for CrawlerStatsAggregator that keeps one aggregator per log day
+
+    Follow mode stores each day separately, so a run rewrites only the days
+    its new lines fall on and whole days can leave the analysis window. Days
+    are dates in the log's own UTC offset, as in `daily_distribution`.
+    """
+
+    def __init__(self, new_aggregator: Callable[[], CrawlerStatsAggregator]):
+        """
+        Args:
+            new_aggregator: Creates the empty aggregator of a day
+        """
+        self.new_aggregator = new_aggregator
+        self.days: Dict[str, CrawlerStatsAggregator] = {}
+
+    def _day(self, parsed: Dict) -> CrawlerStatsAggregator:
+        day = parsed['timestamp'].strftime('%Y-%m-%d')
+        aggregator = self.days.get(day)
+        if aggregator is None:
+            aggregator = self.days[day] = self.new_aggregator()
+        return aggregator
+
+    def add_request(self, parsed: Dict):
+        self._day(parsed).add_request(parsed)
+
+    def add_ai_request(self, parsed: Dict):
+        self._day(parsed).add_ai_request(parsed)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(aggregator.total_requests for aggregator in self.days.values())
+
+
+class CrawlerSampleAggregator:
+    """
+    Approximate aggregator over a random sample of log lines
+
+    Drop-in for CrawlerStatsAggregator when lines are sampled: AI crawler
+    requests are kept in one reservoir per crawler type, and every result
+    section is extrapolated from the sample. Request counts, success rates
+    and the hourly distribution carry 95% confidence intervals (`*_ci`).
+    `unique_pages` counts distinct pages in the sample, a lower bound.
+    """
+
+    def __init__(self, sample_rate: float, reservoir_size: int = 2000, seed: Optional[int] = None):
+        """Initialize an empty sample"""
+        self.sample = StratifiedReservoirSample(sample_rate, reservoir_size, seed)
+        self.sampled_lines = 0
+        self.sampled_requests = 0
+        self.sampled_ai_requests = 0
+
+    def add_request(self, parsed: Dict):
+        """Count a sampled request that falls inside the analysis window"""
+        self.sampled_requests += 1
+
+    def add_ai_request(self, parsed: Dict):
+        """Offer a sampled AI crawler request to its crawler type's reservoir"""
+        self.sampled_ai_requests += 1
+        self.sample.add(parsed.get('crawler_type', 'unknown'), (
+            parsed['timestamp'], parsed['status'], parsed['url'], parsed.get('crawler_name', 'Unknown')
+        ))
+
+    @property
+    def total_requests(self) -> int:
+        return self.sample.estimate_count(self.sampled_requests)[0]
+
+    @property
+    def ai_requests(self) -> int:
+        return self.sample.estimate_count(self.sampled_ai_requests)[0]
+
+    def crawlers_detected(self, dns_verification: Optional[Dict] = None) -> Dict:
+        """
+        Per-crawler summary in the `crawlers_detected` result format
+        
+        Sampled items don't keep client IPs, so `dns_verification` is accepted
+        for interface parity but adds nothing.
+        """
+        crawler_stats = {}
+        for crawler_type, reservoir in self.sample.reservoirs.items():
+            requests, low, high = self.sample.stratum_total(crawler_type)
+            success, success_low, success_high = self.sample.proportion(crawler_type, lambda item: item[1] == 200)
+            crawler_stats[crawler_type] = {
+                'requests': requests,
+                'requests_ci': [low, high],
+                'unique_pages': len({item[2] for item in reservoir}),
+                'success_rate': round(success * 100, 1),
+                'success_rate_ci': [round(success_low * 100, 1), round(success_high * 100, 1)],
+                # Approximate requests per day (assumes 30-day period)
+                'avg_requests_per_day': round(requests / 30, 1)
+            }
+        return crawler_stats
+
+    def top_crawled_pages(self, limit: int = 20) -> Dict:
+        """Most visited pages in the `top_crawled_pages` result format, from the sample"""
+        # url -> [weighted successes, first seen, last seen, crawler names]
+        pages: Dict[str, List] = {}
+        for weight, (timestamp, status, url, crawler_name) in self.sample.weighted_items():
+            page = pages.get(url)
+            if page is None:
+                page = pages[url] = [0.0, timestamp, timestamp, set()]
+            if status == 200:
+                page[0] += weight
+            page[1] = min(page[1], timestamp)
+            page[2] = max(page[2], timestamp)
+            page[3].add(crawler_name)
+
+        visits = self.sample.histogram(lambda item: item[2])
+        top_pages = []
+        for url, (successful, first_seen, last_seen, crawlers) in pages.items():
+            estimate, low, high = visits[url]
+            top_pages.append({
+                'url': url,
+                'visits': estimate,
+                'visits_ci': [low, high],
+                'crawlers': list(crawlers),
+                'first_crawled': first_seen.isoformat(),
+                'last_crawled': last_seen.isoformat(),
+                'success_rate': round(successful / max(1, estimate) * 100, 1)
+            })
+
+        top_pages.sort(key=lambda x: x['visits'], reverse=True)
+        return {'pages': top_pages[:limit]}
+
+    def crawl_sessions(self) -> Optional[Dict]:
+        """Sampled lines break crawl sessions apart, so none are reported"""
+        return None
+
+    def crawl_patterns(self, geo_lookup: Optional[Callable[[str], Tuple]] = None) -> Dict:
+        """
+        Crawl behaviour histograms in the `crawl_patterns` result format, from the sample
+        
+        Sampled items don't keep client IPs, so `geo_lookup` is accepted for
+        interface parity but no country / ASN breakdown is produced.
+        """
+        hourly = self.sample.histogram(lambda item: item[0].hour)
+        daily = self.sample.histogram(lambda item: item[0].strftime('%Y-%m-%d'))
+        response_codes = self.sample.histogram(lambda item: item[1])
+        crawl_depth = self.sample.histogram(lambda item: url_shape(item[2])[0])
+        file_types = self.sample.histogram(lambda item: url_shape(item[2])[1])
+        return {
+            'hourly_distribution': {hour: hourly[hour][0] for hour in sorted(hourly)},
+            'hourly_distribution_ci': {hour: [hourly[hour][1], hourly[hour][2]] for hour in sorted(hourly)},
+            'daily_distribution': {day: daily[day][0] for day in sorted(daily)},
+            'response_codes': {status: response_codes[status][0] for status in sorted(response_codes)},
+            'crawl_depth': {depth: crawl_depth[depth][0] for depth in sorted(crawl_depth)},
+            'file_types': dict(sorted(
+                ((file_type, counts[0]) for file_type, counts in file_types.items()),
+                key=lambda x: x[1], reverse=True
+            ))
+        }
+
+    def summary(self) -> Dict:
+        """Sampling parameters and 95% intervals for the overall totals"""
+        _, total_low, total_high = self.sample.estimate_count(self.sampled_requests)
+        _, ai_low, ai_high = self.sample.estimate_count(self.sampled_ai_requests)
+        return {
+            'sample_rate': self.sample.sample_rate,
+            'reservoir_size': self.sample.reservoir_size,
+            'sampled_lines': self.sampled_lines,
+            'sampled_requests': self.sampled_requests,
+            'sampled_ai_requests': self.sampled_ai_requests,
+            'confidence_z': CONFIDENCE_Z,
+            'total_requests_ci': [total_low, total_high],
+            'ai_requests_ci': [ai_low, ai_high]
+        }
+
+
+class UserAgentClassifier:
+    """
+    Compiled, memoized user-agent matcher for AI crawler signatures
+    
+    All user-agent patterns are compiled into a single anchored regex whose
+    alternatives are tried in signature order, so the first crawler type that
+    matches wins exactly as with per-pattern re.search calls. Results are
+    cached per distinct user-agent string in a bounded LRU.
+    """
+    
+    def __init__(self, signatures: Dict, cache_size: int = 10000):
+        """
+        Args:
+            signatures: Crawler signatures as returned by _get_ai_crawler_signatures
+            cache_size: Maximum number of distinct user agents to memoize
+        """
+        self.signatures = signatures
+        self.cache_size = cache_size
+        self.crawler_types = list(signatures)
+        
+        # One lazy-prefixed alternative per crawler type, tagged with an empty
+        # named group so match.lastgroup identifies which one matched
+        alternatives = []
+        for index, crawler_info in enumerate(signatures.values()):
+            patterns = [self._simplify_pattern(p) for p in crawler_info['user_agents']]
+            if patterns:
+                alternatives.append(f"(?:.*?(?:{'|'.join(patterns)}))(?P<c{index}>)")
+        self._matcher = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+        
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+    
+    def __reduce__(self):
+        # Rebuild on unpickle (e.g. in worker processes) with a fresh cache
+        return (self.__class__, (self.signatures, self.cache_size))
+    
+    @staticmethod
+    def _simplify_pattern(pattern: str) -> str:
+        """Drop leading/trailing `.*`, which never changes whether a search matches"""
+        while pattern.startswith('.*'):
+            pattern = pattern[2:]
+        while pattern.endswith('.*') and not pattern.endswith('\\.*'):
+            pattern = pattern[:-2]
+        return pattern or '.*'
+    
+    def _classify(self, user_agent: str) -> Optional[int]:
+        """Index of the first crawler type whose user-agent patterns match"""
+        if self._matcher is None:
+            return None
+        match = self._matcher.match(user_agent)
+        return int(match.lastgroup[1:]) if match else None
+
+
+class CrawlerLogStream:
+    """
+    Incremental parser for an access log that arrives in chunks (e.g. an upload)
+    
+    Each chunk is split into lines and folded into a streaming aggregator as
+    it arrives, so only the unfinished last line is buffered. Gzip streams
+    (including concatenated members) are detected from the first bytes and
+    decompressed on the fly. snapshot() returns partial results at any point.
+    """
+    
+    def __init__(self, analytics: 'AICrawlerAnalytics', days_back: int = 30,
+                 sketch_size: Optional[int] = None):
+        """
+        Args:
+            analytics: Analytics instance that parses, classifies and reports
+            days_back: Number of days to analyze
+            sketch_size: Fixed-memory page tracking (see parse_access_logs)
+        """
+        self.analytics = analytics
+        self.days_back = days_back
+        self.cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+        self.aggregator = analytics._new_aggregator(sketch_size)
+        self.bytes_received = 0
+        self.lines = 0
+        self._pending = b''
+        self._decompressor = None
+        self._started = False
+        # Span of the parsed lines; the upload may start or stop partway through an hour
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        # The format is sniffed from the first lines, which wait here until then
+        self._parse_entry = analytics._parse_log_entry if analytics.log_format == 'combined' else None
+        self._head: List[str] = []
+    
+    def feed(self, chunk: bytes):
+        """Parse the complete lines in a chunk and keep the unfinished tail"""
+        if not chunk:
+            return
+        self.bytes_received += len(chunk)
+        if not self._started:
+            self._started = True
+            if chunk[:2] == b'\x1f\x8b':
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is None:
+            self._split(chunk)
+            return
+        for piece in self._decompress(chunk):
+            self._split(piece)
+    
+    def _split(self, chunk: bytes):
+        """Aggregate the complete lines of some log bytes, keeping the unfinished tail"""
+        lines = (self._pending + chunk).split(b'\n')
+        self._pending = lines.pop()
+        if len(self._pending) > STREAM_MAX_LINE_BYTES:
+            logger.warning(f"⚠️ Dropping a line longer than {STREAM_MAX_LINE_BYTES:,} bytes")
+            self._pending = b''
+        for line in lines:
+            self._aggregate(line)
+    
+    def _decompress(self, chunk: bytes) -> Iterator[bytes]:
+        """Decompress gzip data in pieces of at most STREAM_DECOMPRESS_BYTES, starting a new member after each one ends"""
+        data = chunk
+        while True:
+            piece = self._decompressor.decompress(data, STREAM_DECOMPRESS_BYTES)
+            if piece:
+                yield piece
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data
+                if not data:
+                    return
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                data = self._decompressor.unconsumed_tail
+                # A full piece may leave output buffered even with no input left
+                if not data and len(piece) < STREAM_DECOMPRESS_BYTES:
+                    return
+    
+    def _aggregate(self, line: bytes):
+        self.lines += 1
+        text = line.decode('utf-8', errors='ignore')
+        if self._parse_entry is None:
+            self._head.append(text)
+            if len(self._head) >= SNIFF_LINES:
+                self._flush_head()
+            return
+        self.analytics._aggregate_line(text, self.cutoff_date, self.aggregator, self._parse)
+    
+    def _parse(self, line: str) -> Optional[Dict]:
+        """Parse an entry, widening the span of parsed timestamps"""
+        parsed = self._parse_entry(line)
+        if parsed is not None:
+            timestamp = parsed['timestamp']
+            if self.first_seen is None or timestamp < self.first_seen:
+                self.first_seen = timestamp
+            if self.last_seen is None or timestamp > self.last_seen:
+                self.last_seen = timestamp
+        return parsed
+    
+    def _flush_head(self):
+        """Pick the entry parser from the buffered first lines and aggregate them"""
+        self._parse_entry = self.analytics._new_line_parser(self._head)
+        head, self._head = self._head, []
+        for line in head:
+            self.analytics._aggregate_line(line, self.cutoff_date, self.aggregator, self._parse)
+    
+    def snapshot(self) -> Dict:
+        """Results over the lines received so far"""
+        results = self.analytics._finalize_results(self.analytics._new_results(self.days_back), self.aggregator)
+        results["progress"] = {"bytes_received": self.bytes_received, "lines": self.lines}
+        return results
+    
+    def finish(self) -> Dict:
+        """
+        Parse the last line, write rollups when a store is configured and return the results
+        
+        An upload may be cut short or start mid-log, so only the hours (days
+        for events) strictly inside the span of its lines replace stored ones.
+        """
+        if self._decompressor is not None:
+            self._split(self._decompressor.flush())
+        if self._pending:
+            self._aggregate(self._pending)
+            self._pending = b''
+        if self._parse_entry is None:
+            self._flush_head()
+        
+        complete_from = max(self.cutoff_date, self.first_seen) if self.first_seen else self.cutoff_date
+        self.analytics._write_stores(self.aggregator, replace=True, complete_from=complete_from,
+                                     complete_until=self.last_seen)
+        logger.info(f"✅ Processed {self.aggregator.total_requests} total requests, {self.aggregator.ai_requests} AI crawler requests")
+        return self.snapshot()
+
+
 class AICrawlerAnalytics:
     """
     AI Crawler Analytics - Track AI Bot Website Visits
@@ -50,10 +919,87 @@ class AICrawlerAnalytics:
     interact with your website to optimize for better AI citation.
     """
     
-    def __init__(self):
-        """Initialize AI Crawler Analytics"""
+    def __init__(self, user_agent_cache_size: int = 10000,
+                 ip_range_files: Optional[Dict[str, List[str]]] = None,
+                 ip_cache_size: int = 100000, rollup_db: Optional[str] = None,
+                 log_format: str = 'auto', geoip_country_db: Optional[str] = None,
+                 geoip_asn_db: Optional[str] = None, verify_dns: bool = False,
+                 dns_cache_path: Optional[str] = None, dns_resolver=None,
+                 event_dir: Optional[str] = None, event_format: str = 'parquet',
+                 session_gap_minutes: float = SESSION_GAP / 60):
+        """
+        Initialize AI Crawler Analytics
+        
+        Args:
+            user_agent_cache_size: Distinct user agents to memoize classifications for
+            ip_range_files: Published CIDR range files (JSON) per crawler type, used to
+                verify crawler IPs and flag spoofed user agents
+            ip_cache_size: Distinct IPs to memoize range lookups for
+            rollup_db: SQLite file to write hourly rollups to on every streaming
+                parse or follow run, and to serve analyze_rollups() from
+            log_format: Access log format: 'combined' (Apache/Nginx), 'nginx_json',
+                'alb', 'cloudfront', or 'auto' to sniff each file's first lines
+            geoip_country_db: MaxMind Country or City .mmdb file; AI crawler hits
+                are then counted per country in `crawl_patterns`
+            geoip_asn_db: MaxMind ASN .mmdb file, for a per-ASN breakdown
+            verify_dns: Verify crawler IPs with forward-confirmed reverse DNS and
+                count `verified` / `spoofed` requests per crawler
+            dns_cache_path: JSON file persisting reverse DNS results between runs
+            dns_resolver: Resolver with async reverse(ip) / forward(hostname),
+                replacing the system resolver (e.g. a stub in tests)
+            event_dir: Directory to export parsed AI crawler events to on every
+                streaming parse or follow run (partitioned by day and crawler),
+                and to serve analyze_events() from; needs pyarrow
+            event_format: 'parquet' or 'arrow' event files
+            session_gap_minutes: Inactivity that ends a crawler's crawl session
+                (per crawler type and IP) in `crawl_sessions`
+        """
+        if log_format != 'auto' and log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format: {log_format} (expected 'auto' or one of {', '.join(LOG_FORMATS)})")
+        self.log_format = log_format
         self.ai_crawler_patterns = self._get_ai_crawler_signatures()
         self.analysis_results = {}
+        self._timestamp_cache: Dict[str, datetime] = {}
+        self._timezone_cache: Dict[str, object] = {}
+        self.user_agent_classifier = UserAgentClassifier(self.ai_crawler_patterns, user_agent_cache_size)
+        self._crawler_types = list(self.ai_crawler_patterns)
+        self._crawler_index = {crawler_type: index for index, crawler_type in enumerate(self._crawler_types)}
+        self.rollup_store = CrawlerRollupStore(rollup_db) if rollup_db else None
+        self.event_store = CrawlerEventStore(event_dir, event_format) if event_dir else None
+        self.geoip = (CrawlerGeoIP(geoip_country_db, geoip_asn_db, ip_cache_size)
+                      if geoip_country_db or geoip_asn_db else None)
+        self.dns_verifier = (CrawlerDNSVerifier(
+            {crawler_type: info.get('dns_domains', []) for crawler_type, info in self.ai_crawler_patterns.items()},
+            resolver=dns_resolver, cache_path=dns_cache_path
+        ) if verify_dns else None)
+        self._count_ips = self.geoip is not None or self.dns_verifier is not None
+        self.session_gap = session_gap_minutes * 60
+        
+        # Signature prefixes and published ranges share one CIDR trie
+        self.ip_ranges = CrawlerIPRanges(ip_cache_size)
+        for crawler_type, crawler_info in self.ai_crawler_patterns.items():
+            self.ip_ranges.add_signature_prefixes(crawler_type, crawler_info['ips'])
+        for crawler_type, paths in (ip_range_files or {}).items():
+            if crawler_type not in self._crawler_index:
+                logger.warning(f"⚠️ Ignoring IP ranges for unknown crawler type: {crawler_type}")
+                continue
+            for path in paths:
+                self.ip_ranges.load_json(crawler_type, path)
+        
+        # Match results per crawler type, keyed by IP verification outcome
+        # (None when no published ranges are loaded for that crawler)
+        self._crawler_matches = []
+        for crawler_type, crawler_info in self.ai_crawler_patterns.items():
+            match = {
+                'type': crawler_type,
+                'name': crawler_info['name'],
+                'purpose': crawler_info['purpose']
+            }
+            self._crawler_matches.append({
+                None: match,
+                True: {**match, 'ip_verified': True},
+                False: {**match, 'ip_verified': False}
+            })
         
     def _get_ai_crawler_signatures(self) -> Dict:
         """Get known AI crawler user agents and IP patterns"""
@@ -67,6 +1013,7 @@ class AICrawlerAnalytics:
                     r"OpenAI.*",
                 ],
                 "ips": ["20.15.240.", "20.171."],  # OpenAI IP ranges
+                "dns_domains": [".openai.com"],  # Reverse DNS suffixes
                 "purpose": "Content indexing for ChatGPT responses"
             },
             "perplexity": {
@@ -76,6 +1023,7 @@ class AICrawlerAnalytics:
                     r"Perplexity.*",
                 ],
                 "ips": ["35.89.", "54.187."],  # Perplexity IP ranges
+                "dns_domains": [".perplexity.ai"],
                 "purpose": "Real-time content crawling for search responses"
             },
             "google_ai": {
@@ -86,6 +1034,7 @@ class AICrawlerAnalytics:
                     r"GoogleOther.*AI",
                 ],
                 "ips": ["66.249.", "64.233."],  # Google IP ranges
+                "dns_domains": [".googlebot.com", ".google.com"],
                 "purpose": "Content indexing for AI Overviews"
             },
             "microsoft_copilot": {
@@ -96,6 +1045,7 @@ class AICrawlerAnalytics:
                     r"msnbot.*copilot",
                 ],
                 "ips": ["40.77.", "207.46."],  # Microsoft IP ranges
+                "dns_domains": [".search.msn.com"],
                 "purpose": "Content indexing for Copilot responses"
             },
             "claude": {
@@ -105,6 +1055,7 @@ class AICrawlerAnalytics:
                     r"Anthropic.*",
                 ],
                 "ips": ["54.230.", "52.85."],  # Anthropic/Claude IP ranges
+                "dns_domains": [".anthropic.com"],
                 "purpose": "Content analysis for Claude responses"
             },
             "generic_ai": {
@@ -116,29 +1067,400 @@ class AICrawlerAnalytics:
                     r".*Crawler.*AI",
                 ],
                 "ips": [],
+                "dns_domains": [],
                 "purpose": "Various AI systems content indexing"
             }
         }
     
-    def parse_access_logs(self, log_file_path: str, days_back: int = 30) -> Dict:
+    def parse_access_logs(self, log_file_path: str, days_back: int = 30, streaming: bool = True,
+                          workers: int = 1, seek_to_cutoff: bool = False,
+                          sketch_size: Optional[int] = None, sample_rate: Optional[float] = None,
+                          reservoir_size: int = 2000, sample_seed: Optional[int] = None,
+                          patterns_backend: str = 'python') -> Dict:
         """
         Parse web server access logs to identify AI crawler visits
         
         Args:
-            log_file_path: Path to access log file (Apache/Nginx format)
+            log_file_path: Path to access log file (Apache/Nginx format), or a
+                directory or glob covering a rotated set such as access.log,
+                access.log.1, access.log.2.gz (gzip, bz2 and zstd are read as streams)
             days_back: Number of days to analyze
+            streaming: Fold entries into running aggregates instead of
+                keeping every parsed request in memory
+            workers: Number of processes parsing newline-aligned chunks of plain
+                files and whole compressed files in parallel (implies streaming)
+            seek_to_cutoff: Binary-search the (append-ordered) log for the first
+                line inside the window and skip everything before it
+                (implies streaming)
+            sketch_size: Track at most this many pages (Space-Saving top-K) and
+                estimate distinct pages/IPs per crawler with HyperLogLog, in
+                fixed memory and with error bounds (implies streaming)
+            sample_rate: Quick approximate mode: parse only this fraction of lines
+                (randomly chosen), keep up to `reservoir_size` AI crawler requests
+                per crawler type and extrapolate every figure, with 95% confidence
+                intervals for request counts, success rates and the hourly
+                distribution (sequential; ignores workers and sketch_size)
+            reservoir_size: Sampled requests kept per crawler type in sampling mode
+            sample_seed: Random seed for a reproducible sample
+            patterns_backend: 'python' loops or 'vectorized' NumPy histograms for
+                the crawl patterns (same output); 'vectorized' needs the buffered
+                parse (streaming=False, no workers, seek, sketch or sample), since
+                the streaming aggregates count patterns line by line
+            
+        Streaming runs replace the rollup store's hours they fully cover, when
+        one is configured.
             
         Returns:
             Dict: AI crawler analysis results
         """
+        if patterns_backend not in CRAWL_PATTERN_BACKENDS:
+            raise ValueError(f"Unknown crawl patterns backend: {patterns_backend}")
+        if patterns_backend != 'python' and (streaming or workers > 1 or seek_to_cutoff or sketch_size or sample_rate):
+            raise ValueError(f"patterns_backend='{patterns_backend}' only applies to a buffered parse "
+                             f"(streaming=False without workers, seek, sketch or sample)")
+        
         logger.info(f"📊 Analyzing access logs for AI crawler activity...")
         
-        if not os.path.exists(log_file_path):
+        log_files = self._find_log_files(log_file_path)
+        if not log_files:
             logger.error(f"❌ Log file not found: {log_file_path}")
             return {"error": "Log file not found"}
         
         # Initialize results
-        results = {
+        results = self._new_results(days_back)
+        
+        # Date threshold for analysis (log timestamps carry a UTC offset)
+        cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+        log_files = self._skip_stale_log_files(log_files, cutoff_date)
+        
+        if sample_rate:
+            # Estimates never go into the rollup store
+            try:
+                aggregator = self._sample_log_files(
+                    log_files, cutoff_date, sample_rate, reservoir_size=reservoir_size,
+                    seed=sample_seed, seek_to_cutoff=seek_to_cutoff
+                )
+            except Exception as e:
+                logger.error(f"❌ Error reading log file: {str(e)}")
+                return {"error": str(e)}
+            
+            results["sample"] = aggregator.summary()
+            return self._finalize_results(results, aggregator)
+        
+        if streaming or workers > 1 or seek_to_cutoff or sketch_size:
+            try:
+                aggregator = self._aggregate_log_files(
+                    log_files, cutoff_date, workers=workers, seek_to_cutoff=seek_to_cutoff,
+                    sketch_size=sketch_size
+                )
+            except Exception as e:
+                logger.error(f"❌ Error reading log file: {str(e)}")
+                return {"error": str(e)}
+            
+            self._write_stores(aggregator, replace=True, complete_from=cutoff_date)
+            if sketch_size:
+                results["sketch"] = {
+                    "top_k_capacity": sketch_size,
+                    "hll_precision": SKETCH_HLL_PRECISION,
+                    "distinct_count_relative_error": round(1.04 / (1 << SKETCH_HLL_PRECISION) ** 0.5, 4)
+                }
+            return self._finalize_results(results, aggregator)
+        
+        # Track AI crawler activity; the buffered requests feed the vectorized
+        # patterns, the aggregator fills the same result dict as streaming runs
+        ai_requests = []
+        all_requests = []
+        aggregator = CrawlerStatsAggregator(count_ips=self._count_ips, session_gap=self.session_gap)
+        
+        try:
+            for log_file in log_files:
+                parse_entry = self._line_parser(log_file)
+                with self._open_log_file(log_file) as f:
+                    for line_num, line in enumerate(f):
+                        if line_num % 10000 == 0:
+                            logger.info(f"📈 Processed {line_num} log entries...")
+                        
+                        # Parse log entry
+                        parsed = parse_entry(line)
+                        if not parsed or not self._is_within_date_range(parsed['timestamp'], cutoff_date):
+                            continue
+                        
+                        all_requests.append(parsed)
+                        aggregator.add_request(parsed)
+                        
+                        # Check if this is an AI crawler
+                        crawler_info = self._identify_ai_crawler(parsed['user_agent'], parsed['ip'])
+                        if crawler_info:
+                            parsed['crawler_type'] = crawler_info['type']
+                            parsed['crawler_name'] = crawler_info['name']
+                            parsed['ip_verified'] = crawler_info.get('ip_verified')
+                            ai_requests.append(parsed)
+                            aggregator.add_ai_request(parsed)
+            
+            logger.info(f"✅ Processed {len(all_requests)} total requests, {len(ai_requests)} AI crawler requests")
+            
+        except Exception as e:
+            logger.error(f"❌ Error reading log file: {str(e)}")
+            return {"error": str(e)}
+        
+        results = self._finalize_results(results, aggregator)
+        if patterns_backend != 'python':
+            # Same histograms from the buffered requests; GeoIP breakdowns stay as they are
+            results["crawl_patterns"].update(self._analyze_crawl_patterns(ai_requests, backend=patterns_backend))
+        return results
+    
+    def follow_access_logs(self, log_file_path: str, checkpoint_path: str, days_back: int = 30) -> Dict:
+        """
+        Incrementally analyze access logs, parsing only bytes appended since the last run
+        
+        Read positions are remembered per file identity (device and inode,
+        checked against a first-line fingerprint) in a checkpoint, and the
+        aggregates built so far are kept as one shard per log day. A run
+        parses only new bytes and rewrites only the days they fall on, so
+        hourly refreshes cost time proportional to new traffic and the
+        window's days, not to all history. Rotated files (access.log ->
+        access.log.1) are finished from their saved offset, truncated files
+        are re-read from the start, and compressed rotations are read once.
+        
+        Args:
+            log_file_path: Access log file, directory or glob (see parse_access_logs)
+            checkpoint_path: JSON checkpoint holding read offsets (day shards
+                are stored in `<checkpoint_path>.days/`)
+            days_back: Number of days to analyze, applied in whole log days:
+                days before the cutoff's day are dropped from the checkpoint
+            
+        Returns:
+            Dict: AI crawler analysis results over the window's days
+        """
+        logger.info(f"📊 Following access logs for new AI crawler activity...")
+        
+        store = CrawlerCheckpointStore(checkpoint_path).load()
+        log_files = self._with_rotated_files(self._find_log_files(log_file_path), store)
+        if not log_files:
+            logger.error(f"❌ Log file not found: {log_file_path}")
+            return {"error": "Log file not found"}
+        
+        results = self._new_results(days_back)
+        cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+        first_day = cutoff_date.strftime('%Y-%m-%d')
+        # Lines ingested by this run, per log day; their rollups / events are added to the stores
+        new_days = DailyCrawlerAggregators(self._new_aggregator)
+        
+        new_bytes = 0
+        keys = []
+        try:
+            for log_file in log_files:
+                stat = os.stat(log_file)
+                key = file_key(stat)
+                keys.append(key)
+                state = store.file_state(key, log_file)
+                is_stale = stat.st_mtime < cutoff_date.timestamp()
+                
+                # Compressed rotations never change, so they are read at most once
+                if self._is_compressed(log_file):
+                    if state is None and not is_stale:
+                        parse_entry = self._line_parser(log_file)
+                        with self._open_log_file(log_file) as f:
+                            for line in f:
+                                self._aggregate_line(line, cutoff_date, new_days, parse_entry)
+                        new_bytes += stat.st_size
+                    store.update_file(key, log_file, stat.st_size, complete=True)
+                    continue
+                
+                offset = state['offset'] if state else 0
+                if offset > stat.st_size:
+                    logger.info(f"🔁 {log_file} was truncated, reading it from the start")
+                    offset = 0
+                if state is None and is_stale:
+                    offset = stat.st_size
+                
+                new_offset = self._aggregate_appended_lines(log_file, offset, cutoff_date, new_days)
+                new_bytes += new_offset - offset
+                store.update_file(key, log_file, new_offset)
+        except Exception as e:
+            logger.error(f"❌ Error reading log file: {str(e)}")
+            return {"error": str(e)}
+        
+        # Written before the checkpoint: a crash in between re-reads rather than drops lines
+        for day, day_lines in sorted(new_days.days.items()):
+            self._write_stores(day_lines)
+            if day < first_day:
+                continue
+            saved = store.load_day(day)
+            day_aggregates = CrawlerStatsAggregator.from_dict(saved).merge(day_lines) if saved else day_lines
+            store.save_day(day, day_aggregates.to_dict())
+        dropped = store.drop_days_before(first_day)
+        store.window_start = max(store.window_start or cutoff_date, cutoff_date)
+        store.forget_missing(keys)
+        store.save()
+        
+        # Days merge in order, so crawl sessions join across midnight
+        aggregator = CrawlerStatsAggregator(count_ips=self._count_ips, session_gap=self.session_gap)
+        days = sorted(store.days)
+        for day in days:
+            saved = store.load_day(day)
+            if saved:
+                aggregator.merge(CrawlerStatsAggregator.from_dict(saved))
+        logger.info(f"✅ Ingested {new_bytes:,} new bytes; {aggregator.total_requests} requests "
+                    f"in the last {len(days)} log days")
+        
+        results = self._finalize_results(results, aggregator)
+        if store.window_start > cutoff_date:
+            # Lines before the checkpoint's window (e.g. after raising days_back) were never ingested
+            covered = round((datetime.now().astimezone() - store.window_start) / timedelta(days=1), 1)
+            results["analysis_period"] = f"{covered:g} days (since {store.window_start.date().isoformat()})"
+        results["incremental"] = {
+            "since": days[0] if days else None,
+            "days": len(days),
+            "dropped_days": len(dropped),
+            "files": len(log_files),
+            "new_bytes": new_bytes
+        }
+        return results
+    
+    def open_log_stream(self, days_back: int = 30, sketch_size: Optional[int] = None) -> CrawlerLogStream:
+        """
+        Start analyzing a log that arrives in chunks, without writing it to disk
+        
+        Feed the chunks to the returned CrawlerLogStream, call snapshot() for
+        partial results and finish() for the final ones.
+        
+        Args:
+            days_back: Number of days to analyze
+            sketch_size: Fixed-memory page tracking (see parse_access_logs)
+        """
+        return CrawlerLogStream(self, days_back=days_back, sketch_size=sketch_size)
+    
+    def analyze_rollups(self, days_back: int = 30) -> Dict:
+        """
+        Build results from the hourly rollup store instead of reparsing logs
+        
+        The window is applied in whole hours and published IP range checks are
+        not part of the rollups. Adds week-over-week change per crawler and a
+        daily `bot_activity` trend.
+        
+        Args:
+            days_back: Number of days to analyze (whole hours)
+            
+        Returns:
+            Dict: AI crawler analysis results
+        """
+        if not self.rollup_store:
+            return {"error": "No rollup store configured"}
+        
+        logger.info(f"🗄️ Loading AI crawler rollups for the last {days_back} days...")
+        cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+        aggregator = self.rollup_store.load_aggregator(since=cutoff_date)
+        
+        results = self._finalize_results(self._new_results(days_back), aggregator)
+        results["week_over_week"] = self.rollup_store.week_over_week()
+        results["bot_activity"] = [
+            {'timestamp': point['date'], 'bot_name': point['crawler_type'], 'requests': point['requests']}
+            for point in self.rollup_store.crawler_trend(days_back)
+        ]
+        return results
+    
+    def analyze_events(self, days_back: int = 30, crawler_type: Optional[str] = None) -> Dict:
+        """
+        Build results from the exported event dataset instead of reparsing logs
+        
+        Only the day and crawler partitions in the window are read. Totals of
+        all traffic come from the exported hourly counts (whole hours).
+        
+        Args:
+            days_back: Number of days to analyze
+            crawler_type: Only analyze one crawler type
+            
+        Returns:
+            Dict: AI crawler analysis results
+        """
+        if not self.event_store:
+            return {"error": "No event store configured"}
+        
+        logger.info(f"🧊 Loading AI crawler events for the last {days_back} days...")
+        cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+        aggregator = self.event_store.load_aggregator(since=cutoff_date, crawler_type=crawler_type,
+                                                      count_ips=self._count_ips, session_gap=self.session_gap)
+        return self._finalize_results(self._new_results(days_back), aggregator)
+
+    def analyze_event_patterns(self, days_back: int = 30, crawler_type: Optional[str] = None,
+                               backend: str = 'vectorized') -> Dict:
+        """
+        Crawl pattern histograms of the exported events, without the rest of the analysis
+
+        Args:
+            days_back: Number of days to analyze
+            crawler_type: Only analyze one crawler type
+            backend: 'vectorized' reads only the four columns involved and counts
+                them with NumPy; 'python' rebuilds an aggregator row by row
+
+        Returns:
+            Dict: Histograms in the `crawl_patterns` result format
+        """
+        if backend not in CRAWL_PATTERN_BACKENDS:
+            raise ValueError(f"Unknown crawl patterns backend: {backend}")
+        if not self.event_store:
+            return {"error": "No event store configured"}
+
+        cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+        crawler_types = [crawler_type] if crawler_type else None
+        if backend == 'python':
+            return self.event_store.load_aggregator(since=cutoff_date, crawler_type=crawler_type).crawl_patterns()
+        table = self.event_store.load_table(since=cutoff_date, crawler_types=crawler_types,
+                                            columns=['timestamp', 'utc_offset_minutes', 'status', 'url'])
+        if table is None:
+            return CrawlerStatsAggregator().crawl_patterns()
+        return crawl_patterns_from_table(table)
+
+    def _with_rotated_files(self, log_files: List[str], store: 'CrawlerCheckpointStore') -> List[str]:
+        """Add rotated copies (path.1) of partially read files that left the file set"""
+        present = set()
+        for log_file in log_files:
+            present.add(file_key(os.stat(log_file)))
+        
+        rotated = []
+        for key, state in store.files.items():
+            if state.get('complete') or key in present:
+                continue
+            candidate = f"{state['path']}.1"
+            if os.path.isfile(candidate) and file_key(os.stat(candidate)) == key:
+                rotated.append(candidate)
+                present.add(key)
+        return rotated + log_files
+    
+    def _aggregate_appended_lines(self, log_file_path: str, offset: int, cutoff_date: datetime,
+                                  aggregator: CrawlerStatsAggregator) -> int:
+        """Aggregate complete lines after `offset` and return the offset after the last one"""
+        parse_entry = self._line_parser(log_file_path)
+        with open(log_file_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # Leave a partially written last line for the next run
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                self._aggregate_line(line.decode('utf-8', errors='ignore'), cutoff_date, aggregator, parse_entry)
+        return offset
+    
+    def _new_aggregator(self, sketch_size: Optional[int] = None) -> CrawlerStatsAggregator:
+        """Empty aggregator, collecting what the configured stores and IP enrichment need"""
+        return CrawlerStatsAggregator(collect_rollups=self.rollup_store is not None, sketch_size=sketch_size,
+                                      count_ips=self._count_ips, collect_events=self.event_store is not None,
+                                      session_gap=self.session_gap)
+    
+    def _write_stores(self, aggregator: CrawlerStatsAggregator, replace: bool = False,
+                      complete_from: Optional[datetime] = None, complete_until: Optional[datetime] = None) -> None:
+        """Flush collected rollups and events to the configured stores"""
+        if self.rollup_store:
+            self.rollup_store.write(aggregator.rollups, aggregator.hourly_traffic, replace=replace,
+                                    complete_from=complete_from, complete_until=complete_until)
+        if self.event_store:
+            self.event_store.write(aggregator.events, aggregator.hourly_traffic, replace=replace,
+                                   complete_from=complete_from, complete_until=complete_until)
+    
+    def _new_results(self, days_back: int) -> Dict:
+        """Empty results skeleton"""
+        return {
             "analysis_period": f"{days_back} days",
             "total_requests": 0,
             "ai_requests": 0,
@@ -148,65 +1470,357 @@ class AICrawlerAnalytics:
             "recommendations": [],
             "timestamp": datetime.now().isoformat()
         }
+    
+    def _find_log_files(self, log_path: str) -> List[str]:
+        """Resolve a file, directory or glob into log files ordered oldest rotation first"""
+        if os.path.isdir(log_path):
+            candidates = [
+                os.path.join(log_path, name) for name in os.listdir(log_path)
+                if not name.startswith('.')
+            ]
+        elif any(char in log_path for char in '*?['):
+            candidates = glob.glob(log_path)
+        else:
+            candidates = [log_path]
         
-        # Date threshold for analysis
-        cutoff_date = datetime.now() - timedelta(days=days_back)
+        log_files = [path for path in candidates if os.path.isfile(path)]
+        # access.log.30.gz ... access.log.1, access.log
+        log_files.sort(key=lambda path: (-self._rotation_index(path), path))
+        return log_files
+    
+    def _rotation_index(self, log_file_path: str) -> int:
+        """Rotation number of a log file (access.log.3.gz -> 3, access.log -> 0)"""
+        match = ROTATED_LOG_PATTERN.search(os.path.basename(log_file_path))
+        return int(match.group(1)) if match else 0
+    
+    def _skip_stale_log_files(self, log_files: List[str], cutoff_date: datetime) -> List[str]:
+        """Drop files last written before the cutoff, without opening them"""
+        cutoff_ts = cutoff_date.timestamp()
+        fresh_files = []
+        for log_file in log_files:
+            if os.path.getmtime(log_file) < cutoff_ts:
+                logger.info(f"⏭️ Skipping {log_file} (last modified before the analysis window)")
+                continue
+            fresh_files.append(log_file)
+        return fresh_files
+    
+    def _open_log_file(self, log_file_path: str):
+        """Open a plain or compressed log file as a text stream"""
+        if log_file_path.endswith('.gz'):
+            return gzip.open(log_file_path, 'rt', encoding='utf-8', errors='ignore')
+        if log_file_path.endswith('.bz2'):
+            return bz2.open(log_file_path, 'rt', encoding='utf-8', errors='ignore')
+        if log_file_path.endswith('.zst'):
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError(f"zstandard is required to read {log_file_path} (pip install zstandard)")
+            raw = open(log_file_path, 'rb')
+            return io.TextIOWrapper(
+                zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True),
+                encoding='utf-8', errors='ignore'
+            )
+        return open(log_file_path, 'r', encoding='utf-8', errors='ignore')
+    
+    def _is_compressed(self, log_file_path: str) -> bool:
+        """Compressed files are streamed whole; only plain files can be seeked or chunked"""
+        return log_file_path.endswith(COMPRESSED_LOG_SUFFIXES)
+    
+    def _aggregate_log_files(self, log_files: List[str], cutoff_date: datetime, workers: int = 1,
+                             seek_to_cutoff: bool = False, sketch_size: Optional[int] = None) -> CrawlerStatsAggregator:
+        """Stream a set of log files into one CrawlerStatsAggregator"""
+        if workers > 1:
+            return self._aggregate_log_files_parallel(log_files, cutoff_date, workers, seek_to_cutoff, sketch_size)
         
-        # Track AI crawler activity
-        ai_requests = []
-        all_requests = []
+        aggregator = self._new_aggregator(sketch_size)
+        for log_file in log_files:
+            aggregator.merge(self._aggregate_log_file(
+                log_file, cutoff_date, seek_to_cutoff=seek_to_cutoff, sketch_size=sketch_size
+            ))
         
-        try:
-            with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f):
-                    if line_num % 10000 == 0:
-                        logger.info(f"📈 Processed {line_num} log entries...")
-                    
-                    # Parse log entry
-                    parsed = self._parse_log_entry(line)
-                    if not parsed or not self._is_within_date_range(parsed['timestamp'], cutoff_date):
-                        continue
-                    
-                    all_requests.append(parsed)
-                    
-                    # Check if this is an AI crawler
-                    crawler_info = self._identify_ai_crawler(parsed['user_agent'], parsed['ip'])
-                    if crawler_info:
-                        parsed['crawler_type'] = crawler_info['type']
-                        parsed['crawler_name'] = crawler_info['name']
-                        ai_requests.append(parsed)
-            
-            logger.info(f"✅ Processed {len(all_requests)} total requests, {len(ai_requests)} AI crawler requests")
+        if len(log_files) > 1:
+            logger.info(f"✅ Processed {len(log_files)} files: {aggregator.total_requests} total requests, {aggregator.ai_requests} AI crawler requests")
+        return aggregator
+    
+    def _aggregate_log_file(self, log_file_path: str, cutoff_date: datetime,
+                            seek_to_cutoff: bool = False, sketch_size: Optional[int] = None) -> CrawlerStatsAggregator:
+        """Stream a log file into a CrawlerStatsAggregator in a single pass"""
+        start_offset = 0
+        if seek_to_cutoff and not self._is_compressed(log_file_path):
+            start_offset = self._find_cutoff_offset(log_file_path, cutoff_date)
+            logger.info(f"⏩ Skipping {start_offset:,} bytes before the analysis window")
+        
+        if start_offset:
+            aggregator = self._aggregate_byte_range(
+                log_file_path, start_offset, os.path.getsize(log_file_path), cutoff_date, sketch_size
+            )
+            logger.info(f"✅ Processed {aggregator.total_requests} total requests, {aggregator.ai_requests} AI crawler requests")
+            return aggregator
+        
+        aggregator = self._new_aggregator(sketch_size)
+        parse_entry = self._line_parser(log_file_path)
+        
+        with self._open_log_file(log_file_path) as f:
+            for line_num, line in enumerate(f):
+                if line_num % 10000 == 0:
+                    logger.info(f"📈 Processed {line_num} log entries...")
+                self._aggregate_line(line, cutoff_date, aggregator, parse_entry)
+        
+        logger.info(f"✅ Processed {aggregator.total_requests} total requests, {aggregator.ai_requests} AI crawler requests")
+        return aggregator
+    
+    def _find_cutoff_offset(self, log_file_path: str, cutoff_date: datetime) -> int:
+        """
+        Binary-search an append-ordered log for where the analysis window starts
+        
+        Each probe seeks to a byte offset, skips the partial line and parses the
+        next complete one. The returned offset is a line start at or before the
+        first in-window line, so the regular date filter still applies after it.
+        """
+        # Allow for slightly out-of-order entries around the cutoff
+        search_cutoff = cutoff_date - SEEK_CUTOFF_SLACK
+        file_size = os.path.getsize(log_file_path)
+        parse_entry = self._line_parser(log_file_path)
+        
+        low, high = 0, file_size
+        with open(log_file_path, 'rb') as f:
+            while low < high:
+                middle = (low + high) // 2
+                f.seek(middle)
+                if middle > low:
+                    f.readline()
+                
+                timestamp, line_end = self._next_log_timestamp(f, parse_entry)
+                if timestamp is not None and timestamp < search_cutoff:
+                    # Everything up to the end of this line is older than the window
+                    low = line_end
+                else:
+                    high = middle
+        
+        return min(low, file_size)
+    
+    def _next_log_timestamp(self, f, parse_entry: Callable[[str], Optional[Dict]],
+                            max_lines: int = 32) -> Tuple[Optional[datetime], int]:
+        """Timestamp of the next parseable line and the offset just after it"""
+        for _ in range(max_lines):
+            line = f.readline()
+            if not line:
+                break
+            parsed = parse_entry(line.decode('utf-8', errors='ignore'))
+            if parsed:
+                return parsed['timestamp'], f.tell()
+        return None, f.tell()
+    
+    def _aggregate_log_files_parallel(self, log_files: List[str], cutoff_date: datetime, workers: int,
+                                      seek_to_cutoff: bool = False,
+                                      sketch_size: Optional[int] = None) -> CrawlerStatsAggregator:
+        """Parse log chunks and compressed files in a process pool and merge the partials"""
+        tasks = []
+        for log_file in log_files:
+            if self._is_compressed(log_file):
+                tasks.append((self._aggregate_log_file, (log_file, cutoff_date, False, sketch_size)))
+                continue
             
-        except Exception as e:
-            logger.error(f"❌ Error reading log file: {str(e)}")
-            return {"error": str(e)}
+            start_offset = self._find_cutoff_offset(log_file, cutoff_date) if seek_to_cutoff else 0
+            # Several chunks per worker keeps the pool busy when chunks parse unevenly
+            for start, end in self._split_log_file(log_file, workers * 4, start_offset):
+                tasks.append((self._aggregate_byte_range, (log_file, start, end, cutoff_date, sketch_size)))
+        logger.info(f"⚙️ Parsing {len(tasks)} chunks from {len(log_files)} files with {workers} workers...")
+        
+        aggregator = self._new_aggregator(sketch_size)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(task, *args) for task, args in tasks]
+            # Merge in file order so page ordering matches a sequential pass
+            for chunk_num, future in enumerate(futures, 1):
+                aggregator.merge(future.result())
+                logger.info(f"📈 Merged chunk {chunk_num}/{len(tasks)}")
         
-        # Analyze results
-        results["total_requests"] = len(all_requests)
-        results["ai_requests"] = len(ai_requests)
-        results["ai_request_percentage"] = round((len(ai_requests) / max(1, len(all_requests))) * 100, 2)
+        logger.info(f"✅ Processed {aggregator.total_requests} total requests, {aggregator.ai_requests} AI crawler requests")
+        return aggregator
+    
+    def _split_log_file(self, log_file_path: str, chunks: int, start_offset: int = 0) -> List[Tuple[int, int]]:
+        """Split a file into byte ranges that start and end on line boundaries"""
+        file_size = os.path.getsize(log_file_path)
+        chunk_size = max(1, (file_size - start_offset) // max(1, chunks))
         
-        # Analyze by crawler type
-        results["crawlers_detected"] = self._analyze_crawler_types(ai_requests)
+        boundaries = [start_offset]
+        with open(log_file_path, 'rb') as f:
+            position = start_offset + chunk_size
+            while position < file_size:
+                # Move the boundary forward to the start of the next line
+                f.seek(position)
+                f.readline()
+                boundary = f.tell()
+                if boundary >= file_size:
+                    break
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+                position = boundary + chunk_size
+        boundaries.append(file_size)
         
-        # Analyze most crawled pages
-        results["top_crawled_pages"] = self._analyze_crawled_pages(ai_requests)
+        return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    
+    def _aggregate_byte_range(self, log_file_path: str, start: int, end: int, cutoff_date: datetime,
+                              sketch_size: Optional[int] = None) -> CrawlerStatsAggregator:
+        """Aggregate the lines of a file between two line-aligned byte offsets"""
+        aggregator = self._new_aggregator(sketch_size)
+        # Sniffed from the file's first lines, which may lie outside this range
+        parse_entry = self._line_parser(log_file_path)
         
-        # Analyze crawl patterns
-        results["crawl_patterns"] = self._analyze_crawl_patterns(ai_requests)
+        with open(log_file_path, 'rb') as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                line = f.readline()
+                if not line:
+                    break
+                position += len(line)
+                self._aggregate_line(line.decode('utf-8', errors='ignore'), cutoff_date, aggregator, parse_entry)
         
-        # Generate recommendations
+        return aggregator
+    
+    def _sample_log_files(self, log_files: List[str], cutoff_date: datetime, sample_rate: float,
+                          reservoir_size: int = 2000, seed: Optional[int] = None,
+                          seek_to_cutoff: bool = False) -> CrawlerSampleAggregator:
+        """Parse and classify a random sample of lines from a set of log files"""
+        aggregator = CrawlerSampleAggregator(sample_rate, reservoir_size, seed)
+        
+        for log_file in log_files:
+            if self._is_compressed(log_file):
+                f = self._open_log_file(log_file)
+            else:
+                # Binary reads leave skipped lines undecoded
+                f = open(log_file, 'rb')
+                if seek_to_cutoff:
+                    f.seek(self._find_cutoff_offset(log_file, cutoff_date))
+            parse_entry = self._line_parser(log_file)
+            
+            with f:
+                while True:
+                    # Skipped lines are consumed inside islice without being parsed
+                    line = next(islice(f, aggregator.sample.skip(), None), None)
+                    if line is None:
+                        break
+                    if isinstance(line, bytes):
+                        line = line.decode('utf-8', errors='ignore')
+                    aggregator.sampled_lines += 1
+                    self._aggregate_line(line, cutoff_date, aggregator, parse_entry)
+        
+        logger.info(f"✅ Sampled {aggregator.sampled_lines} lines: ~{aggregator.total_requests} total requests, ~{aggregator.ai_requests} AI crawler requests")
+        return aggregator
+    
+    def _aggregate_line(self, line: str, cutoff_date: datetime, aggregator: CrawlerStatsAggregator,
+                        parse_entry: Optional[Callable[[str], Optional[Dict]]] = None):
+        """Parse, classify and fold a single log line into the aggregator"""
+        parsed = (parse_entry or self._parse_log_entry)(line)
+        if not parsed or not self._is_within_date_range(parsed['timestamp'], cutoff_date):
+            return
+        
+        aggregator.add_request(parsed)
+        
+        # Check if this is an AI crawler
+        crawler_info = self._identify_ai_crawler(parsed['user_agent'], parsed['ip'])
+        if crawler_info:
+            parsed['crawler_type'] = crawler_info['type']
+            parsed['crawler_name'] = crawler_info['name']
+            parsed['ip_verified'] = crawler_info.get('ip_verified')
+            aggregator.add_ai_request(parsed)
+    
+    def _finalize_results(self, results: Dict, aggregator: CrawlerStatsAggregator) -> Dict:
+        """Fill the results dict from streamed aggregates"""
+        results["total_requests"] = aggregator.total_requests
+        results["ai_requests"] = aggregator.ai_requests
+        results["ai_request_percentage"] = round((aggregator.ai_requests / max(1, aggregator.total_requests)) * 100, 2)
+        # Distinct (crawler, IP) pairs are verified concurrently, after the scan
+        dns_verification = (self.dns_verifier.verify(aggregator.ai_ips)
+                            if self.dns_verifier is not None and aggregator.ai_ips else None)
+        results["crawlers_detected"] = aggregator.crawlers_detected(dns_verification)
+        results["top_crawled_pages"] = aggregator.top_crawled_pages()
+        # Distinct bot IPs are resolved once, after the scan
+        results["crawl_patterns"] = aggregator.crawl_patterns(self.geoip.lookup if self.geoip else None)
+        crawl_sessions = aggregator.crawl_sessions()
+        if crawl_sessions is not None:
+            results["crawl_sessions"] = crawl_sessions
         results["recommendations"] = self._generate_crawler_recommendations(results)
         
         self.analysis_results = results
         return results
     
+    def _line_parser(self, log_file_path: str) -> Callable[[str], Optional[Dict]]:
+        """Entry parser for a log file, sniffing the format from its first lines"""
+        if self.log_format == 'combined':
+            return self._parse_log_entry
+        with self._open_log_file(log_file_path) as f:
+            head = list(islice(f, SNIFF_LINES))
+        return self._new_line_parser(head)
+    
+    def _new_line_parser(self, head: List[str]) -> Callable[[str], Optional[Dict]]:
+        """Entry parser for the configured format, or the one detected from `head`"""
+        log_format = self.log_format
+        if log_format == 'auto':
+            log_format = detect_log_format(head)
+            logger.info(f"🔎 Detected {log_format} log format")
+        if log_format == 'combined':
+            return self._parse_log_entry
+        
+        parser = LOG_PARSERS[log_format](self._parse_log_timestamp)
+        # Header lines (e.g. W3C #Fields) set up the columns for chunks read without them
+        for line in head:
+            if line.startswith('#'):
+                parser.parse(line)
+        return parser.parse
+    
     def _parse_log_entry(self, line: str) -> Optional[Dict]:
-        """Parse a single access log entry (Common Log Format)"""
+        """
+        Parse a single access log entry (Common/Combined Log Format)
+        
+        Splits on the fixed bracket and quote positions of the format and
+        falls back to the regex parser for lines that don't fit that layout.
+        """
         # Common Log Format: IP - - [timestamp] "method url protocol" status size "referer" "user-agent"
-        pattern = r'(\S+) \S+ \S+ \[([^\]]+)\] "(\S+) (\S+) (\S+)" (\d+) (\S+) "([^"]*)" "([^"]*)"'
-        match = re.match(pattern, line)
+        # Quotes split the line into: head, request, status/size, referer, separator, user agent
+        fields = line.split('"', 6)
+        if len(fields) < 7 or fields[4] != ' ':
+            return self._parse_log_entry_regex(line)
+        head, request, response = fields[0], fields[1], fields[2]
+        
+        # Tabs or other whitespace inside the space-separated tokens need the regex
+        if not (head.isprintable() and request.isprintable() and response.isprintable()):
+            return self._parse_log_entry_regex(line)
+        
+        try:
+            ip, ident, user, timestamp_field = head.split(' ', 3)
+            method, url, protocol = request.split(' ')
+            leading, status, size, trailing = response.split(' ')
+        except ValueError:
+            return self._parse_log_entry_regex(line)
+        
+        if (leading or trailing or not (ip and ident and user and method and url and protocol and size)
+                or not status.isdecimal() or timestamp_field[:1] != '[' or timestamp_field[-2:] != '] '):
+            return self._parse_log_entry_regex(line)
+        
+        timestamp_str = timestamp_field[1:-2]
+        if ']' in timestamp_str:
+            return self._parse_log_entry_regex(line)
+        timestamp = self._timestamp_cache.get(timestamp_str) or self._parse_log_timestamp(timestamp_str)
+        if timestamp is None:
+            return None
+        
+        return {
+            'ip': ip,
+            'timestamp': timestamp,
+            'method': method,
+            'url': url,
+            'protocol': protocol,
+            'status': int(status),
+            'size': size if size != '-' else 0,
+            'referer': fields[3],
+            'user_agent': fields[5]
+        }
+    
+    def _parse_log_entry_regex(self, line: str) -> Optional[Dict]:
+        """Parse a single access log entry with the full Combined Log Format regex"""
+        match = COMBINED_LOG_PATTERN.match(line)
         
         if not match:
             return None
@@ -231,102 +1845,70 @@ class AICrawlerAnalytics:
         except Exception:
             return None
     
+    def _parse_log_timestamp(self, timestamp_str: str) -> Optional[datetime]:
+        """Parse a log timestamp, cached per distinct string since many lines share a second"""
+        timestamp = self._timestamp_cache.get(timestamp_str)
+        if timestamp is None:
+            try:
+                timestamp = self._convert_log_timestamp(timestamp_str)
+            except ValueError:
+                return None
+            if len(self._timestamp_cache) >= TIMESTAMP_CACHE_SIZE:
+                self._timestamp_cache.clear()
+            self._timestamp_cache[timestamp_str] = timestamp
+        return timestamp
+    
+    def _convert_log_timestamp(self, timestamp_str: str) -> datetime:
+        """Convert `10/Oct/2024:13:55:36 +0000` without strptime when it has the fixed layout"""
+        month = MONTH_NUMBERS.get(timestamp_str[3:6])
+        digits = timestamp_str[0:2] + timestamp_str[7:11] + timestamp_str[12:14] + timestamp_str[15:17] + timestamp_str[18:20]
+        if (month is None or len(timestamp_str) != 26 or not (digits.isascii() and digits.isdigit())
+                or timestamp_str[2] != '/' or timestamp_str[6] != '/' or timestamp_str[11] != ':'
+                or timestamp_str[14] != ':' or timestamp_str[17] != ':' or timestamp_str[20] != ' '):
+            return datetime.strptime(timestamp_str, '%d/%b/%Y:%H:%M:%S %z')
+        
+        offset = timestamp_str[21:]
+        tzinfo = self._timezone_cache.get(offset)
+        if tzinfo is None:
+            tzinfo = self._timezone_cache[offset] = datetime.strptime(offset, '%z').tzinfo
+        return datetime(
+            int(timestamp_str[7:11]), month, int(timestamp_str[0:2]),
+            int(timestamp_str[12:14]), int(timestamp_str[15:17]), int(timestamp_str[18:20]),
+            tzinfo=tzinfo
+        )
+    
     def _is_within_date_range(self, timestamp: datetime, cutoff_date: datetime) -> bool:
         """Check if timestamp is within analysis range"""
         return timestamp >= cutoff_date
     
     def _identify_ai_crawler(self, user_agent: str, ip: str) -> Optional[Dict]:
         """Identify if a request is from an AI crawler"""
-        for crawler_type, crawler_info in self.ai_crawler_patterns.items():
-            # Check user agent patterns
-            for pattern in crawler_info['user_agents']:
-                if re.search(pattern, user_agent, re.IGNORECASE):
-                    return {
-                        'type': crawler_type,
-                        'name': crawler_info['name'],
-                        'purpose': crawler_info['purpose']
-                    }
-            
-            # Check IP patterns
-            for ip_pattern in crawler_info['ips']:
-                if ip.startswith(ip_pattern):
-                    return {
-                        'type': crawler_type,
-                        'name': crawler_info['name'],
-                        'purpose': crawler_info['purpose']
-                    }
+        # Both lookups are cached per distinct user agent / IP
+        index = self.user_agent_classifier.classify(user_agent)
+        ip_matches = self.ip_ranges.lookup(ip)
         
-        return None
-    
-    def _analyze_crawler_types(self, ai_requests: List[Dict]) -> Dict:
-        """Analyze AI crawler activity by type"""
-        crawler_stats = defaultdict(lambda: {
-            'requests': 0,
-            'unique_pages': set(),
-            'success_rate': 0,
-            'avg_requests_per_day': 0
-        })
+        # IP ranges of crawler types ranked above the user-agent match take precedence
+        for crawler_type in ip_matches:
+            ip_index = self._crawler_index.get(crawler_type)
+            if ip_index is not None and (index is None or ip_index < index):
+                index = ip_index
         
-        for request in ai_requests:
-            crawler_type = request.get('crawler_type', 'unknown')
-            crawler_stats[crawler_type]['requests'] += 1
-            crawler_stats[crawler_type]['unique_pages'].add(request['url'])
-            
-        # Convert sets to counts and calculate metrics
-        for crawler_type, stats in crawler_stats.items():
-            stats['unique_pages'] = len(stats['unique_pages'])
-            stats['success_rate'] = round(
-                len([r for r in ai_requests if r.get('crawler_type') == crawler_type and r['status'] == 200]) / 
-                max(1, stats['requests']) * 100, 1
-            )
-            # Approximate requests per day (assumes 30-day period)
-            stats['avg_requests_per_day'] = round(stats['requests'] / 30, 1)
+        if index is None:
+            return None
         
-        return dict(crawler_stats)
+        # Flag claimed crawlers whose IP falls outside their published ranges
+        crawler_type = self._crawler_types[index]
+        if crawler_type in self.ip_ranges.published_crawlers:
+            return self._crawler_matches[index][ip_matches.get(crawler_type, False)]
+        return self._crawler_matches[index][None]
     
-    def _analyze_crawled_pages(self, ai_requests: List[Dict]) -> Dict:
-        """Analyze which pages AI crawlers visit most"""
-        page_stats = defaultdict(lambda: {
-            'visits': 0,
-            'crawlers': set(),
-            'last_crawled': None,
-            'success_rate': 0
-        })
-        
-        for request in ai_requests:
-            url = request['url']
-            page_stats[url]['visits'] += 1
-            page_stats[url]['crawlers'].add(request.get('crawler_name', 'Unknown'))
-            
-            # Track most recent crawl
-            if not page_stats[url]['last_crawled'] or request['timestamp'] > page_stats[url]['last_crawled']:
-                page_stats[url]['last_crawled'] = request['timestamp']
+    def _analyze_crawl_patterns(self, ai_requests: List[Dict], backend: str = 'python') -> Dict:
+        """Analyze AI crawler behavior patterns with the Python loops or the vectorized backend"""
+        if backend not in CRAWL_PATTERN_BACKENDS:
+            raise ValueError(f"Unknown crawl patterns backend: {backend}")
+        if backend == 'vectorized':
+            return crawl_patterns_from_requests(ai_requests)
         
-        # Convert to list and sort by visits
-        top_pages = []
-        for url, stats in page_stats.items():
-            stats['crawlers'] = list(stats['crawlers'])
-            stats['last_crawled'] = stats['last_crawled'].isoformat() if stats['last_crawled'] else None
-            
-            # Calculate success rate
-            url_requests = [r for r in ai_requests if r['url'] == url]
-            successful = len([r for r in url_requests if r['status'] == 200])
-            stats['success_rate'] = round(successful / max(1, len(url_requests)) * 100, 1)
-            
-            top_pages.append({
-                'url': url,
-                'visits': stats['visits'],
-                'crawlers': stats['crawlers'],
-                'last_crawled': stats['last_crawled'],
-                'success_rate': stats['success_rate']
-            })
-        
-        # Sort by visits and return top 20
-        top_pages.sort(key=lambda x: x['visits'], reverse=True)
-        return {'pages': top_pages[:20]}
-    
-    def _analyze_crawl_patterns(self, ai_requests: List[Dict]) -> Dict:
-        """Analyze AI crawler behavior patterns"""
         patterns = {
             'hourly_distribution': defaultdict(int),
             'daily_distribution': defaultdict(int),
@@ -450,6 +2032,9 @@ class AICrawlerAnalytics:
             return "No analysis results available. Run parse_access_logs() first."
         
         results = self.analysis_results
+        sample_note = ""
+        if results.get('sample'):
+            sample_note = f"- **Estimated** from a {results['sample']['sample_rate']:.2%} line sample\n"
         
         report = f"""
 # 🤖 AI Crawler Analytics Report
@@ -460,7 +2045,7 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **Total Requests**: {results['total_requests']:,}
 - **AI Crawler Requests**: {results['ai_requests']:,} ({results.get('ai_request_percentage', 0)}%)
 - **AI Crawlers Detected**: {len(results['crawlers_detected'])}
-
+{sample_note}
 ## 🤖 AI Crawler Activity
 
 """
@@ -471,7 +2056,30 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             report += f"- **Requests**: {stats['requests']:,}\n"
             report += f"- **Unique Pages**: {stats['unique_pages']}\n" 
             report += f"- **Success Rate**: {stats['success_rate']}%\n"
-            report += f"- **Avg Daily Requests**: {stats['avg_requests_per_day']}\n\n"
+            report += f"- **Avg Daily Requests**: {stats['avg_requests_per_day']}\n"
+            if 'verified' in stats:
+                report += f"- **Reverse DNS**: {stats['verified']:,} verified, {stats['spoofed']:,} spoofed requests\n"
+            report += "\n"
+        
+        countries = results.get('crawl_patterns', {}).get('countries')
+        if countries:
+            report += "## 🌍 Crawler Origins\n\n"
+            for country, requests in list(countries.items())[:10]:
+                report += f"- **{country}**: {requests:,} requests\n"
+            report += "\n"
+        
+        crawl_sessions = results.get('crawl_sessions')
+        if crawl_sessions and crawl_sessions['crawlers']:
+            report += f"## 🔁 Crawl Sessions (gap {crawl_sessions['session_gap_minutes']:g} min)\n\n"
+            for crawler_type, sessions in crawl_sessions['crawlers'].items():
+                crawler_name = self.ai_crawler_patterns.get(crawler_type, {}).get('name', crawler_type)
+                report += f"- **{crawler_name}**: {sessions['sessions']:,} sessions, "
+                report += f"median {sessions['median_session_minutes']} min and "
+                report += f"{sessions['median_pages_per_session']} pages per session"
+                if sessions['median_recrawl_hours'] is not None:
+                    report += f", recrawls pages every {sessions['median_recrawl_hours']} h (median)"
+                report += "\n"
+            report += "\n"
         
         report += "## 📄 Most Crawled Pages\n\n"
         for i, page in enumerate(results['top_crawled_pages']['pages'][:10], 1):
@@ -547,13 +2155,78 @@ Crawl-delay: 1
 
 # Example usage
 if __name__ == "__main__":
-    analytics = AICrawlerAnalytics()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Analyze AI crawler activity in web server access logs')
+    parser.add_argument('--log-file', type=str,
+                        help='Access log file, directory or glob (rotated .gz/.bz2/.zst files are supported)')
+    parser.add_argument('--days-back', type=int, default=30, help='Number of days to analyze')
+    parser.add_argument('--workers', type=int, default=1, help='Number of parallel parsing processes')
+    parser.add_argument('--checkpoint', type=str,
+                        help='Follow mode: only parse bytes appended since the run that wrote this checkpoint')
+    parser.add_argument('--seek', action='store_true',
+                        help='Binary-search the log for the start of the analysis window instead of reading it all')
+    parser.add_argument('--sketch-size', type=int,
+                        help='Fixed-memory mode: track this many top pages and estimate distinct counts')
+    parser.add_argument('--sample-rate', type=float,
+                        help='Quick approximate mode: parse this fraction of lines and report confidence intervals')
+    parser.add_argument('--patterns-backend', type=str, default='python', choices=CRAWL_PATTERN_BACKENDS,
+                        help="Crawl pattern histograms: 'python' loops over a streaming parse, or 'vectorized' "
+                             "NumPy over a buffered parse (keeps every request in memory)")
+    parser.add_argument('--log-format', type=str, default='auto', choices=['auto'] + LOG_FORMATS,
+                        help='Access log format (default: sniffed from the first lines of each file)')
+    parser.add_argument('--report', type=str, help='Write a markdown report to this path')
+    parser.add_argument('--ip-ranges', action='append', metavar='CRAWLER=PATH',
+                        help='Published IP range JSON for a crawler type, e.g. chatgpt=gptbot.json (repeatable)')
+    parser.add_argument('--geoip-country-db', type=str, help='MaxMind Country/City .mmdb for a per-country breakdown')
+    parser.add_argument('--geoip-asn-db', type=str, help='MaxMind ASN .mmdb for a per-ASN breakdown')
+    parser.add_argument('--verify-dns', action='store_true',
+                        help='Verify crawler IPs with forward-confirmed reverse DNS (verified / spoofed counts)')
+    parser.add_argument('--dns-cache', type=str, help='JSON file caching reverse DNS results between runs')
+    parser.add_argument('--rollup-db', type=str,
+                        help='SQLite file to store hourly rollups in (written by every log parse)')
+    parser.add_argument('--from-rollups', action='store_true',
+                        help='Report from the rollup store instead of parsing logs (requires --rollup-db)')
+    parser.add_argument('--event-dir', type=str,
+                        help='Export parsed AI crawler events to this partitioned dataset (written by every log parse)')
+    parser.add_argument('--event-format', type=str, default='parquet', choices=EVENT_FORMATS,
+                        help='Event file format (default: parquet)')
+    parser.add_argument('--from-events', action='store_true',
+                        help='Report from the exported events instead of parsing logs (requires --event-dir)')
+    parser.add_argument('--session-gap', type=float, default=SESSION_GAP / 60,
+                        help='Minutes of inactivity that end a crawl session (default: 30)')
+    args = parser.parse_args()
     
-    # Example: Analyze server logs
-    # results = analytics.parse_access_logs('/var/log/apache2/access.log', days_back=30)
+    analytics = AICrawlerAnalytics(ip_range_files=parse_range_file_specs(args.ip_ranges), rollup_db=args.rollup_db,
+                                   log_format=args.log_format, geoip_country_db=args.geoip_country_db,
+                                   geoip_asn_db=args.geoip_asn_db, verify_dns=args.verify_dns,
+                                   dns_cache_path=args.dns_cache, event_dir=args.event_dir,
+                                   event_format=args.event_format, session_gap_minutes=args.session_gap)
     
-    # Generate example report
-    print("🤖 AI Crawler Analytics Module Ready!")
-    print("📊 Use analytics.parse_access_logs(log_file_path) to analyze your server logs")
-    print("📄 Use analytics.generate_crawler_report() to create comprehensive reports")
-    print("🤖 Use analytics.create_robots_txt_for_ai() to generate AI-friendly robots.txt") 
\ No newline at end of file
+    if args.from_rollups or args.from_events:
+        results = (analytics.analyze_rollups(days_back=args.days_back) if args.from_rollups
+                   else analytics.analyze_events(days_back=args.days_back))
+        if "error" in results:
+            raise SystemExit(results["error"])
+        print(analytics.generate_crawler_report(output_file=args.report))
+    elif args.log_file:
+        # Analyze server logs
+        if args.checkpoint:
+            results = analytics.follow_access_logs(args.log_file, args.checkpoint, days_back=args.days_back)
+        else:
+            try:
+                results = analytics.parse_access_logs(
+                    args.log_file, days_back=args.days_back, workers=args.workers, seek_to_cutoff=args.seek,
+                    sketch_size=args.sketch_size, sample_rate=args.sample_rate,
+                    streaming=args.patterns_backend == 'python', patterns_backend=args.patterns_backend
+                )
+            except ValueError as e:
+                parser.error(str(e))
+        if "error" in results:
+            raise SystemExit(results["error"])
+        print(analytics.generate_crawler_report(output_file=args.report))
+    else:
+        print("🤖 AI Crawler Analytics Module Ready!")
+        print("📊 Use analytics.parse_access_logs(log_file_path) to analyze your server logs")
+        print("📄 Use analytics.generate_crawler_report() to create comprehensive reports")
+        print("🤖 Use analytics.create_robots_txt_for_ai() to generate AI-friendly robots.txt")
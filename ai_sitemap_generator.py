@@ -1,9 +1,10 @@
 import os
+import asyncio
+import functools
 import yaml
 import json
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urldefrag
 import pandas as pd
 import numpy as np
 from sentence_transformers import SentenceTransformer
@@ -18,8 +19,14 @@ import argparse
 import logging
 from pathlib import Path
 import time
+from contextlib import nullcontext
 from typing import List, Dict, Optional
 
+from sitemap_crawler import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, AsyncSiteCrawler, FetchedPage
+from sitemap_extractor import extract_page_features
+from sitemap_frontier import URLFrontier, canonicalize_url, path_importance
+from sitemap_http_cache import SitemapHTTPCache
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,12 +40,20 @@ nltk.download('punkt', quiet=True)
 nltk.download('stopwords', quiet=True)
 
 class AISitemapGenerator:
-    def __init__(self):
-        """Initialize the AI Sitemap Generator"""
-        # Force CPU device for deployment compatibility
-        import torch
-        device = 'cpu'  # Force CPU for cloud deployment
-        self.model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+    def __init__(self, load_model=True):
+        """
+        Initialize the AI Sitemap Generator
+        
+        Args:
+            load_model (bool): Load the sentence embedding model (page parsing
+                processes only extract pages and skip it)
+        """
+        self.model = None
+        if load_model:
+            # Force CPU device for deployment compatibility
+            import torch
+            device = 'cpu'  # Force CPU for cloud deployment
+            self.model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
         
         # Default headers for requests
         self.headers = {
@@ -47,7 +62,8 @@ class AISitemapGenerator:
             'Accept-Language': 'en-US,en;q=0.9',
         }
     
-    def crawl_website(self, base_url, max_pages=100, exclude_patterns=None):
+    def crawl_website(self, base_url, max_pages=100, exclude_patterns=None, concurrency=1,
+                      per_host=DEFAULT_PER_HOST, bloom_capacity=None, parse_workers=0, cache_path=None):
         """
         Crawl a website to find pages for the sitemap
         
@@ -55,106 +71,74 @@ class AISitemapGenerator:
             base_url (str): Base URL of the website
             max_pages (int): Maximum number of pages to crawl
             exclude_patterns (list): URL patterns to exclude
+            concurrency (int): Pages fetched at once; above 1 the crawl runs on the
+                async crawler (see crawl_website_async)
+            per_host (int): Pages fetched at once from any one host (async crawler)
+            bloom_capacity (int): Remember seen URLs in a Bloom filter sized for this
+                many URLs instead of an exact set (million-URL crawls)
+            parse_workers (int): Processes parsing fetched pages while the async
+                crawler keeps fetching (see crawl_website_async)
+            cache_path (str): SQLite HTTP cache (see sitemap_http_cache); pages
+                unchanged since the last crawl answer 304 and reuse their record
+            
+        Pages are fetched most important first (home page, then shallower
+        paths), each canonical URL once.
             
         Returns:
             list: Discovered pages with metadata
         """
-        if not base_url.startswith(('http://', 'https://')):
-            base_url = 'https://' + base_url
+        if concurrency > 1 or parse_workers:
+            return asyncio.run(self.crawl_website_async(
+                base_url, max_pages=max_pages, exclude_patterns=exclude_patterns,
+                concurrency=concurrency, per_host=per_host, bloom_capacity=bloom_capacity,
+                parse_workers=parse_workers, cache_path=cache_path
+            ))
+        
+        base_url = self._normalize_base_url(base_url)
+        exclude_regex = self._exclude_regex(exclude_patterns)
             
         # Initialize variables
-        discovered_urls = set()
-        queued_urls = [base_url]
-        visited_urls = set()
+        frontier = URLFrontier(bloom_capacity=bloom_capacity)
+        frontier.add(base_url)
         pages = []
         
-        # Set default exclude patterns if none provided
-        if exclude_patterns is None:
-            exclude_patterns = [
-                r'/tag/', r'/category/', r'/author/', r'/page/', 
-                r'\?', r'\.pdf$', r'\.jpg$', r'\.png$', r'\.gif$',
-                r'/wp-admin/', r'/wp-includes/', r'/wp-content/'
-            ]
-            
-        # Compile exclude patterns
-        exclude_regex = re.compile('|'.join(exclude_patterns))
-        
         logger.info(f"Starting crawl of {base_url}")
-        with tqdm(total=max_pages, desc="Crawling pages") as pbar:
-            while queued_urls and len(pages) < max_pages:
-                # Get next URL from queue
-                current_url = queued_urls.pop(0)
-                
-                # Skip if already visited
-                if current_url in visited_urls:
-                    continue
-                    
-                # Mark as visited
-                visited_urls.add(current_url)
+        with self._http_cache(cache_path) as cache, tqdm(total=max_pages, desc="Crawling pages") as pbar:
+            while frontier and len(pages) < max_pages:
+                # Get the most important queued URL
+                current_url, depth = frontier.pop()
                 
                 try:
-                    # Fetch page
-                    response = requests.get(current_url, headers=self.headers, timeout=10)
+                    # Fetch page, only if changed since the cached copy
+                    cached = cache.get(current_url) if cache is not None else None
+                    headers = dict(self.headers, **cached.conditional_headers()) if cached else self.headers
+                    response = requests.get(current_url, headers=headers, timeout=10)
                     response.raise_for_status()
+                    # Links resolve against the URL the page was served from (after redirects)
+                    page_url = response.url
+                    if canonicalize_url(page_url) != canonicalize_url(current_url) and not frontier.mark_seen(page_url):
+                        # Redirected to a page that is already crawled or queued
+                        continue
                     
-                    # Parse HTML
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract page metadata
-                    title = soup.title.text.strip() if soup.title else ""
-                    description = ""
-                    meta_desc = soup.find('meta', attrs={'name': 'description'})
-                    if meta_desc and 'content' in meta_desc.attrs:
-                        description = meta_desc['content']
-                        
-                    # Extract main content
-                    content = self._extract_main_content(soup)
-                    
-                    # Calculate page importance
-                    importance = self._calculate_page_importance(soup, content, current_url, base_url)
-                    
-                    # Extract keywords
-                    keywords = self._extract_keywords(title, description, content)
+                    if cached and response.status_code == 304:
+                        # Unchanged: reuse the cached record and links without parsing
+                        cache.revalidated(current_url, response.headers)
+                        record, links = cached.record, cached.links
+                    else:
+                        # Parse HTML in one pass
+                        features = extract_page_features(response.text)
+                        record = self._page_record(features, page_url, base_url, response)
+                        links = self._extract_links(features.links, page_url, base_url, exclude_regex)
+                        if cache is not None:
+                            cache.store(current_url, response.headers, record, links)
                     
                     # Add page to results
-                    pages.append({
-                        'url': current_url,
-                        'title': title,
-                        'description': description,
-                        'importance': importance,
-                        'last_modified': self._extract_last_modified(soup, response),
-                        'keywords': keywords,
-                        'content_length': len(content),
-                        'headings': self._extract_headings(soup),
-                    })
-                    
+                    pages.append(record)
                     pbar.update(1)
                     
-                    # Extract links from page
-                    links = soup.find_all('a', href=True)
-                    for link in links:
-                        href = link['href']
-                        
-                        # Skip empty links, anchors, and non-HTTP links
-                        if not href or href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
-                            continue
-                        
-                        # Convert relative URLs to absolute
-                        absolute_url = urljoin(current_url, href)
-                        
-                        # Skip external links and excluded patterns
-                        parsed_base = urlparse(base_url)
-                        parsed_url = urlparse(absolute_url)
-                        if parsed_url.netloc != parsed_base.netloc or exclude_regex.search(absolute_url):
-                            continue
-                        
-                        # Remove fragments and normalize URL
-                        normalized_url = absolute_url.split('#')[0]
-                        
-                        # Add to queue if not already discovered
-                        if normalized_url not in discovered_urls and normalized_url not in visited_urls:
-                            discovered_urls.add(normalized_url)
-                            queued_urls.append(normalized_url)
+                    # Queue new links (the frontier skips ones already seen)
+                    for normalized_url in links:
+                        frontier.add(normalized_url, depth + 1)
                 
                 except Exception as e:
                     logger.error(f"Error crawling {current_url}: {str(e)}")
@@ -163,81 +147,160 @@ class AISitemapGenerator:
         logger.info(f"Crawl complete. Discovered {len(pages)} pages.")
         return pages
     
-    def _extract_main_content(self, soup):
-        """Extract the main content from a webpage"""
-        # Try to find content in common content containers
-        content_containers = [
-            soup.find('article'),
-            soup.find('main'),
-            soup.find(id='content'),
-            soup.find(class_='content'),
-            soup.find(id='main'),
-            soup.find(class_='main'),
-        ]
+    async def crawl_website_async(self, base_url, max_pages=100, exclude_patterns=None,
+                                  concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                                  bloom_capacity=None, parse_workers=0, cache_path=None):
+        """
+        Crawl a website with many pages in flight over one pooled aiohttp session
         
-        # Use the first valid container found
-        content_elem = next((elem for elem in content_containers if elem is not None), soup.body)
+        Builds the same page records as crawl_website. Use this from code that
+        already runs an event loop (the API); crawl_website(concurrency=N)
+        wraps it for synchronous callers.
         
-        if content_elem:
-            # Remove script, style, and nav elements
-            for elem in content_elem.find_all(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                elem.decompose()
+        Args:
+            base_url (str): Base URL of the website
+            max_pages (int): Maximum number of pages to crawl
+            exclude_patterns (list): URL patterns to exclude
+            concurrency (int): Pages fetched at once
+            per_host (int): Pages fetched at once from any one host
+            bloom_capacity (int): Remember seen URLs in a Bloom filter sized for this
+                many URLs instead of an exact set
+            parse_workers (int): Processes parsing pages and extracting records;
+                fetched pages wait on a bounded queue, so fetching continues while
+                parsing uses every core (0 parses on the event loop)
+            cache_path (str): SQLite HTTP cache; fetches are conditional and 304s
+                reuse the cached record without parsing
             
-            # Extract text
-            text = content_elem.get_text(separator=' ', strip=True)
-            # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            return text
+        Returns:
+            list: Discovered pages with metadata, in the order they were fetched
+        """
+        base_url = self._normalize_base_url(base_url)
+        exclude_regex = self._exclude_regex(exclude_patterns)
+        
+        if parse_workers:
+            # Worker processes get a picklable function, not this generator and its model
+            parse_page = functools.partial(parse_page_in_worker, base_url=base_url,
+                                           exclude_patterns=exclude_patterns)
+        else:
+            def parse_page(fetched: FetchedPage):
+                return self._parse_fetched_page(fetched, base_url, exclude_regex)
         
-        return ""
+        logger.info(f"Starting crawl of {base_url} ({concurrency} concurrent, {per_host} per host, "
+                    f"{parse_workers or 'no'} parser processes)")
+        with self._http_cache(cache_path) as cache, tqdm(total=max_pages, desc="Crawling pages") as pbar:
+            crawler = AsyncSiteCrawler(parse_page, headers=self.headers, concurrency=concurrency,
+                                       per_host=per_host, on_page=lambda page: pbar.update(1),
+                                       parse_workers=parse_workers, cache=cache)
+            pages = await crawler.crawl(base_url, max_pages, frontier=URLFrontier(bloom_capacity=bloom_capacity))
+        
+        logger.info(f"Crawl complete. Discovered {len(pages)} pages.")
+        return pages
+    
+    def _parse_fetched_page(self, fetched, base_url, exclude_regex):
+        """Page record and outgoing links of a page fetched by the async crawler"""
+        features = extract_page_features(fetched.text)
+        record = self._page_record(features, fetched.url, base_url, fetched)
+        return record, self._extract_links(features.links, fetched.url, base_url, exclude_regex)
+    
+    def _http_cache(self, cache_path=None):
+        """Open the HTTP cache for a crawl, or a no-op context without one"""
+        return SitemapHTTPCache(cache_path) if cache_path else nullcontext()
+    
+    def _normalize_base_url(self, base_url):
+        """Default bare domains to https (the URL is otherwise fetched as given)"""
+        if not base_url.startswith(('http://', 'https://')):
+            base_url = 'https://' + base_url
+        return base_url
+    
+    def _exclude_regex(self, exclude_patterns=None):
+        """Compile URL exclude patterns, with defaults for archives, media and admin paths"""
+        # Set default exclude patterns if none provided
+        if exclude_patterns is None:
+            exclude_patterns = [
+                r'/tag/', r'/category/', r'/author/', r'/page/', 
+                r'\?', r'\.pdf$', r'\.jpg$', r'\.png$', r'\.gif$',
+                r'/wp-admin/', r'/wp-includes/', r'/wp-content/'
+            ]
+            
+        # Compile exclude patterns
+        return re.compile('|'.join(exclude_patterns))
+    
+    def _page_record(self, features, url, base_url, response):
+        """Build the page record from a page's extracted features (see sitemap_extractor)"""
+        # Calculate page importance
+        importance = self._calculate_page_importance(features, url, base_url)
+        
+        # Extract keywords
+        keywords = self._extract_keywords(features.title, features.description, features.content)
+        
+        return {
+            'url': url,
+            'title': features.title,
+            'description': features.description,
+            'importance': importance,
+            'last_modified': self._extract_last_modified(features, response),
+            'keywords': keywords,
+            'content_length': len(features.content),
+            'headings': features.headings,
+        }
     
-    def _calculate_page_importance(self, soup, content, url, base_url):
+    def _extract_links(self, hrefs, page_url, base_url, exclude_regex):
+        """Same-site, non-excluded links of a page as absolute URLs (the frontier dedups them canonically)"""
+        base_host = urlparse(canonicalize_url(base_url)).netloc
+        links = []
+        for href in hrefs:
+            # Skip empty links, anchors, and non-HTTP links
+            if not href or href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
+                continue
+            
+            # Convert relative URLs to absolute, resolved against the page as served, without fragment
+            absolute_url = urldefrag(urljoin(page_url, href))[0]
+            
+            # Skip external links (whatever their host case or default port) and excluded patterns
+            if (urlparse(canonicalize_url(absolute_url)).netloc != base_host
+                    or exclude_regex.search(absolute_url)):
+                continue
+            
+            links.append(absolute_url)
+        return links
+    
+    def _calculate_page_importance(self, features, url, base_url):
         """Calculate the importance score of a page (0.0 to 1.0)"""
         score = 0.5  # Default importance
         
-        # URL structure factors
+        # URL structure factors (the crawl frontier orders pages by the same score)
         parsed_url = urlparse(url)
-        path_parts = parsed_url.path.strip('/').split('/')
         
         # Home page gets highest importance
-        if url == base_url or url == base_url + '/' or parsed_url.path == '/' or parsed_url.path == '':
+        if canonicalize_url(url) == canonicalize_url(base_url):
             score = 1.0
-        # Top-level pages get high importance
-        elif len(path_parts) == 1:
-            score = 0.8
-        # Second-level pages
-        elif len(path_parts) == 2:
-            score = 0.6
-        # Deep pages get lower importance
         else:
-            score = max(0.2, 0.8 - (len(path_parts) - 2) * 0.1)
+            score = path_importance(parsed_url.path)
         
         # Boost score based on content factors
         # Length of content
-        if len(content) > 2000:
+        if len(features.content) > 2000:
             score = min(1.0, score + 0.1)
         
         # Links to the page
-        canonical = soup.find('link', rel='canonical')
-        if canonical and canonical.get('href') == url:
+        if features.canonical and canonicalize_url(urljoin(url, features.canonical)) == canonicalize_url(url):
             score = min(1.0, score + 0.1)
         
         # Schema.org markup
-        if soup.find(attrs={"itemtype": re.compile(r'schema.org')}):
+        if features.has_schema_org:
             score = min(1.0, score + 0.05)
         
         return round(score, 2)
     
-    def _extract_last_modified(self, soup, response):
+    def _extract_last_modified(self, features, response):
         """Extract the last modified date of a page"""
         # Try to get from Last-Modified header
         if 'Last-Modified' in response.headers:
             return response.headers['Last-Modified']
         
         # Try to get from meta tags
-        modified_meta = soup.find('meta', attrs={'property': 'article:modified_time'})
-        if modified_meta:
-            return modified_meta['content']
+        if features.modified_time is not None:
+            return features.modified_time
             
         # Use current date as fallback
         return datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
@@ -258,15 +321,6 @@ class AISitemapGenerator:
         # Return top keywords
         return term_freq.head(max_keywords).index.tolist()
     
-    def _extract_headings(self, soup):
-        """Extract headings from the page"""
-        headings = {}
-        for level in range(1, 7):
-            h_tags = soup.find_all(f'h{level}')
-            if h_tags:
-                headings[f'h{level}'] = [tag.get_text(strip=True) for tag in h_tags]
-        return headings
-    
     def generate_site_ai_yaml(self, pages, brand_info, output_file='site-ai.yaml'):
         """
         Generate site-ai.yaml file
@@ -546,12 +600,33 @@ class AISitemapGenerator:
             return coverage_count / len(all_keywords)
         return 0
 
+# Model-free generator of a page parsing process, created on its first page
+_worker_generator = None
+
+
+def parse_page_in_worker(fetched, base_url, exclude_patterns=None):
+    """Parse a fetched page in a process-pool worker (see crawl_website_async)"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = AISitemapGenerator(load_model=False)
+    exclude_regex = _worker_generator._exclude_regex(exclude_patterns)
+    return _worker_generator._parse_fetched_page(fetched, base_url, exclude_regex)
+
 # Example usage
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate AI sitemaps for a website')
     parser.add_argument('--url', type=str, required=True, help='Website URL to crawl')
     parser.add_argument('--max-pages', type=int, default=100, help='Maximum pages to crawl')
     parser.add_argument('--output-dir', type=str, default='.', help='Output directory')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Pages fetched at once (1 = sequential crawl)')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help='Pages fetched at once per host')
+    parser.add_argument('--bloom-capacity', type=int,
+                        help='Track seen URLs in a Bloom filter sized for this many URLs (huge crawls)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Processes parsing fetched pages (0 = parse on the crawl loop)')
+    parser.add_argument('--http-cache', type=str,
+                        help='SQLite file caching pages between runs; unchanged pages are revalidated, not refetched')
     args = parser.parse_args()
     
     generator = AISitemapGenerator()
@@ -573,7 +648,9 @@ if __name__ == "__main__":
     }
     
     # Crawl website
-    pages = generator.crawl_website(args.url, max_pages=args.max_pages)
+    pages = generator.crawl_website(args.url, max_pages=args.max_pages, concurrency=args.concurrency,
+                                    per_host=args.per_host, bloom_capacity=args.bloom_capacity,
+                                    parse_workers=args.parse_workers, cache_path=args.http_cache)
     
     # Generate site-ai.yaml
     generator.generate_site_ai_yaml(
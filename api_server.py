@@ -11,11 +11,13 @@ Endpoints:
 - /api/visibility/check - AI Visibility Checker (Airtop)
 - /api/questions/map - Question & Intent Mapper
 - /api/sitemap/generate - AI Sitemap Generator
+- /api/crawler/analyze - AI Crawler Analytics (log file on the API host)
+- /api/crawler/upload - AI Crawler Analytics (streamed upload, progress via SSE)
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import asyncio
@@ -64,11 +66,43 @@ content_optimizer = ContentOptimizer()
 visibility_checker = AirtopLLMVisibility()
 question_mapper = QuestionIntentMapper()
 sitemap_generator = AISitemapGenerator()
-crawler_analytics = AICrawlerAnalytics()
+# MaxMind databases for country/ASN breakdowns are server settings, never request fields
+GEOIP_COUNTRY_DB = os.getenv('GEOIP_COUNTRY_DB') or None
+GEOIP_ASN_DB = os.getenv('GEOIP_ASN_DB') or None
+crawler_analytics = AICrawlerAnalytics(geoip_country_db=GEOIP_COUNTRY_DB, geoip_asn_db=GEOIP_ASN_DB)
 
 # Create output directory
 os.makedirs('aio_output', exist_ok=True)
 
+# Hourly crawler rollups kept by analyses that set use_rollups (never a client-chosen path)
+CRAWLER_ROLLUP_DB = 'aio_output/crawler_rollups.db'
+
+# Reverse DNS results shared by analyses that set verify_dns
+CRAWLER_DNS_CACHE = 'aio_output/crawler_dns_cache.json'
+
+# Parsed AI crawler events exported by analyses that set export_events
+CRAWLER_EVENT_DIR = 'aio_output/crawler_events'
+
+# Most fetches one sitemap crawl keeps in flight, overall and per host, so
+# the API can't be used to flood a third-party site
+SITEMAP_MAX_CONCURRENCY = 32
+SITEMAP_MAX_PER_HOST = 8
+
+# Pages cached between sitemap crawls that set use_http_cache
+SITEMAP_HTTP_CACHE = 'aio_output/sitemap_http_cache.db'
+
+# Parser processes one analysis may fork
+CRAWLER_MAX_WORKERS = os.cpu_count() or 1
+
+# Longest analysis window, in days
+CRAWLER_MAX_DAYS_BACK = 3650
+
+# Largest top-K page summary a fixed-memory (sketch_size) analysis may ask for
+CRAWLER_MAX_SKETCH_SIZE = 100000
+
+# Uploaded log bytes between partial results on /api/crawler/upload
+CRAWLER_UPLOAD_PROGRESS_BYTES = 8 * 1024 * 1024
+
 # Pydantic models for API requests
 
 class ContentOptimizeRequest(BaseModel):
@@ -102,11 +136,34 @@ class SitemapGenerateRequest(BaseModel):
     value_proposition: str
     differentiators: List[str]
     max_pages: Optional[int] = 100
+    concurrency: Optional[int] = 16
+    per_host: Optional[int] = 8
+    bloom_capacity: Optional[int] = None
+    parse_workers: Optional[int] = 0
+    use_http_cache: Optional[bool] = False
 
 class CrawlerAnalyticsRequest(BaseModel):
-    log_file_path: str
+    log_file_path: Optional[str] = None
     days_back: Optional[int] = 30
     generate_report: Optional[bool] = True
+    workers: Optional[int] = 1
+    seek_to_cutoff: Optional[bool] = False
+    use_rollups: Optional[bool] = False
+    from_rollups: Optional[bool] = False
+    sketch_size: Optional[int] = None
+    sample_rate: Optional[float] = None
+    log_format: Optional[str] = "auto"
+    verify_dns: Optional[bool] = False
+    export_events: Optional[bool] = False
+    event_format: Optional[str] = "parquet"
+    from_events: Optional[bool] = False
+    session_gap_minutes: Optional[float] = 30
+    patterns_backend: Optional[str] = "python"
+
+def _check_range(name: str, value: Optional[int], low: int, high: int) -> None:
+    """Reject a request whose numeric setting is out of range with a 400"""
+    if value is not None and not low <= value <= high:
+        raise HTTPException(status_code=400, detail=f"{name} must be between {low} and {high}")
 
 # API Endpoints
 
@@ -293,6 +350,9 @@ async def generate_sitemap(request: SitemapGenerateRequest):
     
     Creates AI-optimized sitemaps and files for better discoverability
     """
+    _check_range("concurrency", request.concurrency, 1, SITEMAP_MAX_CONCURRENCY)
+    _check_range("per_host", request.per_host, 1, SITEMAP_MAX_PER_HOST)
+    _check_range("parse_workers", request.parse_workers, 0, CRAWLER_MAX_WORKERS)
     try:
         logger.info(f"Generating AI sitemap for: {request.url}")
         
@@ -308,7 +368,12 @@ async def generate_sitemap(request: SitemapGenerateRequest):
         }
         
         # Crawl website
-        pages = sitemap_generator.crawl_website(request.url, max_pages=request.max_pages)
+        pages = await sitemap_generator.crawl_website_async(
+            request.url, max_pages=request.max_pages, concurrency=request.concurrency or 1,
+            per_host=request.per_host or 1, bloom_capacity=request.bloom_capacity,
+            parse_workers=request.parse_workers or 0,
+            cache_path=SITEMAP_HTTP_CACHE if request.use_http_cache else None
+        )
         
         # Generate files
         generation_id = str(uuid.uuid4())
@@ -352,14 +417,56 @@ async def analyze_crawler_activity(request: CrawlerAnalyticsRequest):
     
     Analyzes server logs to track AI crawler activity and optimize for better AI visibility
     """
+    _check_range("workers", request.workers, 1, CRAWLER_MAX_WORKERS)
+    _check_range("sketch_size", request.sketch_size, 1, CRAWLER_MAX_SKETCH_SIZE)
+    _check_range("days_back", request.days_back, 1, CRAWLER_MAX_DAYS_BACK)
+    if request.sample_rate is not None and not 0 < request.sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be greater than 0 and at most 1")
     try:
-        logger.info(f"Analyzing AI crawler activity in: {request.log_file_path}")
-        
-        # Parse access logs for AI crawler activity
-        results = crawler_analytics.parse_access_logs(
-            request.log_file_path, 
-            days_back=request.days_back
-        )
+        analytics = crawler_analytics
+        rollup_db = CRAWLER_ROLLUP_DB if request.use_rollups or request.from_rollups else None
+        event_dir = CRAWLER_EVENT_DIR if request.export_events or request.from_events else None
+        if (rollup_db or (request.log_format or "auto") != "auto"
+                or request.verify_dns or event_dir
+                or (request.session_gap_minutes or 30) != 30):
+            analytics = AICrawlerAnalytics(rollup_db=rollup_db, log_format=request.log_format or "auto",
+                                           geoip_country_db=GEOIP_COUNTRY_DB, geoip_asn_db=GEOIP_ASN_DB,
+                                           verify_dns=bool(request.verify_dns),
+                                           dns_cache_path=CRAWLER_DNS_CACHE,
+                                           event_dir=event_dir,
+                                           event_format=request.event_format or "parquet",
+                                           session_gap_minutes=request.session_gap_minutes or 30)
+        
+        if request.from_rollups:
+            # Serve hourly rollups instead of reparsing the logs
+            logger.info(f"Loading AI crawler rollups from: {rollup_db}")
+            results = analytics.analyze_rollups(days_back=request.days_back)
+        elif request.from_events:
+            # Rebuild results from the exported event dataset
+            logger.info(f"Loading AI crawler events from: {event_dir}")
+            results = analytics.analyze_events(days_back=request.days_back)
+        else:
+            if not request.log_file_path:
+                raise HTTPException(status_code=400,
+                                    detail="log_file_path is required unless from_rollups or from_events is set")
+            logger.info(f"Analyzing AI crawler activity in: {request.log_file_path}")
+            
+            # Parse access logs for AI crawler activity
+            # The vectorized pattern histograms run over a buffered (non-streaming) parse
+            patterns_backend = request.patterns_backend or "python"
+            try:
+                results = analytics.parse_access_logs(
+                    request.log_file_path, 
+                    days_back=request.days_back,
+                    workers=request.workers or 1,
+                    seek_to_cutoff=bool(request.seek_to_cutoff),
+                    sketch_size=request.sketch_size,
+                    sample_rate=request.sample_rate,
+                    streaming=patterns_backend == "python",
+                    patterns_backend=patterns_backend
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         if "error" in results:
             raise HTTPException(status_code=400, detail=results["error"])
@@ -383,16 +490,76 @@ async def analyze_crawler_activity(request: CrawlerAnalyticsRequest):
         # Generate report if requested
         if request.generate_report:
             report_file = f'aio_output/crawler_report_{analysis_id}.md'
-            report_content = crawler_analytics.generate_crawler_report(output_file=report_file)
+            report_content = analytics.generate_crawler_report(output_file=report_file)
             response_data["report_file"] = report_file
             response_data["report_preview"] = report_content[:500] + "..." if len(report_content) > 500 else report_content
         
         return response_data
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Crawler analytics error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/api/crawler/upload")
+async def upload_crawler_log(request: Request, days_back: int = 30, sketch_size: Optional[int] = None,
+                             use_rollups: bool = False, log_format: str = "auto",
+                             verify_dns: bool = False, session_gap_minutes: float = 30):
+    """
+    🎯 Streaming AI Crawler Analytics API
+    
+    Parses a raw (optionally gzipped) access log from the request body as it
+    arrives, without buffering the file. Responds with server-sent events: a
+    `progress` event with partial results every few MB, then a `result` event.
+    
+    Example: curl -N -T access.log.gz "http://localhost:8000/api/crawler/upload?days_back=7"
+    """
+    _check_range("sketch_size", sketch_size, 1, CRAWLER_MAX_SKETCH_SIZE)
+    _check_range("days_back", days_back, 1, CRAWLER_MAX_DAYS_BACK)
+    try:
+        analytics = AICrawlerAnalytics(rollup_db=CRAWLER_ROLLUP_DB if use_rollups else None, log_format=log_format,
+                                       geoip_country_db=GEOIP_COUNTRY_DB, geoip_asn_db=GEOIP_ASN_DB,
+                                       verify_dns=verify_dns, dns_cache_path=CRAWLER_DNS_CACHE,
+                                       session_gap_minutes=session_gap_minutes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    log_stream = analytics.open_log_stream(days_back=days_back, sketch_size=sketch_size)
+    logger.info("Analyzing AI crawler activity in a streamed upload")
+    
+    async def events():
+        next_progress = CRAWLER_UPLOAD_PROGRESS_BYTES
+        try:
+            async for chunk in request.stream():
+                # Parsing is CPU-bound; keep the event loop free for other requests
+                await asyncio.to_thread(log_stream.feed, chunk)
+                if log_stream.bytes_received >= next_progress:
+                    next_progress = log_stream.bytes_received + CRAWLER_UPLOAD_PROGRESS_BYTES
+                    yield _sse_event("progress", await asyncio.to_thread(log_stream.snapshot))
+            
+            results = await asyncio.to_thread(log_stream.finish)
+            analysis_id = str(uuid.uuid4())
+            analysis_file = f'aio_output/crawler_analysis_{analysis_id}.json'
+            with open(analysis_file, 'w') as f:
+                json.dump(results, f, indent=2)
+            
+            yield _sse_event("result", {
+                "success": True,
+                "analysis_id": analysis_id,
+                "results": results,
+                "analysis_file": analysis_file,
+                "timestamp": datetime.now().isoformat()
+            })
+        except Exception as e:
+            logger.error(f"Crawler upload error: {str(e)}")
+            yield _sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.get("/api/crawler/robots-txt")
 async def generate_robots_txt(sitemap_url: Optional[str] = None):
     """
@@ -483,11 +650,18 @@ async def demo_crawler_analytics():
         "demo_request": {
             "log_file_path": "/var/log/apache2/access.log",
             "days_back": 30,
-            "generate_report": True
+            "generate_report": True,
+            "workers": 1,
+            "use_rollups": True
+        },
+        "rollup_request": {
+            "days_back": 30,
+            "from_rollups": True
         },
         "endpoint": "/api/crawler/analyze",
         "method": "POST",
-        "note": "Requires access to server log files"
+        "note": "Requires access to server log files; use_rollups keeps hourly rollups on the server, "
+                "and from_rollups answers from them without reparsing"
     }
 
 if __name__ == "__main__":
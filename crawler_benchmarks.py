@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Crawler Analytics Benchmarks
+============================
+
+Measures log parsing throughput for AICrawlerAnalytics so parser
+regressions show up before deploy.
+
+Usage:
+    python crawler_benchmarks.py parsers --lines 200000
+    python crawler_benchmarks.py formats --lines 200000
+    python crawler_benchmarks.py patterns --events 10000000
+    python crawler_benchmarks.py suite --sizes 1000000,10000000,50000000 --save baseline.json
+    python crawler_benchmarks.py suite --sizes 1000000 --baseline baseline.json --tolerance 0.1
+"""
+
+import argparse
+import glob
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ai_crawler_analytics import AICrawlerAnalytics
+from crawler_log_formats import LOG_FORMATS
+from crawler_log_generator import SyntheticLogConfig, SyntheticLogGenerator
+from crawler_vectorized import crawl_patterns_from_frame, crawl_patterns_from_requests
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUITE_SIZES = (1000000, 10000000, 50000000)
+
+# One line in this many is timed stage by stage in the per-stage pass
+STAGE_SAMPLE_EVERY = 16
+
+
+def generate_log_lines(count: int, log_format: str = 'combined', seed: int = 42) -> List[str]:
+    """Build log lines in any supported format with realistic repetition of timestamps and user agents"""
+    rng = random.Random(seed)
+    user_agents = [
+        "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.0; +https://openai.com/gptbot)",
+        "Mozilla/5.0 (compatible; PerplexityBot/1.0; +https://perplexity.ai/perplexitybot)",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+        "Mozilla/5.0 (compatible; ClaudeBot/1.0; +claudebot@anthropic.com)",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    ]
+    start = datetime.now(timezone.utc) - timedelta(days=7)
+    lines = []
+    if log_format == 'cloudfront':
+        lines.append("#Version: 1.0\n")
+        lines.append("#Fields: date time x-edge-location sc-bytes c-ip cs-method cs(Host) cs-uri-stem sc-status "
+                     "cs(Referer) cs(User-Agent) cs-uri-query\n")
+    for i in range(count):
+        # Roughly 20 requests per second of log time
+        timestamp = start + timedelta(seconds=i // 20)
+        ip = f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+        url = f'/blog/post-{rng.randint(1, 5000)}'
+        status = rng.choice([200, 200, 200, 301, 404])
+        size = rng.randint(200, 90000)
+        user_agent = rng.choice(user_agents)
+        
+        if log_format == 'nginx_json':
+            lines.append(json.dumps({
+                "time_local": timestamp.strftime('%d/%b/%Y:%H:%M:%S +0000'), "remote_addr": ip,
+                "request": f"GET {url} HTTP/1.1", "status": str(status), "body_bytes_sent": str(size),
+                "http_referer": "https://example.com/", "http_user_agent": user_agent
+            }) + "\n")
+        elif log_format == 'alb':
+            lines.append(
+                f'https {timestamp.strftime("%Y-%m-%dT%H:%M:%S")}.{rng.randint(0, 999999):06d}Z app/lb/50dc6c495c0c9188 '
+                f'{ip}:{rng.randint(1024, 65535)} 10.0.0.1:80 0.000 0.001 0.000 {status} {status} 34 {size} '
+                f'"GET https://example.com:443{url} HTTP/1.1" "{user_agent}" ECDHE-RSA-AES128-GCM-SHA256 TLSv1.2 '
+                f'arn:aws:elasticloadbalancing:us-east-1:123456789012:targetgroup/tg/73e2d6bc24d8a067 '
+                f'"Root=1-58337262-36d228ad5d99923122bbe354" "example.com" "-" 0 '
+                f'{timestamp.strftime("%Y-%m-%dT%H:%M:%S")}.000000Z "forward" "-" "-" "10.0.0.1:80" "{status}" "-" "-"\n'
+            )
+        elif log_format == 'cloudfront':
+            lines.append('\t'.join([
+                timestamp.strftime('%Y-%m-%d'), timestamp.strftime('%H:%M:%S'), 'IAD89-C1', str(size), ip, 'GET',
+                'd111111abcdef8.cloudfront.net', url, str(status), 'https://example.com/',
+                user_agent.replace(' ', '%20'), '-'
+            ]) + '\n')
+        else:
+            lines.append(
+                f'{ip} - - [{timestamp.strftime("%d/%b/%Y:%H:%M:%S +0000")}] "GET {url} HTTP/1.1" {status} '
+                f'{size} "https://example.com/" "{user_agent}"\n'
+            )
+    return lines
+
+
+def generate_combined_log_lines(count: int, seed: int = 42) -> List[str]:
+    """Build combined-format lines with realistic repetition of timestamps and user agents"""
+    return generate_log_lines(count, 'combined', seed)
+
+
+def measure_lines_per_second(make_parser: Callable[[], Callable[[str], object]], lines: List[str],
+                             repeat: int = 5) -> float:
+    """Run a freshly built parser over every line and return its best throughput across runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        parse = make_parser()
+        started = time.perf_counter()
+        for line in lines:
+            parse(line)
+        best = min(best, time.perf_counter() - started)
+    return len(lines) / max(best, 1e-9)
+
+
+def benchmark_log_parsers(line_count: int = 200000) -> Dict:
+    """Compare the fast combined-format tokenizer against the regex parser"""
+    lines = generate_combined_log_lines(line_count)
+
+    # Fresh instances per run so the fast parser starts with an empty timestamp cache
+    regex_rate = measure_lines_per_second(lambda: AICrawlerAnalytics()._parse_log_entry_regex, lines)
+    fast_rate = measure_lines_per_second(lambda: AICrawlerAnalytics()._parse_log_entry, lines)
+
+    return {
+        "lines": line_count,
+        "regex_lines_per_sec": round(regex_rate),
+        "fast_lines_per_sec": round(fast_rate),
+        "speedup": round(fast_rate / regex_rate, 2)
+    }
+
+
+def benchmark_log_formats(line_count: int = 200000) -> Dict:
+    """Throughput of the detected parser for each supported log format"""
+    results = {"lines": line_count}
+    for log_format in LOG_FORMATS:
+        lines = generate_log_lines(line_count, log_format)
+        # Same path as a parse: sniff the first lines, then parse everything
+        rate = measure_lines_per_second(lambda: AICrawlerAnalytics()._new_line_parser(lines[:20]), lines)
+        results[f"{log_format}_lines_per_sec"] = round(rate)
+    return results
+
+
+def generate_event_frame(count: int, seed: int = 42) -> pd.DataFrame:
+    """Build a week of AI crawler events shaped like CrawlerEventStore.load_events() output"""
+    rng = np.random.default_rng(seed)
+    start = int((datetime.now(timezone.utc) - timedelta(days=7)).timestamp())
+    urls = [f'/blog/post-{i}' for i in range(5000)] + [f'/assets/file-{i}.{ext}' for i, ext in
+                                                        enumerate(['pdf', 'PNG', 'xml', 'js'] * 250)]
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(np.sort(rng.integers(start, start + 7 * 86400, count)), unit='s', utc=True),
+        'utc_offset_minutes': rng.choice(np.array([0, 0, 0, 60, -300], dtype=np.int16), count),
+        'status': rng.choice(np.array([200, 200, 200, 301, 404], dtype=np.int16), count),
+        'url': pd.Categorical.from_codes(rng.integers(0, len(urls), count), categories=urls)
+    })
+
+
+def event_requests(events: pd.DataFrame) -> List[Dict]:
+    """Request dicts, as the list analysis keeps them, for a slice of an event frame"""
+    timezones = {offset: timezone(timedelta(minutes=offset)) for offset in events['utc_offset_minutes'].unique().tolist()}
+    seconds = events['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64).tolist()
+    return [
+        {'timestamp': datetime.fromtimestamp(ts, timezones[offset]), 'status': status, 'url': url}
+        for ts, offset, status, url in zip(seconds, events['utc_offset_minutes'].tolist(),
+                                           events['status'].tolist(), events['url'].astype(str).tolist())
+    ]
+
+
+def benchmark_crawl_patterns(event_count: int = 10000000, chunk_size: int = 1000000) -> Dict:
+    """
+    Python loop vs vectorized crawl pattern histograms
+
+    Request dicts are built and timed a chunk at a time so 10M events fit in
+    memory; building them is not timed. The vectorized columnar figure is one
+    call over the whole categorical event frame.
+    """
+    analytics = AICrawlerAnalytics()
+    events = generate_event_frame(event_count)
+
+    started = time.perf_counter()
+    columnar = crawl_patterns_from_frame(events)
+    columnar_seconds = time.perf_counter() - started
+
+    loop_seconds = requests_seconds = 0.0
+    totals = {name: {} for name in columnar}
+    for offset in range(0, event_count, chunk_size):
+        requests = event_requests(events.iloc[offset:offset + chunk_size])
+        started = time.perf_counter()
+        patterns = analytics._analyze_crawl_patterns(requests)
+        loop_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        crawl_patterns_from_requests(requests)
+        requests_seconds += time.perf_counter() - started
+        for name, histogram in patterns.items():
+            for key, hits in histogram.items():
+                totals[name][key] = totals[name].get(key, 0) + hits
+
+    return {
+        "events": event_count,
+        "python_loop_seconds": round(loop_seconds, 2),
+        "vectorized_requests_seconds": round(requests_seconds, 2),
+        "vectorized_columnar_seconds": round(columnar_seconds, 3),
+        "columnar_speedup": round(loop_seconds / max(columnar_seconds, 1e-9), 1),
+        "identical": "yes" if all(totals[name] == histogram for name, histogram in columnar.items()) else "no"
+    }
+
+
+def _peak_rss_mb(who: int) -> Optional[float]:
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def measure_stages(log_file: str, days_back: int = 30, sample_every: int = STAGE_SAMPLE_EVERY) -> Dict:
+    """
+    Time spent parsing, classifying and aggregating a log, stage by stage
+
+    Mirrors AICrawlerAnalytics._aggregate_line. Only every `sample_every`-th
+    line is timed, so the clock calls stay out of the other lines, and the
+    sampled times are scaled up to the whole log. They are estimates: timed
+    lines also absorb garbage collection pauses, so the stages can add up to
+    a little more than an untimed run.
+    """
+    analytics = AICrawlerAnalytics()
+    cutoff_date = datetime.now().astimezone() - timedelta(days=days_back)
+    parse_entry = analytics._line_parser(log_file)
+    aggregator = analytics._new_aggregator()
+    clock = time.perf_counter_ns
+    parse_ns = classify_ns = aggregate_ns = 0
+    lines = sampled = 0
+
+    with analytics._open_log_file(log_file) as f:
+        for line in f:
+            lines += 1
+            if lines % sample_every:
+                analytics._aggregate_line(line, cutoff_date, aggregator, parse_entry)
+                continue
+
+            sampled += 1
+            started = clock()
+            parsed = parse_entry(line)
+            in_window = parsed and analytics._is_within_date_range(parsed['timestamp'], cutoff_date)
+            parsed_at = clock()
+            crawler_info = analytics._identify_ai_crawler(parsed['user_agent'], parsed['ip']) if in_window else None
+            classified_at = clock()
+            if in_window:
+                aggregator.add_request(parsed)
+                if crawler_info:
+                    parsed['crawler_type'] = crawler_info['type']
+                    parsed['crawler_name'] = crawler_info['name']
+                    parsed['ip_verified'] = crawler_info.get('ip_verified')
+                    aggregator.add_ai_request(parsed)
+            aggregated_at = clock()
+
+            parse_ns += parsed_at - started
+            classify_ns += classified_at - parsed_at
+            aggregate_ns += aggregated_at - classified_at
+
+    sampled = max(1, sampled)
+    stages = {}
+    for stage, elapsed_ns in (("parse", parse_ns), ("classify", classify_ns), ("aggregate", aggregate_ns)):
+        stages[f"{stage}_seconds"] = round(elapsed_ns * lines / sampled / 1e9, 2)
+        stages[f"{stage}_us_per_line"] = round(elapsed_ns / sampled / 1e3, 2)
+    return stages
+
+
+def _suite_log_file(data_dir: str, lines: int, seed: int) -> Optional[str]:
+    """The newest kept synthetic log for a size and seed (its end date is in the name), if any"""
+    kept = sorted(glob.glob(os.path.join(data_dir, f'synthetic-{lines}-{seed}-[0-9]*.log')))
+    return kept[-1] if kept else None
+
+
+def _covering_days_back(log_end: datetime, days: int) -> int:
+    """Smallest whole-day window, counted back from now, that holds every line of a log"""
+    return math.ceil((datetime.now(timezone.utc) - (log_end - timedelta(days=days))) / timedelta(days=1)) + 1
+
+
+def _run_suite_size(log_file: str, workers: int, stages: bool, days_back: int) -> Dict:
+    """One suite size, run in a fresh process so its peak RSS is its own"""
+    logging.getLogger('ai_crawler_analytics').setLevel(logging.WARNING)
+    started = time.perf_counter()
+    results = AICrawlerAnalytics().parse_access_logs(log_file, days_back=days_back, workers=workers)
+    seconds = time.perf_counter() - started
+    if "error" in results:
+        raise RuntimeError(results["error"])
+
+    run = {
+        "lines": results["total_requests"],
+        "ai_requests": results["ai_requests"],
+        "seconds": round(seconds, 2),
+        "lines_per_sec": round(results["total_requests"] / max(seconds, 1e-9)),
+        # Includes the interpreter and imported libraries
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if RESOURCE_AVAILABLE else None
+    }
+    if workers > 1 and RESOURCE_AVAILABLE:
+        run["worker_peak_rss_mb"] = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    if stages:
+        run.update(measure_stages(log_file, days_back=days_back))
+    return run
+
+
+def benchmark_suite(sizes: Sequence[int] = SUITE_SIZES, data_dir: Optional[str] = None, workers: int = 1,
+                    seed: int = 42, keep: bool = False, stages: bool = True) -> Dict[str, Dict]:
+    """
+    End-to-end parse throughput, peak RSS and per-stage time on synthetic logs
+
+    Each size gets a seeded synthetic log (about 200 bytes per line, so 50M
+    lines take about 10 GB of `data_dir`), reused when it already exists and
+    deleted afterwards unless `keep` is set. Logs end at a fixed UTC midnight
+    recorded in their name (`synthetic-<lines>-<seed>-<YYYYMMDD>.log`) and are
+    parsed with a window covering every line, so a kept log measures the same
+    work however old it gets. The timed run is a streaming parse_access_logs()
+    in a freshly spawned process; the per-stage breakdown is a second,
+    single-process pass over the same file.
+
+    Returns:
+        Dict: Results per size, keyed by the line count as a string (JSON-ready)
+    """
+    data_dir = data_dir or tempfile.gettempdir()
+    suite = {}
+    for lines in sizes:
+        log_file = _suite_log_file(data_dir, lines, seed)
+        generated = log_file is None
+        generate_seconds = None
+        if generated:
+            log_end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            log_file = os.path.join(data_dir, f'synthetic-{lines}-{seed}-{log_end:%Y%m%d}.log')
+            logger.info(f"🧪 Generating {lines:,} synthetic log lines into {log_file}")
+            started = time.perf_counter()
+            SyntheticLogGenerator(SyntheticLogConfig(lines=lines, seed=seed, end=log_end)).write(log_file)
+            generate_seconds = round(time.perf_counter() - started, 1)
+        else:
+            log_end = datetime.strptime(log_file.rsplit('-', 1)[1][:8], '%Y%m%d').replace(tzinfo=timezone.utc)
+        days_back = _covering_days_back(log_end, SyntheticLogConfig.days)
+
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                run = executor.submit(_run_suite_size, log_file, workers, stages, days_back).result()
+        finally:
+            if generated and not keep:
+                os.remove(log_file)
+
+        run["log_end"] = log_end.date().isoformat()
+        run["generate_seconds"] = generate_seconds
+        suite[str(lines)] = run
+    return suite
+
+
+def suite_regressions(suite: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float = 0.1) -> List[str]:
+    """Sizes whose lines/sec fell more than `tolerance` below a saved baseline"""
+    regressions = []
+    for size, run in suite.items():
+        expected = baseline.get(size, {}).get("lines_per_sec")
+        if expected and run["lines_per_sec"] < expected * (1 - tolerance):
+            regressions.append(f"{int(size):,} lines: {run['lines_per_sec']:,} lines/sec vs baseline {expected:,} "
+                               f"({run['lines_per_sec'] / expected - 1:+.0%})")
+    return regressions
+
+
+def print_results(title: str, results: Dict) -> None:
+    """Print benchmark results as an aligned table"""
+    print(f"\n📊 {title}")
+    print("=" * 50)
+    for key, value in results.items():
+        print(f"{key:<28} {value:>20,}" if isinstance(value, int) else f"{key:<28} {value:>20}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark AI crawler analytics')
+    subparsers = parser.add_subparsers(dest='command', help='Benchmark to run')
+
+    parsers_parser = subparsers.add_parser('parsers', help='Fast tokenizer vs regex parser throughput')
+    parsers_parser.add_argument('--lines', type=int, default=200000, help='Number of log lines to parse')
+
+    formats_parser = subparsers.add_parser('formats', help='Parser throughput per supported log format')
+    formats_parser.add_argument('--lines', type=int, default=200000, help='Number of log lines per format')
+
+    patterns_parser = subparsers.add_parser('patterns', help='Python loop vs vectorized crawl pattern histograms')
+    patterns_parser.add_argument('--events', type=int, default=10000000, help='Number of AI crawler events')
+
+    suite_parser = subparsers.add_parser('suite', help='Throughput, peak RSS and stage times on synthetic logs')
+    suite_parser.add_argument('--sizes', type=str, default=','.join(str(size) for size in SUITE_SIZES),
+                              help='Comma-separated log sizes in lines')
+    suite_parser.add_argument('--data-dir', type=str, help='Where synthetic logs are written (default: temp dir)')
+    suite_parser.add_argument('--workers', type=int, default=1, help='Parser processes for the timed run')
+    suite_parser.add_argument('--seed', type=int, default=42, help='Synthetic log seed')
+    suite_parser.add_argument('--keep', action='store_true', help='Keep generated logs for later runs')
+    suite_parser.add_argument('--no-stages', action='store_true', help='Skip the per-stage timing pass')
+    suite_parser.add_argument('--save', type=str, help='Write results as JSON (a baseline for later runs)')
+    suite_parser.add_argument('--baseline', type=str, help='Fail if lines/sec regressed against this JSON')
+    suite_parser.add_argument('--tolerance', type=float, default=0.1,
+                              help='Allowed lines/sec drop against the baseline (fraction)')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.command == 'suite' else logging.WARNING)
+    # Keep per-run progress and format detection messages out of the tables
+    logging.getLogger('ai_crawler_analytics').setLevel(logging.WARNING)
+
+    if args.command == 'parsers':
+        print_results("Log parser throughput", benchmark_log_parsers(args.lines))
+    elif args.command == 'formats':
+        print_results("Log format parser throughput", benchmark_log_formats(args.lines))
+    elif args.command == 'patterns':
+        print_results("Crawl pattern histograms", benchmark_crawl_patterns(args.events))
+    elif args.command == 'suite':
+        suite = benchmark_suite(
+            [int(size) for size in args.sizes.split(',')], data_dir=args.data_dir, workers=args.workers,
+            seed=args.seed, keep=args.keep, stages=not args.no_stages
+        )
+        for size, run in suite.items():
+            print_results(f"Synthetic log, {int(size):,} lines", run)
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(suite, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = suite_regressions(suite, json.load(f), args.tolerance)
+            for regression in regressions:
+                print(f"❌ Regression: {regression}")
+            if regressions:
+                sys.exit(1)
+    else:
+        parser.print_help()
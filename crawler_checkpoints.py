@@ -0,0 +1,185 @@
+"""
+Crawler Checkpoints - Persisted State for Incremental Log Analysis
+==================================================================
+
+Remembers how far each access log has been read, keyed by device and inode
+(plus a fingerprint of the first line, in case an inode is reused) so renamed
+(rotated) files are still recognised, together with the crawler aggregates
+built so far. Follow-mode runs then only parse newly appended bytes.
+
+Aggregates are kept as one shard per log day next to the checkpoint, so a
+run rewrites only the days its new lines fall on, and days that leave the
+analysis window are deleted instead of being carried forever.
+
+The checkpoint is a small JSON file written atomically after every run. A
+rewritten shard goes to a new file that only the new checkpoint names, so
+read offsets and aggregates change together even if a run dies midway.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 2
+
+# Leading bytes of a log (up to its first newline) hashed to tell a reused inode from the same file
+FINGERPRINT_BYTES = 1024
+
+
+def file_key(stat: os.stat_result) -> str:
+    """Identity of a file that survives renames: its device and inode"""
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def file_fingerprint(path: str, length: Optional[int] = None) -> Dict:
+    """Hash of a file's first line (at most FINGERPRINT_BYTES), or of its first `length` bytes"""
+    with open(path, 'rb') as f:
+        head = f.read(FINGERPRINT_BYTES if length is None else length)
+    if length is None and b'\n' in head:
+        head = head[:head.index(b'\n') + 1]
+    return {"length": len(head), "sha1": hashlib.sha1(head).hexdigest()}
+
+
+class CrawlerCheckpointStore:
+    """
+    JSON checkpoint store for follow-mode crawler analytics
+
+    Layout:
+        <checkpoint>:
+        {
+            "version": 2,
+            "created_at": "...",
+            "updated_at": "...",
+            "files": {"<dev>:<inode>": {"path": "...", "offset": 1234, "complete": false,
+                                         "fingerprint": {"length": 97, "sha1": "..."}}},
+            "days": {"2024-10-09": "2024-10-09-<id>.json", "2024-10-10": "..."},
+            "window_start": "..."   (lines since then are all ingested)
+        }
+        <checkpoint>.days/<day>-<id>.json: {...CrawlerStatsAggregator.to_dict()...} for that log day
+    """
+
+    def __init__(self, checkpoint_path: str):
+        """
+        Args:
+            checkpoint_path: Where the checkpoint JSON lives
+        """
+        self.checkpoint_path = checkpoint_path
+        self.days_dir = f"{checkpoint_path}.days"
+        self.created_at: Optional[str] = None
+        self.files: Dict[str, Dict] = {}
+        self.days: Dict[str, str] = {}
+        self.window_start: Optional[datetime] = None
+
+    def load(self) -> 'CrawlerCheckpointStore':
+        """Load the checkpoint if it exists; a missing or unreadable file starts fresh"""
+        if not os.path.exists(self.checkpoint_path):
+            return self
+
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable checkpoint {self.checkpoint_path}: {str(e)}")
+            return self
+
+        if data.get('version') != CHECKPOINT_VERSION:
+            logger.warning(f"⚠️ Ignoring checkpoint with unsupported version: {data.get('version')}")
+            return self
+
+        self.created_at = data.get('created_at')
+        self.files = data.get('files', {})
+        self.days = data.get('days', {})
+        if data.get('window_start'):
+            self.window_start = datetime.fromisoformat(data['window_start'])
+        return self
+
+    def save(self) -> None:
+        """Write the checkpoint atomically (temp file + rename)"""
+        now = datetime.now().isoformat()
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "created_at": self.created_at or now,
+            "updated_at": now,
+            "files": self.files,
+            "days": self.days,
+            "window_start": self.window_start.isoformat() if self.window_start else None
+        }
+        self._write_json(self.checkpoint_path, data)
+        self.created_at = data["created_at"]
+        self._remove_unlisted_days()
+
+    def _remove_unlisted_days(self) -> None:
+        """Delete shards the checkpoint no longer names (rewritten, dropped or left by a failed run)"""
+        if not os.path.isdir(self.days_dir):
+            return
+        listed = set(self.days.values())
+        for name in os.listdir(self.days_dir):
+            if name not in listed:
+                os.remove(os.path.join(self.days_dir, name))
+
+    def _write_json(self, path: str, data) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def file_state(self, key: str, path: str) -> Optional[Dict]:
+        """
+        Saved read position for a file identity, if any
+
+        A file at a reused device/inode whose first line no longer matches
+        the saved fingerprint is a different file, so it has no state.
+        """
+        state = self.files.get(key)
+        if state is None or not state.get('fingerprint'):
+            return state
+        fingerprint = state['fingerprint']
+        if file_fingerprint(path, fingerprint['length']) != fingerprint:
+            logger.info(f"🔁 {path} reuses the identity of {state['path']}, reading it as a new file")
+            return None
+        return state
+
+    def update_file(self, key: str, path: str, offset: int, complete: bool = False) -> None:
+        """Record how far a file has been read"""
+        # Refreshed each run, so a first line still being written is fingerprinted once complete
+        fingerprint = file_fingerprint(path) if offset else None
+        self.files[key] = {"path": path, "offset": offset, "complete": complete, "fingerprint": fingerprint}
+
+    def forget_missing(self, live_keys: Iterable[str]) -> None:
+        """Drop state for files that no longer exist (rotated out of the set)"""
+        live = set(live_keys)
+        for key in list(self.files):
+            if key not in live:
+                del self.files[key]
+
+    def load_day(self, day: str) -> Optional[Dict]:
+        """Saved aggregates of one log day, if any"""
+        if day not in self.days:
+            return None
+        try:
+            with open(os.path.join(self.days_dir, self.days[day]), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable checkpoint day {day}: {str(e)}")
+            return None
+
+    def save_day(self, day: str, aggregates: Dict) -> None:
+        """Write one log day's aggregates to a new shard; it replaces the old one once save() runs"""
+        name = f"{day}-{uuid.uuid4().hex[:12]}.json"
+        self._write_json(os.path.join(self.days_dir, name), aggregates)
+        self.days[day] = name
+
+    def drop_days_before(self, first_day: str) -> List[str]:
+        """Forget the aggregates of days before `first_day` (YYYY-MM-DD); save() deletes them"""
+        dropped = sorted(day for day in self.days if day < first_day)
+        for day in dropped:
+            del self.days[day]
+        return dropped
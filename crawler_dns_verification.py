@@ -0,0 +1,224 @@
+"""
+Crawler DNS Verification - Forward-Confirmed Reverse DNS for AI Crawlers
+========================================================================
+
+A user agent string is trivially faked. The crawler operators' documented
+check is forward-confirmed reverse DNS: the client IP's PTR record must be
+a host under the operator's domain (e.g. `crawl-66-249-66-1.googlebot.com`),
+and that host must resolve back to the same IP.
+
+🔧 HOW WE DO THIS:
+• Verify distinct (crawler type, IP) pairs after the log scan, never per line
+• Resolve concurrently on asyncio with a cap on in-flight lookups and a
+  per-lookup timeout
+• Keep results in a TTL cache, optionally persisted to a JSON file, so
+  repeated analyses only resolve IPs they have not seen recently
+• Take any resolver with async `reverse()` / `forward()` methods, so tests
+  (or aiodns-based resolvers) can replace the system one
+"""
+
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lookups in flight at once
+DNS_CONCURRENCY = 64
+# Seconds before a single reverse or forward lookup is abandoned
+DNS_TIMEOUT = 5.0
+# Seconds a resolved IP stays cached
+DNS_CACHE_TTL = 24 * 3600
+
+DNS_CACHE_VERSION = 1
+
+# Resolver answers meaning "no such record"; anything else (e.g. EAI_AGAIN) is a failed lookup
+NO_RECORD_ERRORS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+
+def _normalize_ip(ip: str) -> Optional[str]:
+    try:
+        return ipaddress.ip_address(ip).compressed
+    except ValueError:
+        return None
+
+
+class SystemDNSResolver:
+    """Resolver backed by the system resolver through the event loop's executor"""
+
+    async def reverse(self, ip: str) -> Optional[str]:
+        """PTR hostname for an IP, or None when it has none"""
+        loop = asyncio.get_running_loop()
+        try:
+            hostname, _ = await loop.getnameinfo((ip, 0), socket.NI_NAMEREQD)
+        except socket.herror:
+            return None
+        except socket.gaierror as e:
+            if e.errno in NO_RECORD_ERRORS:
+                return None
+            raise
+        return hostname
+
+    async def forward(self, hostname: str) -> List[str]:
+        """Addresses a hostname resolves to (empty when it doesn't resolve)"""
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP)
+        except socket.gaierror as e:
+            if e.errno in NO_RECORD_ERRORS:
+                return []
+            raise
+        return [info[4][0] for info in infos]
+
+
+class CrawlerDNSVerifier:
+    """
+    Forward-confirmed reverse DNS verification with a TTL cache
+
+    The cache holds one entry per IP: the PTR hostname when it resolves
+    back to that IP, otherwise None, plus when it was checked. Whether a
+    pair verifies is decided per crawler type from that hostname, so one
+    lookup serves every crawler an IP claims to be. Failed lookups
+    (timeouts, resolver errors) are not cached and verify as None.
+    """
+
+    def __init__(self, crawler_domains: Dict[str, List[str]], resolver=None,
+                 cache_path: Optional[str] = None, ttl: float = DNS_CACHE_TTL,
+                 concurrency: int = DNS_CONCURRENCY, timeout: float = DNS_TIMEOUT):
+        """
+        Args:
+            crawler_domains: Crawler type -> hostname suffixes its PTR records
+                use (e.g. `.googlebot.com`); types without any aren't verified
+            resolver: Object with async reverse(ip) and forward(hostname);
+                defaults to SystemDNSResolver
+            cache_path: JSON file to persist resolved IPs in between runs
+            ttl: Seconds a cached IP is trusted
+            concurrency: Lookups in flight at once
+            timeout: Seconds per reverse or forward lookup
+        """
+        self.crawler_domains = {
+            crawler_type: tuple(domain.lower().rstrip('.') for domain in domains)
+            for crawler_type, domains in crawler_domains.items() if domains
+        }
+        self.resolver = resolver or SystemDNSResolver()
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        # ip -> [confirmed hostname or None, checked_at]
+        self.cache: Dict[str, List] = {}
+        if cache_path:
+            self._load_cache()
+
+    def _load_cache(self) -> None:
+        """Load unexpired entries; a missing or unreadable file starts empty"""
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable DNS cache {self.cache_path}: {str(e)}")
+            return
+        if data.get('version') != DNS_CACHE_VERSION:
+            logger.warning(f"⚠️ Ignoring DNS cache with unsupported version: {data.get('version')}")
+            return
+        now = time.time()
+        self.cache = {ip: entry for ip, entry in data.get('entries', {}).items() if now - entry[1] < self.ttl}
+
+    def save_cache(self) -> None:
+        """Write unexpired entries atomically (temp file + rename)"""
+        if not self.cache_path:
+            return
+        now = time.time()
+        data = {
+            "version": DNS_CACHE_VERSION,
+            "entries": {ip: entry for ip, entry in self.cache.items() if now - entry[1] < self.ttl}
+        }
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own, so verifiers sharing the cache never write into each other's
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(self.cache_path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _cached(self, ip: str) -> Optional[List]:
+        entry = self.cache.get(ip)
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry
+        return None
+
+    async def _confirmed_hostname(self, ip: str, semaphore: asyncio.Semaphore) -> Tuple[str, Optional[List]]:
+        """(ip, cache entry); the entry is None when the lookup failed"""
+        normalized = _normalize_ip(ip)
+        if normalized is None:
+            return ip, [None, time.time()]
+        async with semaphore:
+            try:
+                hostname = await asyncio.wait_for(self.resolver.reverse(ip), self.timeout)
+                if hostname:
+                    hostname = hostname.lower().rstrip('.')
+                    addresses = await asyncio.wait_for(self.resolver.forward(hostname), self.timeout)
+                    if normalized not in {_normalize_ip(address) for address in addresses}:
+                        hostname = None
+            except (asyncio.TimeoutError, OSError) as e:
+                logger.debug(f"DNS verification of {ip} failed: {str(e)}")
+                return ip, None
+        return ip, [hostname or None, time.time()]
+
+    async def verify_async(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[bool]]:
+        """
+        Verify (crawler type, IP) pairs
+
+        Returns:
+            (crawler type, IP) -> True (verified), False (spoofed) or None
+            (crawler type not verifiable, or the lookup failed)
+        """
+        pairs = list(pairs)
+        pending = {ip for crawler_type, ip in pairs
+                   if crawler_type in self.crawler_domains and self._cached(ip) is None}
+        if pending:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            resolved = await asyncio.gather(*(self._confirmed_hostname(ip, semaphore) for ip in pending))
+            failed = 0
+            for ip, entry in resolved:
+                if entry is None:
+                    failed += 1
+                else:
+                    self.cache[ip] = entry
+            logger.info(f"🔎 Reverse DNS checked {len(pending)} crawler IPs ({failed} lookups failed)")
+            self.save_cache()
+
+        verification = {}
+        for crawler_type, ip in pairs:
+            domains = self.crawler_domains.get(crawler_type)
+            entry = self._cached(ip) if domains else None
+            if entry is None:
+                verification[(crawler_type, ip)] = None
+            else:
+                hostname = entry[0]
+                verification[(crawler_type, ip)] = bool(hostname) and any(
+                    hostname == domain.lstrip('.') or hostname.endswith(domain) for domain in domains
+                )
+        return verification
+
+    def verify(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[bool]]:
+        """Synchronous verify_async(); runs on a helper thread inside a running event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.verify_async(pairs))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.verify_async(pairs)).result()
@@ -0,0 +1,380 @@
+"""
+Crawler Event Store - Columnar Export of Parsed AI Crawler Events
+=================================================================
+
+Writes every parsed AI crawler request to a partitioned Parquet or Arrow
+dataset, so analysts can slice bot traffic with pandas (or DuckDB, Spark,
+...) and results can be rebuilt without reparsing text logs.
+
+Layout (hive partitioning, one directory per UTC day and crawler type):
+
+    <event_dir>/events/day=2024-10-10/crawler_type=chatgpt/part-<id>-0.parquet
+    <event_dir>/traffic/day=2024-10-10/part-<id>-0.parquet   (hourly totals, all traffic)
+
+🔧 HOW WE DO THIS:
+• Events are dictionary-encoded while they are collected: each distinct URL,
+  user agent, IP, ... is stored once and rows keep int32 codes, so buffers
+  stay small and are written as Arrow dictionary columns without re-encoding
+• Timestamps are int64 epoch seconds plus the log line's UTC offset in minutes
+• Arrow (IPC) files are read memory-mapped and numeric columns convert to
+  pandas without copies where the types allow
+"""
+
+import logging
+import uuid
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:
+    pa = None
+
+from crawler_sessions import SESSION_GAP
+
+logger = logging.getLogger(__name__)
+
+EVENT_FORMATS = ('parquet', 'arrow')
+
+# String columns stored as dictionary codes
+DICTIONARY_COLUMNS = ('crawler_type', 'crawler_name', 'ip', 'method', 'url', 'user_agent', 'referer')
+
+EPOCH_DAY = date(1970, 1, 1)
+
+# Largest status / size the int32 and int64 columns hold; parsers accept any run of digits
+STATUS_MAX = 2 ** 31 - 1
+SIZE_MAX = 2 ** 63 - 1
+
+
+class CrawlerEventBuffer:
+    """
+    Columnar, dictionary-encoded buffer of AI crawler events
+
+    Pure Python (arrays of integers plus one value list per string column),
+    so worker processes can fill it without pyarrow and ship it back to be
+    merged like the other aggregates.
+    """
+
+    def __init__(self):
+        self.timestamps = array('q')
+        self.utc_offsets = array('h')
+        self.statuses = array('i')
+        self.sizes = array('q')
+        # 1 / 0 for the published range check, -1 when it wasn't made
+        self.ip_verified = array('b')
+        self.codes = {column: array('i') for column in DICTIONARY_COLUMNS}
+        self.values: Dict[str, List[str]] = {column: [] for column in DICTIONARY_COLUMNS}
+        self._build_index()
+
+    def _build_index(self):
+        """value -> code per column, and (column, codes, index, values) tuples for add()"""
+        self._index = {column: {value: code for code, value in enumerate(values)}
+                       for column, values in self.values.items()}
+        self._columns = tuple((column, self.codes[column], self._index[column], self.values[column])
+                              for column in DICTIONARY_COLUMNS)
+        self._last_tzinfo = self._last_offset = None
+        self._last_timestamp = self._last_epoch = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getstate__(self):
+        # The indexes are rebuilt after unpickling
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_index()
+
+    def _code(self, column: str, value: str) -> int:
+        index = self._index[column]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self.values[column])
+            self.values[column].append(value)
+        return code
+
+    def add(self, parsed: Dict) -> None:
+        """Append a parsed, classified AI crawler request"""
+        timestamp = parsed['timestamp']
+        # Parsers hand out one datetime per distinct timestamp string; runs of
+        # lines from the same second convert once
+        if timestamp is not self._last_timestamp:
+            self._last_timestamp = timestamp
+            self._last_epoch = int(timestamp.timestamp())
+        self.timestamps.append(self._last_epoch)
+        # Lines of one log share a tzinfo, so its offset is looked up once
+        tzinfo = timestamp.tzinfo
+        if tzinfo is not self._last_tzinfo:
+            offset = timestamp.utcoffset()
+            self._last_tzinfo = tzinfo
+            self._last_offset = int(offset.total_seconds()) // 60 if offset else 0
+        self.utc_offsets.append(self._last_offset)
+        self.statuses.append(min(parsed['status'], STATUS_MAX))
+        size = parsed.get('size', 0)
+        size = int(size) if isinstance(size, int) or size.isdecimal() else 0
+        self.sizes.append(min(size, SIZE_MAX))
+        ip_verified = parsed.get('ip_verified')
+        self.ip_verified.append(-1 if ip_verified is None else ip_verified)
+        for column, codes, index, values in self._columns:
+            value = parsed.get(column) or '-'
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(values)
+                values.append(value)
+            codes.append(code)
+
+    def merge(self, other: 'CrawlerEventBuffer') -> None:
+        """Append another buffer's events, translating its dictionary codes"""
+        self.timestamps.extend(other.timestamps)
+        self.utc_offsets.extend(other.utc_offsets)
+        self.statuses.extend(other.statuses)
+        self.sizes.extend(other.sizes)
+        self.ip_verified.extend(other.ip_verified)
+        for column in DICTIONARY_COLUMNS:
+            translate = [self._code(column, value) for value in other.values[column]]
+            self.codes[column].extend(translate[code] for code in other.codes[column])
+
+    def partitions(self):
+        """(UTC day, crawler type, row indices) per partition, rows in arrival order"""
+        days = np.frombuffer(self.timestamps, dtype=np.int64) // 86400
+        crawlers = np.frombuffer(self.codes['crawler_type'], dtype=np.int32)
+        order = np.lexsort((crawlers, days))
+        keys = np.stack((days[order], crawlers[order]))
+        boundaries = np.flatnonzero(np.any(keys[:, 1:] != keys[:, :-1], axis=0)) + 1
+        for rows in np.split(order, boundaries):
+            if len(rows):
+                day = EPOCH_DAY + timedelta(days=int(days[rows[0]]))
+                yield day, self.values['crawler_type'][crawlers[rows[0]]], rows
+
+    def to_table(self, rows=None, exclude=()):
+        """
+        Arrow table of the given rows (all by default)
+
+        String columns are dictionary arrays holding only the values the rows
+        use, so each partition file stores its own small dictionaries.
+        `exclude` drops columns, such as the partition key a directory encodes.
+        """
+        def column(buffer, dtype):
+            values = np.frombuffer(buffer, dtype=dtype)
+            return values if rows is None else values[rows]
+
+        ip_verified = column(self.ip_verified, np.int8)
+        columns = {
+            'timestamp': pa.array(column(self.timestamps, np.int64), type=pa.timestamp('s', tz='UTC')),
+            'utc_offset_minutes': pa.array(column(self.utc_offsets, np.int16)),
+            'status': pa.array(column(self.statuses, np.int32)),
+            'size': pa.array(column(self.sizes, np.int64)),
+            'ip_verified': pa.array(ip_verified == 1, mask=ip_verified < 0),
+        }
+        for name in DICTIONARY_COLUMNS:
+            if name in exclude:
+                continue
+            codes = column(self.codes[name], np.int32)
+            used = np.unique(codes)
+            values = self.values[name]
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(np.searchsorted(used, codes).astype(np.int32)),
+                pa.array([values[code] for code in used], type=pa.string())
+            )
+        return pa.table(columns)
+
+
+class CrawlerEventStore:
+    """
+    Partitioned Parquet / Arrow dataset of AI crawler events
+
+    Writes mirror CrawlerRollupStore: full parses replace the day and
+    crawler partitions they cover, follow-mode runs add files to them.
+    """
+
+    def __init__(self, event_dir: str, file_format: str = 'parquet'):
+        """
+        Args:
+            event_dir: Dataset root directory (created if missing)
+            file_format: 'parquet' (compressed, for storage) or 'arrow'
+                (uncompressed IPC files, memory-mapped when read)
+        """
+        if pa is None:
+            raise ImportError("Columnar event export needs pyarrow: pip install pyarrow")
+        if file_format not in EVENT_FORMATS:
+            raise ValueError(f"Unknown event format: {file_format} (expected one of {', '.join(EVENT_FORMATS)})")
+        self.event_dir = Path(event_dir)
+        self.file_format = file_format
+        self._dataset_format = 'ipc' if file_format == 'arrow' else 'parquet'
+        self._extension = 'arrow' if file_format == 'arrow' else 'parquet'
+        self._filesystem = pafs.LocalFileSystem(use_mmap=True)
+
+    def _write(self, table, directory: Path, basename: str, replace: bool) -> None:
+        """Write one partition directory, replacing its files or adding to them"""
+        ds.write_dataset(
+            table, str(directory), format=self._dataset_format, basename_template=basename,
+            existing_data_behavior='delete_matching' if replace else 'overwrite_or_ignore'
+        )
+
+    def write(self, events: CrawlerEventBuffer, traffic: Dict, replace: bool = False,
+              complete_from: Optional[datetime] = None, complete_until: Optional[datetime] = None) -> int:
+        """
+        Store events collected by a CrawlerStatsAggregator
+
+        Args:
+            events: Buffered AI crawler events
+            traffic: {hour_start: requests} for all traffic, AI or not
+            replace: Replace the day / crawler partitions present in this batch
+                (full re-parse) instead of adding files to them (follow mode)
+            complete_from: Start of the parsed window; the UTC day it falls in
+                is partial and skipped so it can't replace a full one
+            complete_until: Last timestamp of the parsed data (e.g. a possibly
+                truncated upload); the UTC day it falls in is skipped likewise
+
+        Returns:
+            int: Number of events written
+        """
+        first_day = complete_from.astimezone(timezone.utc).date() + timedelta(days=1) if complete_from else None
+        last_day = complete_until.astimezone(timezone.utc).date() if complete_until else None
+        basename = f"part-{uuid.uuid4().hex}-{{i}}.{self._extension}"
+        written = 0
+        for day, crawler_type, rows in events.partitions():
+            if (first_day is not None and day < first_day) or (last_day is not None and day >= last_day):
+                continue
+            path = self.event_dir / 'events' / f"day={day.isoformat()}" / f"crawler_type={crawler_type}"
+            self._write(events.to_table(rows, exclude=('crawler_type',)), path, basename, replace)
+            written += len(rows)
+
+        hours = {}
+        for hour_start, requests in traffic.items():
+            hour = int(hour_start.timestamp())
+            hours.setdefault(EPOCH_DAY + timedelta(days=hour // 86400), []).append((hour, requests))
+        for day, rows in hours.items():
+            if (first_day is not None and day < first_day) or (last_day is not None and day >= last_day):
+                continue
+            table = pa.table({
+                'hour': pa.array([hour for hour, _ in rows], type=pa.timestamp('s', tz='UTC')),
+                'requests': pa.array([requests for _, requests in rows], type=pa.int64())
+            })
+            self._write(table, self.event_dir / 'traffic' / f"day={day.isoformat()}", basename, replace)
+
+        logger.info(f"🧊 Stored {written} crawler events as {self.file_format} in {self.event_dir}")
+        return written
+
+    def _dataset(self, subdir: str, partition_schema):
+        path = self.event_dir / subdir
+        if not path.is_dir():
+            return None
+        return ds.dataset(str(path), format=self._dataset_format, filesystem=self._filesystem,
+                          partitioning=ds.partitioning(partition_schema, flavor='hive'))
+
+    def load_table(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   crawler_types: Optional[List[str]] = None, columns: Optional[List[str]] = None):
+        """
+        Events in a time range as an Arrow table
+
+        Day and crawler partitions outside the filter are never opened.
+        """
+        dataset = self._dataset('events', pa.schema([('day', pa.date32()), ('crawler_type', pa.string())]))
+        if dataset is None:
+            return None
+        expression = None
+        conditions = []
+        if since is not None:
+            conditions.append(ds.field('day') >= pa.scalar(since.astimezone(timezone.utc).date(), pa.date32()))
+            # Compared at microsecond precision, like the parser's date filter
+            conditions.append(ds.field('timestamp') >= pa.scalar(since, pa.timestamp('us', tz='UTC')))
+        if until is not None:
+            conditions.append(ds.field('timestamp') < pa.scalar(until, pa.timestamp('us', tz='UTC')))
+        if crawler_types:
+            conditions.append(ds.field('crawler_type').isin(crawler_types))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def load_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    crawler_types: Optional[List[str]] = None, columns: Optional[List[str]] = None):
+        """
+        Events in a time range as a pandas DataFrame
+
+        String columns become categoricals over the stored dictionaries;
+        numeric columns are handed over without copying where possible.
+        """
+        table = self.load_table(since, until, crawler_types, columns)
+        if table is None:
+            return None
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def total_requests(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+        """All requests (AI or not) in whole hours from `since`'s hour"""
+        dataset = self._dataset('traffic', pa.schema([('day', pa.date32())]))
+        if dataset is None:
+            return 0
+        expression = None
+        if since is not None:
+            hour_start = datetime.fromtimestamp(int(since.timestamp()) // 3600 * 3600, timezone.utc)
+            expression = ds.field('hour') >= pa.scalar(hour_start, pa.timestamp('s', tz='UTC'))
+        if until is not None:
+            condition = ds.field('hour') < pa.scalar(until, pa.timestamp('us', tz='UTC'))
+            expression = condition if expression is None else expression & condition
+        requests = dataset.to_table(columns=['requests'], filter=expression)['requests']
+        return int(sum(chunk.sum().as_py() or 0 for chunk in requests.chunks))
+
+    def load_aggregator(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        crawler_type: Optional[str] = None, count_ips: bool = False,
+                        session_gap: Optional[float] = SESSION_GAP):
+        """
+        Rebuild a CrawlerStatsAggregator from stored events
+
+        Timestamps get back the UTC offset they had in the log, so hourly and
+        daily distributions match a direct parse.
+
+        Args:
+            since: Include events at or after this time
+            until: Include events before this time
+            crawler_type: Only include one crawler type
+            count_ips: Count hits per (crawler type, IP), for GeoIP / DNS verification
+            session_gap: Inactivity (seconds) that ends a crawl session; None skips sessions
+        """
+        from ai_crawler_analytics import CrawlerStatsAggregator
+
+        aggregator = CrawlerStatsAggregator(count_ips=count_ips, session_gap=session_gap)
+        table = self.load_table(since, until, [crawler_type] if crawler_type else None)
+        aggregator.total_requests = self.total_requests(since, until)
+        if table is None:
+            return aggregator
+
+        timezones: Dict[int, timezone] = {}
+        for batch in table.sort_by('timestamp').to_batches():
+            columns = {}
+            # Parquet has no second unit; timestamps may come back as milliseconds
+            columns['timestamp'] = batch.column('timestamp').cast(pa.timestamp('s', tz='UTC')).cast(pa.int64()).to_pylist()
+            for name in ('utc_offset_minutes', 'status', 'size', 'ip_verified'):
+                columns[name] = batch.column(name).to_pylist()
+            for name in ('crawler_type', 'crawler_name', 'ip', 'url'):
+                column = batch.column(name)
+                if pa.types.is_dictionary(column.type):
+                    # Decode each dictionary once, then index it per row
+                    values = column.dictionary.to_pylist()
+                    columns[name] = [values[code] for code in column.indices.to_pylist()]
+                else:
+                    # Partition columns come back as plain strings
+                    columns[name] = column.to_pylist()
+
+            for row in range(batch.num_rows):
+                offset = columns['utc_offset_minutes'][row]
+                tzinfo = timezones.get(offset)
+                if tzinfo is None:
+                    tzinfo = timezones[offset] = timezone(timedelta(minutes=offset))
+                aggregator.add_ai_request({
+                    'timestamp': datetime.fromtimestamp(columns['timestamp'][row], tzinfo),
+                    'status': columns['status'][row],
+                    'size': columns['size'][row],
+                    'url': columns['url'][row],
+                    'ip': columns['ip'][row],
+                    'crawler_type': columns['crawler_type'][row],
+                    'crawler_name': columns['crawler_name'][row],
+                    'ip_verified': columns['ip_verified'][row]
+                })
+        return aggregator
@@ -0,0 +1,92 @@
+"""
+Crawler GeoIP - Country and ASN Enrichment for AI Crawler Hits
+==============================================================
+
+Looks up where AI crawler requests come from in local MaxMind databases
+(GeoLite2/GeoIP2 Country or City, and ASN), so crawl patterns can be broken
+down by country and network operator.
+
+🔧 HOW WE DO THIS:
+• Open the .mmdb files memory-mapped (through libmaxminddb's C extension
+  when it is installed), so lookups read pages the OS shares instead of
+  loading the database into memory
+• Read raw records with maxminddb, the reader underneath geoip2, skipping
+  geoip2's model objects and not-found exceptions
+• Look up only AI crawler hits, never all traffic, and only once the scan is
+  done: the aggregator counts hits per IP and each distinct IP is resolved once
+• Memoize results per IP across analyses
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import maxminddb
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlerGeoIP:
+    """
+    Memoized country / ASN lookups from local MaxMind databases
+
+    Either database may be omitted; its part of the lookup is then None.
+    """
+
+    def __init__(self, country_db: Optional[str] = None, asn_db: Optional[str] = None,
+                 cache_size: int = 100000):
+        """
+        Args:
+            country_db: GeoLite2/GeoIP2 Country or City .mmdb file
+            asn_db: GeoLite2/GeoIP2 ASN .mmdb file
+            cache_size: Distinct IPs to memoize lookups for
+        """
+        self.country_db = country_db
+        self.asn_db = asn_db
+        self.cache_size = cache_size
+
+        self._country_reader = self._open(country_db)
+        self._asn_reader = self._open(asn_db)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __reduce__(self):
+        # Memory-mapped readers can't be pickled; reopen them in worker processes
+        return (self.__class__, (self.country_db, self.asn_db, self.cache_size))
+
+    @staticmethod
+    def _open(path: Optional[str]):
+        if not path:
+            return None
+        # MODE_AUTO memory-maps through the C extension, or the pure Python reader without it
+        reader = maxminddb.open_database(path, maxminddb.MODE_AUTO)
+        logger.info(f"🌍 Opened GeoIP database {path} ({reader.metadata().database_type})")
+        return reader
+
+    @staticmethod
+    def _get(reader, ip: str) -> Optional[dict]:
+        try:
+            return reader.get(ip)
+        except ValueError:
+            # Not an IP address (e.g. a `-` placeholder)
+            return None
+
+    def _lookup(self, ip: str) -> Tuple[Optional[str], Optional[str]]:
+        """(ISO country code, "AS<number> <organization>") for an IP; None where unknown"""
+        country = asn = None
+        if self._country_reader is not None:
+            # Country and City records share the `country` section
+            record = self._get(self._country_reader, ip)
+            if record:
+                country = (record.get('country') or record.get('registered_country') or {}).get('iso_code')
+        if self._asn_reader is not None:
+            record = self._get(self._asn_reader, ip)
+            if record and record.get('autonomous_system_number') is not None:
+                organization = record.get('autonomous_system_organization') or ''
+                asn = f"AS{record['autonomous_system_number']} {organization}".rstrip()
+        return country, asn
+
+    def close(self) -> None:
+        """Release the memory-mapped databases"""
+        for reader in (self._country_reader, self._asn_reader):
+            if reader is not None:
+                reader.close()
@@ -0,0 +1,176 @@
+"""
+Crawler IP Ranges - CIDR Lookup for AI Crawler Verification
+===========================================================
+
+Stores the IP ranges AI crawlers are known to use in a binary prefix trie
+so every lookup costs at most 32 (IPv4) or 128 (IPv6) steps, regardless of
+how many ranges are loaded.
+
+🔧 HOW WE DO THIS:
+• Load CIDR blocks from the JSON range files OpenAI, Google, Anthropic etc. publish
+• Convert the legacy "20.171." style prefixes from the crawler signatures
+• Memoize lookups per distinct IP address
+• Report every crawler whose ranges cover an IP, so user agents claiming
+  a crawler from outside its published ranges can be flagged as spoofed
+"""
+
+import ipaddress
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Where a range came from: heuristic signature prefixes or a published range file
+SOURCE_SIGNATURE = "signature"
+SOURCE_PUBLISHED = "published"
+
+
+class CIDRTrie:
+    """
+    Binary radix trie over IPv4 and IPv6 networks
+
+    Each node is a list of [zero_child, one_child, labels]. A lookup walks
+    the address bits from the most significant one and collects the labels
+    of every network on the path.
+    """
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+
+    def insert(self, network: str, label) -> None:
+        """Attach a label to a CIDR block such as 20.171.206.0/24"""
+        net = ipaddress.ip_network(network, strict=False)
+        bits = int(net.network_address)
+        width = net.max_prefixlen
+        node = self._roots[net.version]
+        for depth in range(net.prefixlen):
+            bit = (bits >> (width - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            node[2] = []
+        if label not in node[2]:
+            node[2].append(label)
+
+    def lookup(self, ip: str) -> Tuple:
+        """All labels whose networks contain the address (empty for invalid IPs)"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return ()
+        bits = int(address)
+        width = address.max_prefixlen
+        node = self._roots[address.version]
+        labels = []
+        for depth in range(width + 1):
+            if node[2]:
+                labels.extend(node[2])
+            if depth == width:
+                break
+            node = node[(bits >> (width - 1 - depth)) & 1]
+            if node is None:
+                break
+        return tuple(labels)
+
+
+class CrawlerIPRanges:
+    """
+    IP range registry for AI crawlers backed by a CIDRTrie
+
+    Lookups map each crawler type covering an IP to whether the covering
+    range is published, and are cached per IP.
+    """
+
+    def __init__(self, cache_size: int = 100000):
+        """
+        Args:
+            cache_size: Maximum number of distinct IPs to memoize
+        """
+        self.cache_size = cache_size
+        self._trie = CIDRTrie()
+        self._networks: List[Tuple[str, str, str]] = []
+        self.published_crawlers = set()
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __reduce__(self):
+        # Rebuild the trie on unpickle (e.g. in worker processes) with a fresh cache
+        return (_rebuild_ranges, (self.cache_size, self._networks))
+
+    def add_network(self, crawler_type: str, network: str, source: str = SOURCE_PUBLISHED) -> None:
+        """Register a CIDR block for a crawler type"""
+        self._trie.insert(network, (crawler_type, source))
+        self._networks.append((crawler_type, network, source))
+        if source == SOURCE_PUBLISHED:
+            self.published_crawlers.add(crawler_type)
+        self.lookup.cache_clear()
+
+    def add_signature_prefixes(self, crawler_type: str, prefixes: Iterable[str]) -> None:
+        """Register legacy dotted prefixes like "20.171." as CIDR blocks"""
+        for prefix in prefixes:
+            octets = [octet for octet in prefix.split('.') if octet]
+            if not octets or len(octets) > 4:
+                logger.warning(f"⚠️ Skipping unsupported IP prefix for {crawler_type}: {prefix}")
+                continue
+            network = '.'.join(octets + ['0'] * (4 - len(octets))) + f"/{8 * len(octets)}"
+            self.add_network(crawler_type, network, source=SOURCE_SIGNATURE)
+
+    def load_json(self, crawler_type: str, path: str) -> int:
+        """
+        Load a published range file for a crawler type
+
+        Accepts the {"prefixes": [{"ipv4Prefix": ...}, {"ipv6Prefix": ...}]}
+        layout used by OpenAI and Google, as well as plain lists of CIDR strings.
+
+        Returns:
+            int: Number of networks loaded
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        entries = data.get('prefixes', []) if isinstance(data, dict) else data
+        loaded = 0
+        for entry in entries:
+            if isinstance(entry, dict):
+                network = (entry.get('ipv4Prefix') or entry.get('ipv6Prefix')
+                           or entry.get('prefix') or entry.get('cidr'))
+            else:
+                network = entry
+            if not network:
+                continue
+            try:
+                self.add_network(crawler_type, network, source=SOURCE_PUBLISHED)
+                loaded += 1
+            except ValueError:
+                logger.warning(f"⚠️ Skipping invalid network in {path}: {network}")
+
+        logger.info(f"🌐 Loaded {loaded} published IP ranges for {crawler_type} from {path}")
+        return loaded
+
+    def _lookup(self, ip: str) -> Dict[str, bool]:
+        """Map of crawler types covering an IP to whether the range is published"""
+        matches = {}
+        for crawler_type, source in self._trie.lookup(ip):
+            matches[crawler_type] = matches.get(crawler_type, False) or source == SOURCE_PUBLISHED
+        return matches
+
+
+def _rebuild_ranges(cache_size: int, networks: List[Tuple[str, str, str]]) -> CrawlerIPRanges:
+    """Recreate a CrawlerIPRanges from its registered networks"""
+    ranges = CrawlerIPRanges(cache_size)
+    for crawler_type, network, source in networks:
+        ranges.add_network(crawler_type, network, source)
+    return ranges
+
+
+def parse_range_file_specs(specs: Optional[Iterable[str]]) -> Dict[str, List[str]]:
+    """Turn CLI style "crawler_type=path.json" specs into a range file mapping"""
+    range_files: Dict[str, List[str]] = {}
+    for spec in specs or []:
+        crawler_type, sep, path = spec.partition('=')
+        if not sep or not crawler_type or not path:
+            raise ValueError(f"Expected crawler_type=path, got: {spec}")
+        range_files.setdefault(crawler_type.strip(), []).append(path.strip())
+    return range_files
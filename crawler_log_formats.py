@@ -0,0 +1,302 @@
+"""
+Crawler Log Formats - Parsers for Non-Apache Access Logs
+========================================================
+
+AI crawler traffic reaches us through more than Apache/Nginx combined logs:
+nginx JSON access logs, AWS Application Load Balancer logs and CloudFront
+(W3C extended) logs. Each format gets a specialized parser that produces the
+same entry dict as AICrawlerAnalytics._parse_log_entry, so every format
+feeds the same streaming aggregator.
+
+🔧 HOW WE DO THIS:
+• JSON lines go through orjson when it is installed, json otherwise
+• ALB and CloudFront lines are split on their fixed separators, no regex
+• detect_log_format() sniffs the first lines of a log to pick a parser
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import unquote
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    JSON_DECODE_ERRORS = (ValueError, orjson.JSONDecodeError)
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+    JSON_DECODE_ERRORS = (ValueError,)
+
+# Lines sniffed to detect a log's format
+SNIFF_LINES = 20
+
+# Distinct timestamps / encoded user agents a W3C parser memoizes before resetting
+W3C_CACHE_SIZE = 100000
+
+# Fallback CloudFront standard log columns, for chunks without a #Fields header
+CLOUDFRONT_FIELDS = [
+    'date', 'time', 'x-edge-location', 'sc-bytes', 'c-ip', 'cs-method', 'cs(Host)', 'cs-uri-stem',
+    'sc-status', 'cs(Referer)', 'cs(User-Agent)', 'cs-uri-query', 'cs(Cookie)', 'x-edge-result-type',
+    'x-edge-request-id', 'x-host-header', 'cs-protocol', 'cs-bytes', 'time-taken', 'x-forwarded-for',
+    'ssl-protocol', 'ssl-cipher', 'x-edge-response-result-type', 'cs-protocol-version'
+]
+
+ALB_REQUEST_TYPES = ('http', 'https', 'h2', 'grpcs', 'ws', 'wss')
+
+
+def _path_from_request_target(target: str) -> str:
+    """`http://host:80/a?b` -> `/a?b`; origin-form targets are returned unchanged"""
+    scheme_end = target.find('://')
+    if scheme_end == -1:
+        return target
+    path_start = target.find('/', scheme_end + 3)
+    return target[path_start:] if path_start != -1 else '/'
+
+
+def _parse_iso_timestamp(value: str) -> datetime:
+    """ISO 8601 timestamp, with `Z` accepted on every Python version"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    timestamp = datetime.fromisoformat(value)
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class NginxJSONParser:
+    """
+    nginx `log_format ... escape=json` access logs, one JSON object per line
+
+    Accepts the usual variable names (`remote_addr`, `time_local` or
+    `time_iso8601`, `request` or `request_method` + `request_uri`, `status`,
+    `body_bytes_sent`, `http_referer`, `http_user_agent`) and common aliases.
+    """
+
+    name = 'nginx_json'
+
+    def __init__(self, parse_clf_timestamp: Callable[[str], Optional[datetime]]):
+        """
+        Args:
+            parse_clf_timestamp: Parser for `10/Oct/2024:13:55:36 +0000` timestamps
+        """
+        self.parse_clf_timestamp = parse_clf_timestamp
+
+    @staticmethod
+    def sniff(line: str) -> bool:
+        return line.lstrip().startswith('{')
+
+    def parse(self, line: str) -> Optional[Dict]:
+        try:
+            record = _json_loads(line)
+        except JSON_DECODE_ERRORS:
+            return None
+        if not isinstance(record, dict):
+            return None
+
+        try:
+            time_local = record.get('time_local')
+            if time_local:
+                timestamp = self.parse_clf_timestamp(time_local)
+            else:
+                timestamp = _parse_iso_timestamp(
+                    record.get('time_iso8601') or record.get('@timestamp') or record.get('timestamp') or record['time']
+                )
+            if timestamp is None:
+                return None
+
+            request = record.get('request')
+            if request:
+                method, url, protocol = request.split(' ')
+            else:
+                method = record.get('request_method') or record['method']
+                url = record.get('request_uri') or record.get('uri') or record['path']
+                protocol = record.get('server_protocol') or record.get('protocol') or '-'
+
+            size = record.get('body_bytes_sent', record.get('bytes_sent', 0))
+            return {
+                'ip': record.get('remote_addr') or record.get('client_ip') or record['ip'],
+                'timestamp': timestamp,
+                'method': method,
+                'url': url,
+                'protocol': protocol,
+                'status': int(record['status']),
+                'size': size if size not in ('-', '', None) else 0,
+                'referer': record.get('http_referer') or record.get('http_referrer') or record.get('referer') or '-',
+                'user_agent': record.get('http_user_agent') or record.get('user_agent') or '-'
+            }
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+class ALBLogParser:
+    """
+    AWS Application Load Balancer access logs
+
+    `type time elb client:port target:port t1 t2 t3 elb_status target_status
+    received sent "request" "user_agent" ...`; split on quotes, then spaces.
+    """
+
+    name = 'alb'
+
+    def __init__(self, parse_clf_timestamp: Optional[Callable] = None):
+        pass
+
+    @staticmethod
+    def sniff(line: str) -> bool:
+        head = line.split(' ', 2)
+        return len(head) == 3 and head[0] in ALB_REQUEST_TYPES and head[1].endswith('Z')
+
+    def parse(self, line: str) -> Optional[Dict]:
+        fields = line.split('"', 4)
+        if len(fields) < 5:
+            return None
+        head = fields[0].split()
+        if len(head) < 12 or head[0] not in ALB_REQUEST_TYPES:
+            return None
+
+        try:
+            method, target, protocol = fields[1].split(' ')
+            status = int(head[8])
+            timestamp = _parse_iso_timestamp(head[1])
+        except ValueError:
+            return None
+
+        size = head[11]
+        return {
+            'ip': head[3].rsplit(':', 1)[0],
+            'timestamp': timestamp,
+            'method': method,
+            'url': _path_from_request_target(target),
+            'protocol': protocol,
+            'status': status,
+            'size': size if size != '-' else 0,
+            'referer': '-',
+            'user_agent': fields[3]
+        }
+
+
+class W3CLogParser:
+    """
+    W3C extended logs such as CloudFront standard logs (tab-separated)
+
+    Columns come from the `#Fields:` header; chunks read without the header
+    (e.g. by worker processes) use the parser primed from the file's first
+    lines, or the CloudFront standard column order.
+    """
+
+    name = 'cloudfront'
+
+    def __init__(self, parse_clf_timestamp: Optional[Callable] = None):
+        self._set_fields(CLOUDFRONT_FIELDS)
+        # Many lines share a second and a user agent
+        self._timestamps: Dict[tuple, datetime] = {}
+        self._user_agents: Dict[str, str] = {}
+
+    @staticmethod
+    def sniff(line: str) -> bool:
+        if line.startswith(('#Version', '#Fields:')):
+            return True
+        fields = line.split('\t', 2)
+        return len(fields) == 3 and len(fields[0]) == 10 and fields[0][4] == '-' and fields[0][7] == '-'
+
+    def _set_fields(self, fields: List[str]):
+        index = {field: position for position, field in enumerate(fields)}
+        self._columns = len(fields)
+        self._date = index.get('date')
+        self._time = index.get('time')
+        self._ip = index.get('c-ip')
+        self._method = index.get('cs-method')
+        self._stem = index.get('cs-uri-stem')
+        self._query = index.get('cs-uri-query')
+        self._status = index.get('sc-status')
+        self._bytes = index.get('sc-bytes')
+        self._referer = index.get('cs(Referer)')
+        self._user_agent = index.get('cs(User-Agent)')
+        self._protocol = index.get('cs-protocol-version')
+
+    def parse(self, line: str) -> Optional[Dict]:
+        if line.startswith('#'):
+            if line.startswith('#Fields:'):
+                self._set_fields(line[8:].split())
+            return None
+
+        fields = line.rstrip('\r\n').split('\t')
+        if len(fields) < self._columns or self._date is None or self._stem is None:
+            return None
+        try:
+            timestamp = self._timestamp(fields[self._date], fields[self._time] if self._time is not None else None)
+            status = int(fields[self._status])
+        except (TypeError, ValueError):
+            return None
+
+        url = fields[self._stem]
+        query = fields[self._query] if self._query is not None else '-'
+        if query != '-':
+            url = f"{url}?{query}"
+        size = fields[self._bytes] if self._bytes is not None else '-'
+        # CloudFront URL-encodes the user agent and referer
+        user_agent = fields[self._user_agent] if self._user_agent is not None else '-'
+        if '%' in user_agent:
+            user_agent = self._decode_user_agent(user_agent)
+        return {
+            'ip': fields[self._ip] if self._ip is not None else '-',
+            'timestamp': timestamp,
+            'method': fields[self._method] if self._method is not None else '-',
+            'url': url,
+            'protocol': fields[self._protocol] if self._protocol is not None else '-',
+            'status': status,
+            'size': size if size != '-' else 0,
+            'referer': unquote(fields[self._referer]) if self._referer is not None else '-',
+            'user_agent': user_agent
+        }
+
+    def _timestamp(self, date: str, time: Optional[str]) -> datetime:
+        """UTC timestamp from the date and time columns, memoized per second"""
+        key = (date, time)
+        timestamp = self._timestamps.get(key)
+        if timestamp is None:
+            timestamp = datetime.fromisoformat(f"{date}T{time}+00:00" if time is not None else f"{date}T00:00:00+00:00")
+            if len(self._timestamps) >= W3C_CACHE_SIZE:
+                self._timestamps.clear()
+            self._timestamps[key] = timestamp
+        return timestamp
+
+    def _decode_user_agent(self, user_agent: str) -> str:
+        decoded = self._user_agents.get(user_agent)
+        if decoded is None:
+            decoded = unquote(user_agent)
+            if len(self._user_agents) >= W3C_CACHE_SIZE:
+                self._user_agents.clear()
+            self._user_agents[user_agent] = decoded
+        return decoded
+
+
+def _sniff_combined(line: str) -> bool:
+    # `ip ident user [timestamp] ...`
+    head = line.split(' ', 4)
+    return len(head) == 5 and head[3].startswith('[')
+
+
+# Format name -> parser class; `combined` is parsed by AICrawlerAnalytics itself
+LOG_PARSERS = {
+    NginxJSONParser.name: NginxJSONParser,
+    ALBLogParser.name: ALBLogParser,
+    W3CLogParser.name: W3CLogParser,
+}
+
+LOG_FORMATS = ['combined'] + list(LOG_PARSERS)
+
+_SNIFFERS = [('combined', _sniff_combined)] + [(name, parser.sniff) for name, parser in LOG_PARSERS.items()]
+
+
+def detect_log_format(lines: List[str]) -> str:
+    """Name of the format matching most of the given (first) lines; `combined` when none do"""
+    votes = dict.fromkeys(LOG_FORMATS, 0)
+    for line in lines[:SNIFF_LINES]:
+        if not line.strip():
+            continue
+        for name, sniff in _SNIFFERS:
+            if sniff(line):
+                votes[name] += 1
+                break
+    best = max(LOG_FORMATS, key=lambda name: votes[name])
+    return best if votes[best] else 'combined'
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Crawler Log Generator - Seeded Synthetic Access Logs
+====================================================
+
+Writes realistic combined-format access logs of any size for benchmarking
+and load-testing AICrawlerAnalytics. The same seed and settings always
+produce the same file.
+
+🔧 HOW WE DO THIS:
+• Take crawler types and IP prefixes from AICrawlerAnalytics' signatures and
+  build one concrete user agent per signature pattern, checked against the
+  real classifier, so generated bots stay detectable as signatures change
+• Mix human traffic, AI crawlers (configurable share per crawler type) and
+  spoofed crawler user agents from non-crawler IPs
+• Draw URLs from a Zipf distribution over a configurable number of pages,
+  and status codes from a configurable mix
+• Generate in batches (random.choices over cumulative weights) and format
+  each distinct timestamp second once, so 50M lines take minutes, not hours
+
+Usage:
+    python crawler_log_generator.py --lines 1000000 --output access.log
+    python crawler_log_generator.py --lines 200000 --mix chatgpt=3,claude=1 --urls 5000 --output small.log
+"""
+
+import argparse
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS_MIX = {200: 0.82, 304: 0.05, 301: 0.04, 404: 0.07, 500: 0.02}
+
+HUMAN_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+]
+
+HUMAN_REFERERS = ["-", "-", "https://www.google.com/", "https://duckduckgo.com/", "https://example.com/"]
+
+# Lines generated per batch of random draws
+GENERATOR_BATCH = 10000
+
+
+@dataclass
+class SyntheticLogConfig:
+    """What a synthetic access log contains"""
+    lines: int = 1000000
+    seed: int = 42
+    days: int = 7
+    end: Optional[datetime] = None  # Last timestamp; defaults to now
+    ai_share: float = 0.3  # Share of lines from AI crawlers (including spoofed ones)
+    crawler_mix: Optional[Dict[str, float]] = None  # Crawler type -> weight; defaults to all types equally
+    crawler_ips: int = 64  # Distinct IPs per crawler type
+    spoofed_share: float = 0.02  # Share of AI crawler lines sent from non-crawler IPs
+    human_ips: int = 50000
+    urls: int = 20000  # Distinct URLs
+    url_zipf: float = 1.1  # Zipf exponent of URL popularity
+    status_mix: Dict[int, float] = field(default_factory=lambda: dict(DEFAULT_STATUS_MIX))
+
+
+def _user_agent_for_pattern(pattern: str) -> str:
+    """A concrete crawler user agent matching a signature pattern such as `Claude.*Bot`"""
+    token = re.sub(r'\s+', ' ', re.sub(r'\.\*|\\.|[\^$]', ' ', pattern)).strip()
+    return f"Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; {token}/1.0; +https://example.com/bot)"
+
+
+def _ip_in_prefix(rng: random.Random, prefix: str) -> str:
+    """Random address starting with a dotted prefix such as `20.171.`"""
+    octets = [part for part in prefix.split('.') if part]
+    while len(octets) < 4:
+        octets.append(str(rng.randint(1, 254)))
+    return '.'.join(octets)
+
+
+def _public_ip(rng: random.Random) -> str:
+    return f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+
+
+def _url(rng: random.Random, rank: int) -> str:
+    """A page path with realistic depth and file type variety"""
+    kind = rng.random()
+    if kind < 0.55:
+        return f'/blog/post-{rank}'
+    if kind < 0.8:
+        return f'/docs/section-{rank % 40}/guide-{rank}'
+    if kind < 0.9:
+        return f'/assets/img/photo-{rank}.{rng.choice(["png", "jpg", "webp"])}'
+    if kind < 0.95:
+        return f'/downloads/report-{rank}.pdf'
+    return f'/products/{rank % 200}/item-{rank}?ref=list'
+
+
+class SyntheticLogGenerator:
+    """Seeded generator of combined-format access log lines"""
+
+    def __init__(self, config: SyntheticLogConfig, signatures: Optional[Dict] = None):
+        """
+        Args:
+            config: What the log contains
+            signatures: Crawler signatures as returned by
+                AICrawlerAnalytics._get_ai_crawler_signatures() (loaded when omitted)
+        """
+        from ai_crawler_analytics import AICrawlerAnalytics
+
+        self.config = config
+        analytics = AICrawlerAnalytics()
+        signatures = signatures or analytics._get_ai_crawler_signatures()
+        mix = config.crawler_mix or {crawler_type: 1.0 for crawler_type in signatures}
+        unknown = set(mix) - set(signatures)
+        if unknown:
+            raise ValueError(f"Unknown crawler types in mix: {', '.join(sorted(unknown))}")
+
+        rng = random.Random(config.seed)
+        # Actor 0 is human traffic, then one actor per crawler type in the mix
+        self.crawler_types = [crawler_type for crawler_type, weight in mix.items() if weight > 0]
+        self.crawler_user_agents: List[List[str]] = []
+        self.crawler_ip_pools: List[List[str]] = []
+        for crawler_type in self.crawler_types:
+            info = signatures[crawler_type]
+            user_agents = []
+            for pattern in info['user_agents']:
+                user_agent = _user_agent_for_pattern(pattern)
+                # Keep user agents the classifier attributes to this crawler (signature order decides ties)
+                match = analytics.user_agent_classifier.classify(user_agent)
+                if match is not None and analytics._crawler_types[match] == crawler_type:
+                    user_agents.append(user_agent)
+            if not user_agents:
+                raise ValueError(f"No generated user agent is classified as {crawler_type}")
+            self.crawler_user_agents.append(user_agents)
+            prefixes = info.get('ips') or [None]
+            self.crawler_ip_pools.append([
+                _ip_in_prefix(rng, prefixes[i % len(prefixes)]) if prefixes[i % len(prefixes)] else _public_ip(rng)
+                for i in range(config.crawler_ips)
+            ])
+        total_weight = sum(mix[crawler_type] for crawler_type in self.crawler_types)
+        weights = [1 - config.ai_share] + [config.ai_share * mix[crawler_type] / total_weight
+                                           for crawler_type in self.crawler_types]
+        self.actor_cum_weights = list(accumulate(weights))
+
+        # Human traffic must not fall into crawler IP prefixes, which classify by IP alone
+        self.human_ip_pool = []
+        while len(self.human_ip_pool) < config.human_ips:
+            ip = _public_ip(rng)
+            if not analytics.ip_ranges.lookup(ip):
+                self.human_ip_pool.append(ip)
+        self.human_user_agents = [user_agent for user_agent in HUMAN_USER_AGENTS
+                                  if analytics.user_agent_classifier.classify(user_agent) is None]
+        self.url_pool = [_url(rng, rank) for rank in range(1, config.urls + 1)]
+        self.url_cum_weights = list(accumulate(1 / rank ** config.url_zipf for rank in range(1, config.urls + 1)))
+        self.statuses = [str(status) for status in config.status_mix]
+        self.status_cum_weights = list(accumulate(config.status_mix.values()))
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield the log's lines in time order"""
+        config = self.config
+        rng = random.Random(config.seed + 1)
+        end = config.end or datetime.now(timezone.utc)
+        start = end - timedelta(days=config.days)
+        step = config.days * 86400 / max(1, config.lines)
+        start_seconds = start.timestamp()
+        actors = range(len(self.actor_cum_weights))
+
+        formatted_second = None
+        formatted = ''
+        for batch_start in range(0, config.lines, GENERATOR_BATCH):
+            count = min(GENERATOR_BATCH, config.lines - batch_start)
+            batch_actors = rng.choices(actors, cum_weights=self.actor_cum_weights, k=count)
+            batch_urls = rng.choices(self.url_pool, cum_weights=self.url_cum_weights, k=count)
+            batch_statuses = rng.choices(self.statuses, cum_weights=self.status_cum_weights, k=count)
+            for offset in range(count):
+                second = int(start_seconds + (batch_start + offset) * step)
+                if second != formatted_second:
+                    formatted_second = second
+                    formatted = datetime.fromtimestamp(second, timezone.utc).strftime('%d/%b/%Y:%H:%M:%S +0000')
+                actor = batch_actors[offset]
+                if actor == 0:
+                    ip = rng.choice(self.human_ip_pool)
+                    user_agent = rng.choice(self.human_user_agents)
+                    referer = rng.choice(HUMAN_REFERERS)
+                else:
+                    spoofed = rng.random() < config.spoofed_share
+                    ip = rng.choice(self.human_ip_pool if spoofed else self.crawler_ip_pools[actor - 1])
+                    user_agent = rng.choice(self.crawler_user_agents[actor - 1])
+                    referer = '-'
+                yield (f'{ip} - - [{formatted}] "GET {batch_urls[offset]} HTTP/1.1" {batch_statuses[offset]} '
+                       f'{rng.getrandbits(16) + 200} "{referer}" "{user_agent}"\n')
+
+    def write(self, path: str) -> int:
+        """Write the log to a file and return the number of lines"""
+        lines = 0
+        with open(path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            batch = []
+            for line in self.iter_lines():
+                batch.append(line)
+                if len(batch) >= GENERATOR_BATCH:
+                    f.writelines(batch)
+                    lines += len(batch)
+                    batch = []
+            f.writelines(batch)
+            lines += len(batch)
+        return lines
+
+
+def parse_mix(spec: Optional[str]) -> Optional[Dict[str, float]]:
+    """Parse a `chatgpt=3,claude=1` crawler mix"""
+    if not spec:
+        return None
+    mix = {}
+    for item in spec.split(','):
+        crawler_type, _, weight = item.partition('=')
+        mix[crawler_type.strip()] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a seeded synthetic access log')
+    parser.add_argument('--output', type=str, required=True, help='Log file to write')
+    parser.add_argument('--lines', type=int, default=1000000, help='Number of log lines')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--days', type=int, default=7, help='Days of traffic, ending now')
+    parser.add_argument('--ai-share', type=float, default=0.3, help='Share of lines from AI crawlers')
+    parser.add_argument('--mix', type=str, help='Crawler type weights, e.g. chatgpt=3,claude=1 (default: equal)')
+    parser.add_argument('--crawler-ips', type=int, default=64, help='Distinct IPs per crawler type')
+    parser.add_argument('--spoofed-share', type=float, default=0.02,
+                        help='Share of AI crawler lines sent from non-crawler IPs')
+    parser.add_argument('--urls', type=int, default=20000, help='Distinct URLs')
+    parser.add_argument('--url-zipf', type=float, default=1.1, help='Zipf exponent of URL popularity')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    generator = SyntheticLogGenerator(SyntheticLogConfig(
+        lines=args.lines, seed=args.seed, days=args.days, ai_share=args.ai_share, crawler_mix=parse_mix(args.mix),
+        crawler_ips=args.crawler_ips, spoofed_share=args.spoofed_share, urls=args.urls, url_zipf=args.url_zipf
+    ))
+    started = time.perf_counter()
+    written = generator.write(args.output)
+    logger.info(f"✅ Wrote {written:,} lines to {args.output} in {time.perf_counter() - started:.1f}s")
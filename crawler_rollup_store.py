@@ -0,0 +1,233 @@
+"""
+Crawler Rollup Store - Hourly AI Crawler Rollups in SQLite
+==========================================================
+
+Keeps hourly rollups of AI crawler traffic (crawler type × URL × status,
+with hits and bytes) in an indexed local SQLite database so dashboards and
+API calls can answer "last 7 days", "week over week" or "per-crawler trend"
+queries in milliseconds instead of reparsing raw logs.
+
+🔧 HOW WE DO THIS:
+• AICrawlerAnalytics collects rollups while it aggregates log lines
+• Full parses replace the hours they cover; follow-mode runs add to them
+• Queries rebuild a CrawlerStatsAggregator from the rollups, so results
+  have the same shape as parse_access_logs()
+"""
+
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawler_rollups (
+    hour INTEGER NOT NULL,
+    hour_label TEXT NOT NULL,
+    crawler_type TEXT NOT NULL,
+    crawler_name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    PRIMARY KEY (hour, crawler_type, url, status)
+);
+CREATE INDEX IF NOT EXISTS idx_crawler_rollups_crawler_hour ON crawler_rollups (crawler_type, hour);
+CREATE INDEX IF NOT EXISTS idx_crawler_rollups_url_hour ON crawler_rollups (url, hour);
+CREATE TABLE IF NOT EXISTS traffic_rollups (
+    hour INTEGER PRIMARY KEY,
+    requests INTEGER NOT NULL
+);
+"""
+
+UPSERT_CRAWLER_ROLLUP = """
+INSERT INTO crawler_rollups
+    (hour, hour_label, crawler_type, crawler_name, url, status, hits, bytes, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (hour, crawler_type, url, status) DO UPDATE SET
+    hits = hits + excluded.hits,
+    bytes = bytes + excluded.bytes,
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+UPSERT_TRAFFIC_ROLLUP = """
+INSERT INTO traffic_rollups (hour, requests) VALUES (?, ?)
+ON CONFLICT (hour) DO UPDATE SET requests = requests + excluded.requests
+"""
+
+
+class CrawlerRollupStore:
+    """
+    SQLite-backed store of hourly AI crawler rollups
+
+    Hours are stored as epoch seconds for range queries, alongside the hour
+    as it appeared in the log (`hour_label`, with its UTC offset) so hourly
+    and daily distributions match a direct log parse.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite database file (created if missing)
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def write(self, rollups: Dict, traffic: Dict, replace: bool = False,
+              complete_from: Optional[datetime] = None, complete_until: Optional[datetime] = None) -> int:
+        """
+        Store rollups collected by a CrawlerStatsAggregator
+
+        Args:
+            rollups: {(hour_start, crawler_type, url, status): [hits, bytes, first_seen, last_seen, crawler_name]}
+            traffic: {hour_start: requests} for all traffic, AI or not
+            replace: Replace the hours present in this batch (full re-parse)
+                instead of adding to them (incremental follow-mode runs)
+            complete_from: Start of the parsed window; rollups for the hour it
+                falls in are partial and skipped so they can't replace full ones
+            complete_until: Last timestamp of the parsed data (e.g. a possibly
+                truncated upload); the hour it falls in is skipped likewise
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        if complete_from is not None:
+            rollups = {key: rollup for key, rollup in rollups.items() if key[0] >= complete_from}
+            traffic = {hour_start: requests for hour_start, requests in traffic.items() if hour_start >= complete_from}
+        if complete_until is not None:
+            rollups = {key: rollup for key, rollup in rollups.items() if key[0] + timedelta(hours=1) <= complete_until}
+            traffic = {hour_start: requests for hour_start, requests in traffic.items()
+                       if hour_start + timedelta(hours=1) <= complete_until}
+
+        crawler_rows = [
+            (
+                int(hour_start.timestamp()), hour_start.isoformat(), crawler_type, crawler_name, url,
+                status, hits, size, int(first_seen.timestamp()), int(last_seen.timestamp())
+            )
+            for (hour_start, crawler_type, url, status), (hits, size, first_seen, last_seen, crawler_name)
+            in rollups.items()
+        ]
+        traffic_rows = [(int(hour_start.timestamp()), requests) for hour_start, requests in traffic.items()]
+
+        with self._connect() as conn:
+            if replace:
+                hours = [(hour,) for hour in {row[0] for row in traffic_rows} | {row[0] for row in crawler_rows}]
+                conn.executemany("DELETE FROM crawler_rollups WHERE hour = ?", hours)
+                conn.executemany("DELETE FROM traffic_rollups WHERE hour = ?", hours)
+            conn.executemany(UPSERT_CRAWLER_ROLLUP, crawler_rows)
+            conn.executemany(UPSERT_TRAFFIC_ROLLUP, traffic_rows)
+
+        logger.info(f"🗄️ Stored {len(crawler_rows)} crawler rollups for {len(traffic_rows)} hours in {self.db_path}")
+        return len(crawler_rows)
+
+    def load_aggregator(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        crawler_type: Optional[str] = None):
+        """
+        Rebuild a CrawlerStatsAggregator from the rollups in a time range
+
+        Args:
+            since: Include hours starting at or after this time
+            until: Include hours starting before this time
+            crawler_type: Only include one crawler type
+
+        Returns:
+            CrawlerStatsAggregator: Aggregates with hour-level timestamps
+        """
+        from ai_crawler_analytics import CrawlerStatsAggregator
+
+        conditions, params = self._range_filter(since, until)
+        if crawler_type:
+            conditions.append("crawler_type = ?")
+            params.append(crawler_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Hour-level rollups can't be split into crawl sessions
+        aggregator = CrawlerStatsAggregator(session_gap=None)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT hour_label, crawler_type, crawler_name, url, status, hits, first_seen, last_seen "
+                f"FROM crawler_rollups {where} ORDER BY hour, rowid",
+                params
+            )
+            for hour_label, row_crawler_type, crawler_name, url, status, hits, first_seen, last_seen in rows:
+                tzinfo = datetime.fromisoformat(hour_label).tzinfo
+                aggregator.add_rollup(
+                    hour_label, row_crawler_type, crawler_name, url, status, hits,
+                    datetime.fromtimestamp(first_seen, tzinfo), datetime.fromtimestamp(last_seen, tzinfo)
+                )
+
+            traffic_conditions, traffic_params = self._range_filter(since, until)
+            traffic_where = f"WHERE {' AND '.join(traffic_conditions)}" if traffic_conditions else ""
+            total = conn.execute(
+                f"SELECT COALESCE(SUM(requests), 0) FROM traffic_rollups {traffic_where}", traffic_params
+            ).fetchone()[0]
+        aggregator.total_requests = total
+
+        return aggregator
+
+    def week_over_week(self, now: Optional[datetime] = None) -> Dict:
+        """Per-crawler hits in the last 7 days vs the 7 days before"""
+        now = now or datetime.now(timezone.utc)
+        this_week_start = now - timedelta(days=7)
+        last_week_start = now - timedelta(days=14)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT crawler_type, "
+                "SUM(CASE WHEN hour >= ? THEN hits ELSE 0 END), "
+                "SUM(CASE WHEN hour < ? THEN hits ELSE 0 END) "
+                "FROM crawler_rollups WHERE hour >= ? AND hour < ? GROUP BY crawler_type",
+                (int(this_week_start.timestamp()), int(this_week_start.timestamp()),
+                 int(last_week_start.timestamp()), int(now.timestamp()))
+            ).fetchall()
+
+        comparison = {}
+        for crawler_type, this_week, last_week in rows:
+            change = round((this_week - last_week) / last_week * 100, 1) if last_week else None
+            comparison[crawler_type] = {
+                'this_week': this_week,
+                'last_week': last_week,
+                'change_percent': change
+            }
+        return comparison
+
+    def crawler_trend(self, days_back: int = 30, crawler_type: Optional[str] = None) -> List[Dict]:
+        """Daily hits per crawler type over the last `days_back` days"""
+        since = datetime.now(timezone.utc) - timedelta(days=days_back)
+        conditions, params = self._range_filter(since, None)
+        if crawler_type:
+            conditions.append("crawler_type = ?")
+            params.append(crawler_type)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT substr(hour_label, 1, 10) AS day, crawler_type, SUM(hits) "
+                f"FROM crawler_rollups WHERE {' AND '.join(conditions)} "
+                "GROUP BY day, crawler_type ORDER BY day, crawler_type",
+                params
+            ).fetchall()
+
+        return [{'date': day, 'crawler_type': row_type, 'requests': hits} for day, row_type, hits in rows]
+
+    def _range_filter(self, since: Optional[datetime], until: Optional[datetime]):
+        """WHERE conditions and parameters for an hour range"""
+        conditions, params = [], []
+        if since is not None:
+            # Include the hour that contains `since`
+            conditions.append("hour >= ?")
+            params.append(int(since.timestamp()) // 3600 * 3600)
+        if until is not None:
+            conditions.append("hour < ?")
+            params.append(int(until.timestamp()))
+        return conditions, params
@@ -0,0 +1,137 @@
+"""
+Crawler Sampling - Approximate Crawler Analytics with Error Bars
+================================================================
+
+Exact analysis has to parse every line of every log. For a quick answer on
+huge logs, a small random sample is enough as long as the figures say how
+far off they may be.
+
+🔧 HOW WE DO THIS:
+• Lines are Bernoulli-sampled at a fixed rate; skipped lines are never parsed
+• Sampled requests go into one reservoir per crawler type (stratum), so rare
+  crawlers keep enough samples next to a dominant one
+• Totals are extrapolated from the sampled counts and shares from the
+  reservoirs, each with a normal-approximation confidence interval
+"""
+
+import math
+import random
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# Two-sided 95% confidence
+CONFIDENCE_Z = 1.96
+
+
+class StratifiedReservoirSample:
+    """
+    Bernoulli line sample with a fixed-size reservoir per stratum
+
+    Every line is kept with probability `sample_rate`; `skip()` returns how
+    many lines to pass over before the next kept one, so callers don't draw
+    a random number per line. Within a stratum, kept items go through
+    reservoir sampling (Algorithm R), so each stratum holds a uniform sample
+    of at most `reservoir_size` items in fixed memory.
+
+    With `sample_rate=1` and a reservoir that holds every item, all
+    estimates are exact and their intervals collapse to a point.
+    """
+
+    def __init__(self, sample_rate: float, reservoir_size: int = 2000, seed: Optional[int] = None):
+        """
+        Args:
+            sample_rate: Probability of keeping a line (0 < rate <= 1)
+            reservoir_size: Maximum items kept per stratum
+            seed: Random seed, for reproducible samples
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        self.sample_rate = sample_rate
+        self.reservoir_size = max(1, reservoir_size)
+        self.rng = random.Random(seed)
+        self._log_skip = math.log(1 - sample_rate) if sample_rate < 1 else None
+        # stratum -> number of kept lines seen (the reservoir's population)
+        self.counts: Dict[Hashable, int] = {}
+        self.reservoirs: Dict[Hashable, List] = {}
+
+    def skip(self) -> int:
+        """Number of lines to skip before the next sampled one (geometric gap)"""
+        if self._log_skip is None:
+            return 0
+        return int(math.log(1.0 - self.rng.random()) / self._log_skip)
+
+    def add(self, stratum: Hashable, item) -> None:
+        """Offer a sampled item to its stratum's reservoir"""
+        seen = self.counts.get(stratum, 0) + 1
+        self.counts[stratum] = seen
+        reservoir = self.reservoirs.get(stratum)
+        if reservoir is None:
+            reservoir = self.reservoirs[stratum] = []
+        if len(reservoir) < self.reservoir_size:
+            reservoir.append(item)
+            return
+        slot = self.rng.randrange(seen)
+        if slot < self.reservoir_size:
+            reservoir[slot] = item
+
+    def estimate_count(self, sampled: int) -> Tuple[int, int, int]:
+        """Population count behind `sampled` kept lines, with a 95% interval"""
+        estimate = sampled / self.sample_rate
+        # Unbiased variance of a Bernoulli-sampled (Horvitz-Thompson) count
+        margin = CONFIDENCE_Z * math.sqrt(sampled * (1 - self.sample_rate)) / self.sample_rate
+        return round(estimate), max(sampled, math.floor(estimate - margin)), math.ceil(estimate + margin)
+
+    def stratum_total(self, stratum: Hashable) -> Tuple[int, int, int]:
+        """Estimated population size of a stratum, with a 95% interval"""
+        return self.estimate_count(self.counts.get(stratum, 0))
+
+    def _population(self, stratum: Hashable) -> float:
+        return self.counts.get(stratum, 0) / self.sample_rate
+
+    def _share_variance(self, stratum: Hashable, share: float) -> float:
+        """Variance of a reservoir share, with the finite population correction"""
+        size = len(self.reservoirs[stratum])
+        population = self._population(stratum)
+        correction = (population - size) / (population - 1) if population > 1 else 0.0
+        return share * (1 - share) / size * max(0.0, correction)
+
+    def proportion(self, stratum: Hashable, predicate: Callable) -> Tuple[float, float, float]:
+        """Share of a stratum's items matching `predicate`, with a 95% interval"""
+        reservoir = self.reservoirs.get(stratum)
+        if not reservoir:
+            return 0.0, 0.0, 0.0
+        share = sum(1 for item in reservoir if predicate(item)) / len(reservoir)
+        margin = CONFIDENCE_Z * math.sqrt(self._share_variance(stratum, share))
+        return share, max(0.0, share - margin), min(1.0, share + margin)
+
+    def weighted_items(self):
+        """(weight, item) pairs; weights sum to each stratum's estimated population"""
+        for stratum, reservoir in self.reservoirs.items():
+            weight = self._population(stratum) / len(reservoir)
+            for item in reservoir:
+                yield weight, item
+
+    def histogram(self, key: Callable) -> Dict[Hashable, Tuple[int, int, int]]:
+        """
+        Estimated population count per `key(item)`, with 95% intervals
+
+        Each stratum contributes its estimated size times the bucket's share of
+        its reservoir; the variance adds the share and size uncertainties.
+        """
+        shares: Dict[Hashable, Dict[Hashable, float]] = {}
+        for stratum, reservoir in self.reservoirs.items():
+            for item in reservoir:
+                bucket = shares.setdefault(key(item), {})
+                bucket[stratum] = bucket.get(stratum, 0) + 1
+
+        histogram = {}
+        for bucket, strata in shares.items():
+            estimate = variance = 0.0
+            for stratum, hits in strata.items():
+                share = hits / len(self.reservoirs[stratum])
+                population = self._population(stratum)
+                population_variance = self.counts[stratum] * (1 - self.sample_rate) / self.sample_rate ** 2
+                estimate += population * share
+                variance += population ** 2 * self._share_variance(stratum, share) + share ** 2 * population_variance
+            margin = CONFIDENCE_Z * math.sqrt(variance)
+            histogram[bucket] = (round(estimate), max(0, math.floor(estimate - margin)), math.ceil(estimate + margin))
+        return histogram
@@ -0,0 +1,410 @@
+"""
+Crawler Sessions - Crawl Sessions and Recrawl Intervals for AI Crawlers
+=======================================================================
+
+Groups AI crawler hits into crawl sessions and measures how often each bot
+comes back to each page, in one pass over the log and in bounded memory.
+
+A crawl session is a run of hits from one (crawler type, client IP) pair
+with no gap longer than the inactivity gap (30 minutes by default). A
+recrawl interval is the time between two consecutive hits of one crawler
+type on one URL.
+
+🔧 HOW WE DO THIS:
+• Keep O(1) state per key: for a (crawler, IP) pair its first and current
+  session (start, end, hits); for a (crawler, URL) pair its first and last
+  hit plus Welford's running mean and variance of the intervals
+• Close a session as soon as a later hit leaves the gap, folding it into
+  per-crawler totals; only a key's first and current sessions stay open, so
+  partials from chunks, files or follow runs merge exactly (joining across
+  the boundary when the gap allows)
+• Median session length and median recrawl interval come from log-bucketed
+  histograms (8 buckets per doubling, within ~4.5%) per crawler type, which
+  merge by addition; every recrawl interval is counted, not each page's mean
+• Cap the number of tracked keys; hits beyond the cap are counted as untracked
+"""
+
+import heapq
+import math
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Seconds of inactivity that end a crawl session
+SESSION_GAP = 30 * 60
+# (crawler, IP) sessions and (crawler, URL) recrawl states tracked at most, each
+SESSION_MAX_KEYS = 200000
+
+HISTOGRAM_BUCKETS_PER_OCTAVE = 8
+
+
+class LogHistogram:
+    """
+    Mergeable histogram of non-negative values in logarithmic buckets
+
+    Quantiles are returned as the bucket's geometric midpoint, within
+    ~4.5% of the true value; zeros are counted exactly.
+    """
+
+    __slots__ = ('zeros', 'buckets')
+
+    def __init__(self):
+        self.zeros = 0
+        self.buckets = Counter()
+
+    def add(self, value: float, count: int = 1):
+        """Count a value"""
+        if value <= 0:
+            self.zeros += count
+        else:
+            self.buckets[math.floor(math.log2(value) * HISTOGRAM_BUCKETS_PER_OCTAVE)] += count
+
+    def merge(self, other: 'LogHistogram') -> 'LogHistogram':
+        """Fold another histogram into this one"""
+        self.zeros += other.zeros
+        self.buckets.update(other.buckets)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.buckets.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 < q <= 1), or None when empty"""
+        total = self.count
+        if not total:
+            return None
+        rank = max(1, math.ceil(q * total))
+        seen = self.zeros
+        if seen >= rank:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return 2 ** ((bucket + 0.5) / HISTOGRAM_BUCKETS_PER_OCTAVE)
+        return None
+
+    def to_dict(self) -> Dict:
+        return {'zeros': self.zeros, 'buckets': list(self.buckets.items())}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LogHistogram':
+        histogram = cls()
+        histogram.zeros = data['zeros']
+        histogram.buckets = Counter(dict(data['buckets']))
+        return histogram
+
+
+class SessionTotals:
+    """Closed sessions of one crawler type"""
+
+    __slots__ = ('sessions', 'session_seconds', 'session_hits', 'durations', 'sizes')
+
+    def __init__(self):
+        self.sessions = 0
+        self.session_seconds = 0.0
+        self.session_hits = 0
+        self.durations = LogHistogram()
+        # Exact: hits per session take few distinct values
+        self.sizes = Counter()
+
+    def add_session(self, start: float, end: float, hits: int):
+        """Count a finished session"""
+        self.sessions += 1
+        self.session_hits += hits
+        self.sizes[hits] += 1
+        if end > start:
+            self.session_seconds += end - start
+            self.durations.add(end - start)
+        else:
+            # Single-hit sessions, the common case on busy crawlers
+            self.durations.zeros += 1
+
+    def merge(self, other: 'SessionTotals') -> 'SessionTotals':
+        """Fold another crawler's totals into these"""
+        self.sessions += other.sessions
+        self.session_seconds += other.session_seconds
+        self.session_hits += other.session_hits
+        self.durations.merge(other.durations)
+        self.sizes.update(other.sizes)
+        return self
+
+    def copy(self) -> 'SessionTotals':
+        return SessionTotals().merge(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            'sessions': self.sessions,
+            'session_seconds': self.session_seconds,
+            'session_hits': self.session_hits,
+            'durations': self.durations.to_dict(),
+            'sizes': list(self.sizes.items())
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SessionTotals':
+        totals = cls()
+        totals.sessions = data['sessions']
+        totals.session_seconds = data['session_seconds']
+        totals.session_hits = data['session_hits']
+        totals.durations = LogHistogram.from_dict(data['durations'])
+        totals.sizes = Counter(dict(data['sizes']))
+        return totals
+
+
+def _spans(state: Tuple) -> List[Tuple]:
+    """Open sessions of a key: its first one, and its current one when that is a later session"""
+    if state[3] is None:
+        return [state[0:3]]
+    return [state[0:3], state[3:6]]
+
+
+def _median(sizes: Counter) -> Optional[int]:
+    """Lower median of an exact value -> count histogram"""
+    rank = (sum(sizes.values()) + 1) // 2
+    seen = 0
+    for value in sorted(sizes):
+        seen += sizes[value]
+        if seen >= rank:
+            return value
+    return None
+
+
+def _combine_moments(a: Tuple[int, float, float], b: Tuple[int, float, float]) -> Tuple[int, float, float]:
+    """Chan et al. parallel combination of (count, mean, M2) summaries"""
+    count = a[0] + b[0]
+    if not count:
+        return 0, 0.0, 0.0
+    delta = b[1] - a[1]
+    return count, a[1] + delta * b[0] / count, a[2] + b[2] + delta * delta * a[0] * b[0] / count
+
+
+class CrawlerSessionizer:
+    """
+    One-pass crawl sessions per (crawler type, IP) and recrawl intervals per (crawler type, URL)
+
+    Hits are expected roughly in time order, as log files are. A hit that
+    lands inside a URL's already seen time span (out of order) doesn't
+    produce an interval.
+    """
+
+    def __init__(self, gap: float = SESSION_GAP, max_keys: int = SESSION_MAX_KEYS):
+        """
+        Args:
+            gap: Seconds of inactivity that end a session
+            max_keys: (crawler, IP) and (crawler, URL) keys tracked at most, each
+        """
+        self.gap = gap
+        self.max_keys = max_keys
+        # States are tuples of numbers, which the garbage collector stops tracking;
+        # with lists, collections scanning every key dominate the cost per hit
+        # (crawler_type, ip) -> (start, end, hits, current_start, current_end, current_hits)
+        # (current_* are None/0 while the first session is still the current one)
+        self.sessions: Dict[Tuple[str, str], Tuple] = {}
+        # (crawler_type, url) -> (first_seen, last_seen, intervals, mean, M2)
+        self.pages: Dict[Tuple[str, str], Tuple] = {}
+        self.totals: Dict[str, SessionTotals] = {}
+        # crawler_type -> every recrawl interval of its tracked pages
+        self.intervals: Dict[str, LogHistogram] = {}
+        self.untracked_session_hits = 0
+        self.untracked_page_hits = 0
+
+    def _totals(self, crawler_type: str) -> SessionTotals:
+        totals = self.totals.get(crawler_type)
+        if totals is None:
+            totals = self.totals[crawler_type] = SessionTotals()
+        return totals
+
+    def _intervals(self, crawler_type: str) -> LogHistogram:
+        intervals = self.intervals.get(crawler_type)
+        if intervals is None:
+            intervals = self.intervals[crawler_type] = LogHistogram()
+        return intervals
+
+    def add(self, crawler_type: str, ip: str, url: str, timestamp: datetime):
+        """Fold one AI crawler hit into sessions and recrawl intervals"""
+        seconds = timestamp.timestamp()
+
+        key = (crawler_type, ip)
+        state = self.sessions.get(key)
+        if state is None:
+            if len(self.sessions) < self.max_keys:
+                self.sessions[key] = (seconds, seconds, 1, None, None, 0)
+            else:
+                self.untracked_session_hits += 1
+        elif state[3] is None:
+            start, end, hits = state[0], state[1], state[2]
+            if seconds - end > self.gap:
+                self.sessions[key] = (start, end, hits, seconds, seconds, 1)
+            else:
+                self.sessions[key] = (start if start <= seconds else seconds, seconds if seconds > end else end,
+                                      hits + 1, None, None, 0)
+        else:
+            start, end, hits = state[3], state[4], state[5]
+            if seconds - end > self.gap:
+                self._totals(crawler_type).add_session(start, end, hits)
+                self.sessions[key] = (state[0], state[1], state[2], seconds, seconds, 1)
+            else:
+                self.sessions[key] = (state[0], state[1], state[2], start if start <= seconds else seconds,
+                                      seconds if seconds > end else end, hits + 1)
+
+        key = (crawler_type, url)
+        page = self.pages.get(key)
+        if page is None:
+            if len(self.pages) < self.max_keys:
+                self.pages[key] = (seconds, seconds, 0, 0.0, 0.0)
+            else:
+                self.untracked_page_hits += 1
+            return
+        first, last, count, mean, m2 = page
+        if seconds >= last:
+            interval = seconds - last
+            last = seconds
+        elif seconds <= first:
+            interval = first - seconds
+            first = seconds
+        else:
+            return
+        self._intervals(crawler_type).add(interval)
+        # Welford's running mean and variance
+        count += 1
+        delta = interval - mean
+        mean += delta / count
+        self.pages[key] = (first, last, count, mean, m2 + delta * (interval - mean))
+
+    def merge(self, other: 'CrawlerSessionizer') -> 'CrawlerSessionizer':
+        """Combine sessions from another chunk, file or run into this one"""
+        for crawler_type, totals in other.totals.items():
+            self._totals(crawler_type).merge(totals)
+        for crawler_type, intervals in other.intervals.items():
+            self._intervals(crawler_type).merge(intervals)
+        self.untracked_session_hits += other.untracked_session_hits
+        self.untracked_page_hits += other.untracked_page_hits
+
+        for key, state in other.sessions.items():
+            existing = self.sessions.get(key)
+            if existing is None:
+                if len(self.sessions) < self.max_keys:
+                    self.sessions[key] = state
+                else:
+                    self.untracked_session_hits += sum(span[2] for span in _spans(state))
+                continue
+            earlier, later = (existing, state) if existing[0] <= state[0] else (state, existing)
+            spans = _spans(earlier)
+            following = _spans(later)
+            last, first = spans[-1], following[0]
+            if first[0] - last[1] <= self.gap:
+                spans[-1] = (min(last[0], first[0]), max(last[1], first[1]), last[2] + first[2])
+                following = following[1:]
+            spans += following
+            # Sessions between a key's first and current one can no longer grow
+            for span in spans[1:-1]:
+                self._totals(key[0]).add_session(*span)
+            self.sessions[key] = spans[0] + (spans[-1] if len(spans) > 1 else (None, None, 0))
+
+        for key, page in other.pages.items():
+            existing = self.pages.get(key)
+            if existing is None:
+                if len(self.pages) < self.max_keys:
+                    self.pages[key] = page
+                else:
+                    self.untracked_page_hits += page[2] + 1
+                continue
+            earlier, later = (existing, page) if existing[0] <= page[0] else (page, existing)
+            moments = (earlier[2], earlier[3], earlier[4])
+            between = later[0] - earlier[1]
+            if between >= 0:
+                moments = _combine_moments(moments, (1, between, 0.0))
+                self._intervals(key[0]).add(between)
+            moments = _combine_moments(moments, (later[2], later[3], later[4]))
+            self.pages[key] = (earlier[0], max(earlier[1], later[1]), *moments)
+        return self
+
+    def report(self, limit: int = 20) -> Dict:
+        """
+        Sessions and recrawl intervals in the `crawl_sessions` result format
+
+        Open sessions are counted as they stand; the sessionizer can keep
+        taking hits afterwards.
+        """
+        totals = {crawler_type: crawler_totals.copy() for crawler_type, crawler_totals in self.totals.items()}
+        for (crawler_type, _), state in self.sessions.items():
+            crawler_totals = totals.get(crawler_type)
+            if crawler_totals is None:
+                crawler_totals = totals[crawler_type] = SessionTotals()
+            crawler_totals.add_session(state[0], state[1], state[2])
+            if state[3] is not None:
+                crawler_totals.add_session(state[3], state[4], state[5])
+        # crawler type -> [(mean interval, intervals)] of its recrawled pages
+        recrawled: Dict[str, List[Tuple[float, int]]] = {}
+        for (crawler_type, _), page in self.pages.items():
+            if page[2]:
+                recrawled.setdefault(crawler_type, []).append((page[3], page[2]))
+
+        crawlers = {}
+        for crawler_type, crawler_totals in totals.items():
+            median_session = crawler_totals.durations.quantile(0.5)
+            intervals = self.intervals.get(crawler_type)
+            median_recrawl = intervals.quantile(0.5) if intervals is not None else None
+            page_means = sorted(recrawled.get(crawler_type, []))
+            recrawls = sum(intervals for _, intervals in page_means)
+            crawlers[crawler_type] = {
+                'sessions': crawler_totals.sessions,
+                'avg_session_minutes': round(crawler_totals.session_seconds / max(1, crawler_totals.sessions) / 60, 1),
+                'median_session_minutes': round(median_session / 60, 1) if median_session is not None else None,
+                'avg_pages_per_session': round(crawler_totals.session_hits / max(1, crawler_totals.sessions), 1),
+                'median_pages_per_session': _median(crawler_totals.sizes),
+                'recrawled_pages': len(page_means),
+                'recrawls': recrawls,
+                'mean_recrawl_hours': (round(sum(mean * intervals for mean, intervals in page_means) / recrawls / 3600, 2)
+                                       if recrawls else None),
+                'median_recrawl_hours': round(median_recrawl / 3600, 2) if median_recrawl is not None else None
+            }
+
+        pages = []
+        recrawled = ((key, page) for key, page in self.pages.items() if page[2])
+        # Ties broken by key, so merged and single-pass partials report alike
+        for (crawler_type, url), page in heapq.nsmallest(limit, recrawled, key=lambda item: (-item[1][2], item[0])):
+            pages.append({
+                'url': url,
+                'crawler_type': crawler_type,
+                'recrawls': page[2],
+                'mean_interval_hours': round(page[3] / 3600, 2),
+                'stdev_interval_hours': round(math.sqrt(page[4] / (page[2] - 1)) / 3600, 2) if page[2] > 1 else 0.0,
+                'last_crawled': datetime.fromtimestamp(page[1], timezone.utc).isoformat()
+            })
+
+        return {
+            'session_gap_minutes': round(self.gap / 60, 1),
+            'crawlers': dict(sorted(crawlers.items(), key=lambda item: (-item[1]['sessions'], item[0]))),
+            'most_recrawled_pages': pages,
+            'untracked_hits': self.untracked_session_hits + self.untracked_page_hits
+        }
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, used to persist sessions between follow runs"""
+        return {
+            'gap': self.gap,
+            'max_keys': self.max_keys,
+            'sessions': [[crawler_type, ip, *state] for (crawler_type, ip), state in self.sessions.items()],
+            'pages': [[crawler_type, url, *page] for (crawler_type, url), page in self.pages.items()],
+            'totals': {crawler_type: totals.to_dict() for crawler_type, totals in self.totals.items()},
+            'intervals': {crawler_type: intervals.to_dict() for crawler_type, intervals in self.intervals.items()},
+            'untracked_session_hits': self.untracked_session_hits,
+            'untracked_page_hits': self.untracked_page_hits
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CrawlerSessionizer':
+        """Rebuild a sessionizer saved with to_dict()"""
+        sessionizer = cls(data['gap'], data['max_keys'])
+        sessionizer.sessions = {(row[0], row[1]): tuple(row[2:]) for row in data['sessions']}
+        sessionizer.pages = {(row[0], row[1]): tuple(row[2:]) for row in data['pages']}
+        sessionizer.totals = {crawler_type: SessionTotals.from_dict(totals)
+                              for crawler_type, totals in data['totals'].items()}
+        # Sessions saved before interval histograms were kept report no median until refilled
+        sessionizer.intervals = {crawler_type: LogHistogram.from_dict(intervals)
+                                 for crawler_type, intervals in data.get('intervals', {}).items()}
+        sessionizer.untracked_session_hits = data['untracked_session_hits']
+        sessionizer.untracked_page_hits = data['untracked_page_hits']
+        return sessionizer
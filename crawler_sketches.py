@@ -0,0 +1,223 @@
+"""
+Crawler Sketches - Fixed-Memory Summaries for Crawler Analytics
+===============================================================
+
+Sites with faceted navigation can produce millions of distinct URLs, so
+exact per-URL counters grow without bound. These sketches keep memory fixed
+regardless of URL cardinality and report how far off their figures can be.
+
+🔧 HOW WE DO THIS:
+• Space-Saving keeps the top-K pages with a per-page overcount bound
+• HyperLogLog estimates distinct pages and IPs in 2^precision bytes
+• Both merge, so chunks parsed by worker processes combine exactly as
+  one sequential pass would
+"""
+
+import hashlib
+import heapq
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class SpaceSavingCounter:
+    """
+    Space-Saving heavy hitters summary (Metwally et al.)
+
+    Monitors at most `capacity` keys. When a new key arrives and the summary
+    is full, the key with the smallest count is replaced and the newcomer
+    inherits that count as its error, so for every monitored key
+    `count - error <= true count <= count`. Any key seen more than
+    N / capacity times is guaranteed to be monitored.
+
+    Each monitored key can carry a payload (e.g. PartialStats), which covers
+    the requests seen since the key entered the summary.
+    """
+
+    def __init__(self, capacity: int, payload_factory: Optional[Callable] = None):
+        """
+        Args:
+            capacity: Maximum number of keys to monitor
+            payload_factory: Builds the payload attached to a newly monitored key
+        """
+        self.capacity = max(1, capacity)
+        self.payload_factory = payload_factory
+        self.total = 0
+        # key -> [count, error, payload]
+        self._entries: Dict[str, List] = {}
+        # One (count, key) entry per monitored key; counts may lag behind (lazy)
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: str, count: int = 1):
+        """Count occurrences of a key and return its payload"""
+        self.total += count
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] += count
+            return entry[2]
+
+        payload = self.payload_factory() if self.payload_factory else None
+        if len(self._entries) < self.capacity:
+            self._entries[key] = [count, 0, payload]
+            heapq.heappush(self._heap, (count, key))
+            return payload
+
+        min_count, min_key = self._pop_min()
+        del self._entries[min_key]
+        self._entries[key] = [min_count + count, min_count, payload]
+        heapq.heappush(self._heap, (min_count + count, key))
+        return payload
+
+    def _pop_min(self) -> Tuple[int, str]:
+        """Remove and return the monitored key with the smallest count"""
+        while True:
+            count, key = self._heap[0]
+            actual = self._entries[key][0]
+            if actual == count:
+                return heapq.heappop(self._heap)
+            heapq.heapreplace(self._heap, (actual, key))
+
+    def min_count(self) -> int:
+        """Smallest monitored count, the overcount bound for unmonitored keys once full"""
+        if len(self._entries) < self.capacity or not self._entries:
+            return 0
+        return min(entry[0] for entry in self._entries.values())
+
+    def items(self) -> Iterator[Tuple[str, int, int, object]]:
+        """(key, count, error, payload) for every monitored key"""
+        for key, (count, error, payload) in self._entries.items():
+            yield key, count, error, payload
+
+    def top(self, limit: int) -> List[Tuple[str, int, int, object]]:
+        """The `limit` monitored keys with the highest counts"""
+        return sorted(self.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def merge(self, other: 'SpaceSavingCounter') -> 'SpaceSavingCounter':
+        """
+        Combine with another summary (Agarwal et al. mergeable summaries)
+
+        Keys missing from a full summary are charged that summary's minimum
+        count as both count and error, so the count stays an upper bound.
+        """
+        self_min, other_min = self.min_count(), other.min_count()
+        combined = {}
+        for key, (count, error, payload) in self._entries.items():
+            combined[key] = [count + other_min, error + other_min, payload]
+        for key, (count, error, payload) in other._entries.items():
+            entry = combined.get(key)
+            if entry is None:
+                combined[key] = [count + self_min, error + self_min, payload]
+                continue
+            # Undo the charge for keys both summaries monitor
+            entry[0] += count - other_min
+            entry[1] += error - other_min
+            if entry[2] is None:
+                entry[2] = payload
+            elif payload is not None:
+                entry[2].merge(payload)
+
+        if len(combined) > self.capacity:
+            kept = sorted(combined.items(), key=lambda item: item[1][0], reverse=True)[:self.capacity]
+            combined = dict(kept)
+        self._entries = combined
+        self._heap = [(entry[0], key) for key, entry in combined.items()]
+        heapq.heapify(self._heap)
+        self.total += other.total
+        return self
+
+    def to_dict(self, payload_to_dict: Optional[Callable] = None) -> Dict:
+        """JSON-serializable form"""
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'entries': [
+                [key, count, error, payload_to_dict(payload) if payload_to_dict and payload is not None else None]
+                for key, count, error, payload in self.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, payload_factory: Optional[Callable] = None,
+                  payload_from_dict: Optional[Callable] = None) -> 'SpaceSavingCounter':
+        """Rebuild a summary saved with to_dict()"""
+        counter = cls(data['capacity'], payload_factory)
+        counter.total = data['total']
+        for key, count, error, payload in data['entries']:
+            if payload is not None and payload_from_dict:
+                payload = payload_from_dict(payload)
+            counter._entries[key] = [count, error, payload]
+        counter._heap = [(entry[0], key) for key, entry in counter._entries.items()]
+        heapq.heapify(counter._heap)
+        return counter
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter (Flajolet et al.) over 64-bit hashes
+
+    Uses 2^precision one-byte registers; the relative standard error is
+    1.04 / sqrt(2^precision), about 1.6% at the default precision of 12.
+    Values are hashed with BLAKE2b rather than hash() so sketches built in
+    different processes can be merged.
+    """
+
+    def __init__(self, precision: int = 12):
+        """
+        Args:
+            precision: Number of index bits (4-16); memory is 2^precision bytes
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 16, got {precision}")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        """Add a value to the set"""
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of estimates"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def estimate(self) -> int:
+        """Estimated number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def error_bound(self, estimate: Optional[int] = None) -> int:
+        """Absolute error at ~95% confidence (two standard errors)"""
+        if estimate is None:
+            estimate = self.estimate()
+        return math.ceil(2 * self.relative_error * estimate)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Union with another sketch of the same precision"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form"""
+        return {'precision': self.precision, 'registers': self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HyperLogLog':
+        """Rebuild a sketch saved with to_dict()"""
+        sketch = cls(data['precision'])
+        sketch.registers = bytearray.fromhex(data['registers'])
+        return sketch
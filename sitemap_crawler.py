@@ -0,0 +1,221 @@
+"""
+Sitemap Crawler - Concurrent Async Site Crawling
+================================================
+
+Fetches a site's pages concurrently for AISitemapGenerator, so a crawl of
+thousands of pages spends its time with many requests in flight instead of
+waiting on one response at a time.
+
+🔧 HOW WE DO THIS:
+• One pooled aiohttp session for the whole crawl (keep-alive connections,
+  cached DNS) instead of a new connection per page
+• A global concurrency limit (worker tasks and the connector's `limit`) and a
+  per-host limit (the connector's `limit_per_host`)
+• Workers share a URLFrontier (most important URLs first, canonical, each
+  once); a caller-supplied parser turns each response into the same page
+  record and link list as the sequential crawl
+• Never have more fetches in flight than the budget has pages left, so
+  `max_pages` is spent on the frontier's best URLs and nothing is fetched
+  only to be dropped
+• Optionally split fetching from parsing: fetchers put raw bodies on a
+  bounded queue and parser tasks hand them to a process pool, so HTML parsing
+  uses every core while the event loop keeps fetches saturated; a full queue
+  makes fetchers wait (backpressure), so memory stays bounded
+• With a SitemapHTTPCache, fetches are conditional: a 304 reuses the cached
+  record and links straight away, skipping the parse queue
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+import aiohttp
+from multidict import CIMultiDict
+
+from sitemap_frontier import URLFrontier, canonicalize_url
+from sitemap_http_cache import CachedPage, SitemapHTTPCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 8
+DEFAULT_TIMEOUT = 10
+
+
+@dataclass
+class FetchedPage:
+    """A fetched page, with the `headers` and `text` the extractors read from a requests.Response"""
+    url: str  # As served, after redirects: relative links resolve against it
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    encoding: Optional[str] = None  # Charset from Content-Type, if any
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+# Turns a fetched page into (page record or None to skip it, absolute URLs to crawl next);
+# must be picklable (a module-level function or a partial of one) to run in a process pool
+PageParser = Callable[[FetchedPage], Tuple[Optional[Dict], List[str]]]
+
+
+class AsyncSiteCrawler:
+    """Priority-ordered crawler with bounded concurrency over one pooled aiohttp session"""
+
+    def __init__(self, parse_page: PageParser, headers: Optional[Dict[str, str]] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, per_host: int = DEFAULT_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, on_page: Optional[Callable[[Dict], None]] = None,
+                 parse_workers: int = 0, parse_queue_size: Optional[int] = None,
+                 cache: Optional[SitemapHTTPCache] = None):
+        """
+        Args:
+            parse_page: Builds the page record and outgoing links of a fetched page
+            headers: Request headers sent with every fetch
+            concurrency: Maximum requests in flight overall
+            per_host: Maximum requests in flight to any one host
+            timeout: Seconds allowed per request
+            on_page: Called with each record as it is added (progress reporting)
+            parse_workers: Processes parsing pages; 0 parses on the event loop
+            parse_queue_size: Fetched pages waiting for a parser before fetchers
+                wait too (default: twice parse_workers)
+            cache: Revalidate cached pages instead of downloading them, and store
+                freshly parsed ones (the caller closes it)
+        """
+        self.parse_page = parse_page
+        self.headers = headers or {}
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, min(per_host, self.concurrency))
+        self.timeout = timeout
+        self.on_page = on_page
+        self.parse_workers = max(0, parse_workers)
+        self.parse_queue_size = parse_queue_size or 2 * max(1, self.parse_workers)
+        self.cache = cache
+
+    async def crawl(self, start_url: str, max_pages: int = 100,
+                    frontier: Optional[URLFrontier] = None) -> List[Dict]:
+        """
+        Crawl from `start_url` until `max_pages` records exist or no links are left
+
+        Args:
+            start_url: First page to fetch
+            max_pages: Page record budget
+            frontier: Queue deciding the fetch order (default: URLFrontier())
+
+        Records come back in completion order, so which pages fill the last
+        slots of the budget can differ slightly from the sequential crawl.
+        """
+        pages: List[Dict] = []
+        frontier = frontier if frontier is not None else URLFrontier()
+        frontier.add(start_url)
+        # URLs popped from the frontier and not yet parsed (fetching, queued or parsing)
+        in_flight = 0
+        changed = asyncio.Condition()
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=self.parse_queue_size)
+        executor = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers else None
+        loop = asyncio.get_running_loop()
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async def finished():
+            nonlocal in_flight
+            async with changed:
+                in_flight -= 1
+                changed.notify_all()
+
+        def add_page(record: Optional[Dict], links: List[str], depth: int):
+            if record is not None:
+                pages.append(record)
+                if self.on_page:
+                    self.on_page(record)
+            for link in links:
+                frontier.add(link, depth + 1)
+
+        async def fetcher(session: aiohttp.ClientSession):
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    # Wait while every remaining page of the budget is already in flight,
+                    # or while the frontier is empty but pages in flight may add links
+                    await changed.wait_for(lambda: in_flight == 0 or (
+                        frontier and len(pages) + in_flight < max_pages))
+                    if not frontier or len(pages) + in_flight >= max_pages:
+                        return
+                    url, depth = frontier.pop()
+                    in_flight += 1
+                cached = self.cache.get(url) if self.cache is not None else None
+                try:
+                    fetched = await self._fetch(session, url, cached)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error crawling {url}: {str(e)}")
+                    await finished()
+                    continue
+                if fetched.status == 304:
+                    # Unchanged since the cached copy: nothing to parse
+                    self.cache.revalidated(url, fetched.headers)
+                    add_page(cached.record, cached.links, depth)
+                    await finished()
+                    continue
+                if (canonicalize_url(fetched.url) != canonicalize_url(url)
+                        and not frontier.mark_seen(fetched.url)):
+                    # Redirected to a page that is already crawled or queued
+                    await finished()
+                    continue
+                # Waits while the parsers are behind
+                await parse_queue.put((fetched, depth, url))
+
+        async def parser():
+            while True:
+                item = await parse_queue.get()
+                if item is None:
+                    return
+                fetched, depth, url = item
+                try:
+                    if executor is not None:
+                        record, links = await loop.run_in_executor(executor, self.parse_page, fetched)
+                    else:
+                        record, links = self.parse_page(fetched)
+                    add_page(record, links, depth)
+                    if self.cache is not None and record is not None:
+                        self.cache.store(url, fetched.headers, record, links)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error crawling {fetched.url}: {str(e)}")
+                finally:
+                    await finished()
+
+        parsers = [asyncio.create_task(parser()) for _ in range(max(1, self.parse_workers))]
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers) as session:
+                await asyncio.gather(*(fetcher(session) for _ in range(self.concurrency)))
+            # Every fetched page is parsed by now (nothing is in flight)
+            for _ in parsers:
+                await parse_queue.put(None)
+            await asyncio.gather(*parsers)
+        finally:
+            for task in parsers:
+                task.cancel()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        return pages
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str,
+                     cached: Optional[CachedPage] = None) -> FetchedPage:
+        """GET a page (conditionally when cached); HTTP errors raise like requests' raise_for_status()"""
+        async with session.get(url, headers=cached.conditional_headers() if cached else None) as response:
+            response.raise_for_status()
+            if response.status == 304 and cached is None:
+                raise aiohttp.ClientResponseError(response.request_info, response.history, status=304,
+                                                  message='Not Modified without a cached copy')
+            body = await response.read()
+            # A plain multidict (still case-insensitive) pickles into parser processes
+            return FetchedPage(url=str(response.url), status=response.status, headers=CIMultiDict(response.headers), body=body,
+                               encoding=response.charset)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Sitemap Extractor - Single-Pass HTML Page Features
+==================================================
+
+Pulls everything AISitemapGenerator needs from a page (title, meta
+description, canonical link, schema.org and modified-time markup, JSON-LD,
+headings, links and main-content text) in one pass over the HTML, instead of
+a dozen BeautifulSoup searches over the parsed tree.
+
+🔧 HOW WE DO THIS:
+• Stream the page through lxml's HTML parser with a parser target: every
+  start tag, end tag and text node is seen once and no tree is built
+• Track the first element matching each main-content rule (article, main,
+  #content, .content, #main, .main, then body) and, per text node, link,
+  heading and meta tag, which of those candidates contain it and in which it
+  sits inside script/style/nav/header/footer/aside, as two small bitmasks
+• Pick the content container after the pass and keep exactly what
+  BeautifulSoup keeps after decomposing those blocks, so the page records are
+  the same as before
+• Fall back to the original BeautifulSoup (html.parser) extraction when lxml
+  is not installed (the only difference: lxml gives a page without a <body>
+  tag an implied one, so its text counts as content)
+
+Usage:
+    python sitemap_extractor.py --corpus saved_pages/ --repeat 3
+"""
+
+import argparse
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXTRACTOR_BACKENDS = ('lxml', 'soup')
+
+# Blocks dropped from the main content container, in BeautifulSoup's find_all order
+REMOVED_TAGS = frozenset(['script', 'style', 'nav', 'header', 'footer', 'aside'])
+HEADING_TAGS = {f'h{level}': level for level in range(1, 7)}
+
+# Main-content candidates in order of preference (bit i of the masks is rule i)
+ARTICLE, MAIN, ID_CONTENT, CLASS_CONTENT, ID_MAIN, CLASS_MAIN, BODY = range(7)
+
+_WHITESPACE = re.compile(r'\s+')
+_SCHEMA_ORG = re.compile(r'schema.org')
+
+
+@dataclass
+class PageFeatures:
+    """What a page contributes to its sitemap record"""
+    title: str = ""
+    description: str = ""
+    content: str = ""
+    canonical: Optional[str] = None  # href of the first rel=canonical link
+    has_schema_org: bool = False  # Any schema.org itemtype
+    modified_time: Optional[str] = None  # article:modified_time meta content
+    headings: Dict[str, List[str]] = field(default_factory=dict)
+    links: List[str] = field(default_factory=list)  # Raw hrefs in document order
+    json_ld: List = field(default_factory=list)  # Parsed JSON-LD blocks
+
+
+def _class_tokens(attrib) -> List[str]:
+    return attrib.get('class', '').split()
+
+
+class _FeatureTarget:
+    """lxml parser target collecting page features in one pass"""
+
+    def __init__(self):
+        self.candidates_found = 0  # Bits of rules whose first element was seen
+        # Per open element: masks to restore on its end tag
+        self.stack: List[Tuple[str, int, int]] = []
+        self.contain = 0  # Candidates containing the current position
+        self.removed = 0  # Candidates in which the current position is in a removed block
+        self.pending: List[str] = []
+
+        self.title_parts: Optional[List[str]] = None
+        self.title_depth = 0  # 1 inside the first title element
+        self.description: Optional[str] = None
+        self.texts: List[Tuple[str, int, int]] = []
+        self.headings: List[Tuple[int, List[Tuple[str, int]], int]] = []
+        self.open_headings: List[List[Tuple[str, int]]] = []
+        self.links: List[Tuple[str, int]] = []
+        self.canonicals: List[Tuple[Optional[str], int]] = []
+        self.itemtypes: List[int] = []
+        self.modified_metas: List[Tuple[Optional[str], int]] = []
+        self.json_ld: List[str] = []
+        self.in_json_ld = False
+
+    def _candidate_bits(self, tag: str, attrib) -> int:
+        bits = 0
+        if tag == 'article':
+            bits |= 1 << ARTICLE
+        elif tag == 'main':
+            bits |= 1 << MAIN
+        elif tag == 'body':
+            bits |= 1 << BODY
+        element_id = attrib.get('id')
+        if element_id == 'content':
+            bits |= 1 << ID_CONTENT
+        elif element_id == 'main':
+            bits |= 1 << ID_MAIN
+        if 'class' in attrib:
+            classes = _class_tokens(attrib)
+            if 'content' in classes:
+                bits |= 1 << CLASS_CONTENT
+            if 'main' in classes:
+                bits |= 1 << CLASS_MAIN
+        # Only the first element of each rule is a candidate
+        bits &= ~self.candidates_found
+        self.candidates_found |= bits
+        return bits
+
+    def _flush(self):
+        """Record the text node that ends here (lxml splits text at entities)"""
+        if not self.pending:
+            return
+        text = ''.join(self.pending)
+        self.pending = []
+        if self.in_json_ld:
+            self.json_ld.append(text)
+        if self.title_depth:
+            self.title_parts.append(text)
+        if self.contain:
+            self.texts.append((text, self.contain, self.removed))
+        for parts in self.open_headings:
+            parts.append((text, self.removed))
+
+    def start(self, tag, attrib):
+        self._flush()
+        if not isinstance(tag, str):
+            return
+        self.stack.append((tag, self.contain, self.removed))
+        # A removed block only counts inside candidates that strictly contain it
+        if tag in REMOVED_TAGS:
+            self.removed |= self.contain
+        self.contain |= self._candidate_bits(tag, attrib)
+
+        if tag == 'title':
+            # Like soup.title: the first title element only
+            if self.title_parts is None:
+                self.title_parts = []
+                self.title_depth = 1
+        elif tag == 'meta':
+            name = attrib.get('name')
+            if name == 'description' and self.description is None:
+                self.description = attrib.get('content', '')
+            if attrib.get('property') == 'article:modified_time':
+                self.modified_metas.append((attrib.get('content'), self.removed))
+        elif tag == 'link':
+            rel = attrib.get('rel')
+            if rel is not None and (rel == 'canonical' or 'canonical' in rel.split()):
+                self.canonicals.append((attrib.get('href'), self.removed))
+        elif tag == 'a':
+            if 'href' in attrib:
+                self.links.append((attrib['href'], self.removed))
+        elif tag in HEADING_TAGS:
+            parts: List[Tuple[str, int]] = []
+            self.headings.append((HEADING_TAGS[tag], parts, self.removed))
+            self.open_headings.append(parts)
+        elif tag == 'script':
+            self.in_json_ld = attrib.get('type', '').strip().lower() == 'application/ld+json'
+
+        itemtype = attrib.get('itemtype')
+        if itemtype is not None and _SCHEMA_ORG.search(itemtype):
+            self.itemtypes.append(self.removed)
+
+    def end(self, tag):
+        self._flush()
+        if not isinstance(tag, str) or not self.stack:
+            return
+        # The parser closes elements in order, including implied end tags
+        _, self.contain, self.removed = self.stack.pop()
+        if tag == 'title':
+            self.title_depth = 0
+        elif tag in HEADING_TAGS and self.open_headings:
+            self.open_headings.pop()
+        elif tag == 'script':
+            self.in_json_ld = False
+
+    def data(self, text):
+        self.pending.append(text)
+
+    def comment(self, text):
+        # Comments split text nodes but are not text
+        self._flush()
+
+    def close(self) -> PageFeatures:
+        self._flush()
+        chosen = next((rule for rule in range(7) if self.candidates_found & (1 << rule)), None)
+        if chosen is None:
+            # No container at all: nothing is removed and there is no content
+            def kept(removed):
+                return True
+            content = ""
+        else:
+            bit = 1 << chosen
+
+            def kept(removed):
+                return not removed & bit
+            content = ' '.join(text for text, contain, removed in self.texts if contain & bit and kept(removed))
+            content = _WHITESPACE.sub(' ', content).strip()
+
+        headings: Dict[str, List[str]] = {}
+        for level, parts, removed in sorted(
+                (heading for heading in self.headings if kept(heading[2])), key=lambda heading: heading[0]):
+            text = ''.join(part.strip() for part, part_removed in parts if kept(part_removed))
+            headings.setdefault(f'h{level}', []).append(text)
+
+        json_ld = []
+        for block in self.json_ld:
+            try:
+                json_ld.append(json.loads(block))
+            except ValueError:
+                continue
+
+        return PageFeatures(
+            title=''.join(self.title_parts).strip() if self.title_parts is not None else "",
+            description=self.description or "",
+            content=content,
+            canonical=next((href for href, removed in self.canonicals if kept(removed)), None),
+            has_schema_org=any(kept(removed) for removed in self.itemtypes),
+            modified_time=next((value for value, removed in self.modified_metas if kept(removed)), None),
+            headings=headings,
+            links=[href for href, removed in self.links if kept(removed)],
+            json_ld=json_ld
+        )
+
+
+def _extract_with_lxml(html: str) -> PageFeatures:
+    parser = etree.HTMLParser(target=_FeatureTarget())
+    parser.feed(html or ' ')
+    return parser.close()
+
+
+def _extract_with_soup(html: str) -> PageFeatures:
+    """The original BeautifulSoup searches, in the order the generator ran them"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    features = PageFeatures()
+    features.title = soup.title.text.strip() if soup.title else ""
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and 'content' in meta_desc.attrs:
+        features.description = meta_desc['content']
+    for script in soup.find_all('script', type=lambda value: value and value.strip().lower() == 'application/ld+json'):
+        try:
+            features.json_ld.append(json.loads(script.string or ''))
+        except ValueError:
+            continue
+
+    # Try to find content in common content containers
+    content_containers = [
+        soup.find('article'),
+        soup.find('main'),
+        soup.find(id='content'),
+        soup.find(class_='content'),
+        soup.find(id='main'),
+        soup.find(class_='main'),
+    ]
+    # Use the first valid container found
+    content_elem = next((elem for elem in content_containers if elem is not None), soup.body)
+    if content_elem:
+        # Remove script, style, and nav elements (also from everything searched below)
+        for elem in content_elem.find_all(list(REMOVED_TAGS)):
+            elem.decompose()
+        features.content = _WHITESPACE.sub(' ', content_elem.get_text(separator=' ', strip=True)).strip()
+
+    canonical = soup.find('link', rel='canonical')
+    features.canonical = canonical.get('href') if canonical else None
+    features.has_schema_org = soup.find(attrs={"itemtype": _SCHEMA_ORG}) is not None
+    modified_meta = soup.find('meta', attrs={'property': 'article:modified_time'})
+    features.modified_time = modified_meta.get('content') if modified_meta else None
+    for level in range(1, 7):
+        h_tags = soup.find_all(f'h{level}')
+        if h_tags:
+            features.headings[f'h{level}'] = [tag.get_text(strip=True) for tag in h_tags]
+    features.links = [link['href'] for link in soup.find_all('a', href=True)]
+    return features
+
+
+def extract_page_features(html: str, backend: Optional[str] = None) -> PageFeatures:
+    """
+    Features of an HTML page in one pass
+
+    Args:
+        html: Decoded page
+        backend: 'lxml' (single pass) or 'soup' (BeautifulSoup searches);
+            defaults to lxml when it is installed
+    """
+    backend = backend or ('lxml' if LXML_AVAILABLE else 'soup')
+    if backend not in EXTRACTOR_BACKENDS:
+        raise ValueError(f"Unknown extractor backend: {backend} (expected one of {', '.join(EXTRACTOR_BACKENDS)})")
+    if backend == 'lxml':
+        return _extract_with_lxml(html)
+    return _extract_with_soup(html)
+
+
+def benchmark_extractors(corpus_dir: str, repeat: int = 3) -> Dict:
+    """Pages/sec of each available backend over saved pages (*.html, *.htm), and whether they agree"""
+    pages = [path.read_text(encoding='utf-8', errors='replace')
+             for path in sorted(Path(corpus_dir).rglob('*')) if path.suffix.lower() in ('.html', '.htm')]
+    if not pages:
+        raise ValueError(f"No .html files under {corpus_dir}")
+
+    results = {"pages": len(pages), "megabytes": round(sum(len(page) for page in pages) / 1e6, 1)}
+    outputs = {}
+    backends = EXTRACTOR_BACKENDS if LXML_AVAILABLE else ('soup',)
+    for backend in backends:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outputs[backend] = [extract_page_features(page, backend) for page in pages]
+            best = min(best, time.perf_counter() - started)
+        results[f"{backend}_pages_per_sec"] = round(len(pages) / max(best, 1e-9), 1)
+    if len(outputs) == len(EXTRACTOR_BACKENDS):
+        results["speedup"] = round(results["lxml_pages_per_sec"] / results["soup_pages_per_sec"], 1)
+        results["identical_pages"] = sum(lxml == soup for lxml, soup in zip(outputs['lxml'], outputs['soup']))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark page feature extraction on saved pages')
+    parser.add_argument('--corpus', type=str, required=True, help='Directory of saved .html pages')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per backend (best is reported)')
+    args = parser.parse_args()
+
+    for key, value in benchmark_extractors(args.corpus, args.repeat).items():
+        print(f"{key:<24} {value:>12}")
@@ -0,0 +1,176 @@
+"""
+Sitemap Frontier - Prioritized, Deduplicated Crawl Queue
+========================================================
+
+Decides which URL a site crawl fetches next, so a limited `max_pages` budget
+is spent on the pages AISitemapGenerator would rank highest, and a URL is
+never fetched twice under a different spelling.
+
+🔧 HOW WE DO THIS:
+• Key every URL by its canonical form: lowercase scheme and host, drop
+  default ports, fragments and trailing slashes, uppercase percent-escapes
+  and sort query parameters (paths stay case-sensitive, as servers treat them)
+• Keys only decide "seen before?": the URL is fetched as it was discovered
+  (minus its fragment), since `/docs/` and `/docs` resolve relative links
+  differently and servers may treat them as different pages
+• Keep queued URLs in a binary heap ordered by the URL-structure part of
+  _calculate_page_importance, then link depth, then discovery order:
+  O(log n) per push and pop instead of O(n) list.pop(0)
+• Remember every queued URL in a seen-set: a plain set by default, or a Bloom
+  filter (fixed memory, tunable false-positive rate) for million-URL crawls
+"""
+
+import hashlib
+import heapq
+import math
+import re
+from itertools import count
+from typing import Callable, Optional, Tuple
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# False-positive rate of Bloom filter seen-sets: that share of new URLs is skipped as already seen
+BLOOM_ERROR_RATE = 0.001
+
+_PERCENT_ESCAPE = re.compile(r'%[0-9a-fA-F]{2}')
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    One spelling per page: `HTTPS://Example.com:443/Docs/?b=2&a=1#top` becomes
+    `https://example.com/Docs?a=1&b=2`
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        # Not a valid port: leave the URL as written
+        return url
+    host = parts.hostname or ''
+    netloc = f'[{host}]' if ':' in host else host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{port}'
+    if parts.username:
+        userinfo = parts.username + (f':{parts.password}' if parts.password else '')
+        netloc = f'{userinfo}@{netloc}'
+
+    path = parts.path or '/'
+    if '%' in path:
+        path = _PERCENT_ESCAPE.sub(lambda escape: escape.group(0).upper(), path)
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+    query = '&'.join(sorted(param for param in parts.query.split('&') if param)) if parts.query else ''
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def path_importance(path: str) -> float:
+    """Importance of a page from its URL path alone: the home page, then shallower pages"""
+    path_parts = path.strip('/').split('/')
+    if path in ('', '/'):
+        return 1.0
+    # Top-level pages get high importance
+    if len(path_parts) == 1:
+        return 0.8
+    # Second-level pages
+    if len(path_parts) == 2:
+        return 0.6
+    # Deep pages get lower importance
+    return max(0.2, 0.8 - (len(path_parts) - 2) * 0.1)
+
+
+def url_priority(url: str) -> float:
+    """Default frontier priority: importance of the URL's path"""
+    return path_importance(urlsplit(url).path)
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, `error_rate` false positives at capacity"""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        """
+        Args:
+            capacity: Items the filter is sized for; more raise the false-positive rate
+            error_rate: False-positive probability once `capacity` items were added
+        """
+        capacity = max(1, capacity)
+        self.bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Kirsch-Mitzenmacher: k positions from two halves of one 128-bit hash
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, item: str) -> bool:
+        """Add an item; False when it was (probably) already there"""
+        bits = self.bits
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class URLFrontier:
+    """Priority queue of URLs to crawl, each canonical URL queued at most once"""
+
+    def __init__(self, priority: Callable[[str], float] = url_priority, bloom_capacity: Optional[int] = None,
+                 bloom_error_rate: float = BLOOM_ERROR_RATE):
+        """
+        Args:
+            priority: Score of a canonical URL; higher is fetched first
+            bloom_capacity: Remember queued URLs in a Bloom filter sized for this
+                many URLs instead of an exact set
+            bloom_error_rate: Bloom filter false-positive rate at capacity
+        """
+        self.priority = priority
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self.seen = set()
+        self.heap = []
+        self.sequence = count()
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """Queue a URL found `depth` links from the start; False when it was already queued"""
+        url = urldefrag(url)[0]
+        key = canonicalize_url(url)
+        if not self._first_sighting(key):
+            return False
+        heapq.heappush(self.heap, (-self.priority(key), depth, next(self.sequence), url))
+        return True
+
+    def mark_seen(self, url: str) -> bool:
+        """Remember a URL without queuing it (a redirect target); False when it was already seen"""
+        return self._first_sighting(canonicalize_url(url))
+
+    def _first_sighting(self, key: str) -> bool:
+        if self.bloom is not None:
+            # One hashing pass both checks and records the URL
+            return self.bloom.add(key)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def pop(self) -> Tuple[str, int]:
+        """Highest-priority URL as discovered and its link depth (shallower, then earlier found, on ties)"""
+        _, depth, _, url = heapq.heappop(self.heap)
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self.heap)
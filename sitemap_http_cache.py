@@ -0,0 +1,175 @@
+"""
+Sitemap HTTP Cache - Conditional Requests for Recrawls
+======================================================
+
+Remembers each crawled page's validators and extracted record, so a daily
+sitemap refresh asks the server "changed since last time?" instead of
+downloading and parsing every page again. Unchanged pages answer 304 Not
+Modified with no body, and the crawl reuses what it built last time.
+
+🔧 HOW WE DO THIS:
+• One SQLite table keyed by canonical URL, holding the page's ETag and
+  Last-Modified headers, its page record and its outgoing links (JSON)
+• Recrawls send `If-None-Match` / `If-Modified-Since` from the stored
+  validators; a 304 reuses the record and links without parsing
+• Writes are buffered and flushed in one short transaction when the crawl
+  ends (or every COMMIT_EVERY pages), so pages aren't fsynced one by one and
+  concurrent crawls sharing the file don't wait on each other's locks
+
+Stored links are the ones the crawl kept after its exclude patterns, so
+change the patterns together with a fresh cache file.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional
+
+from sitemap_frontier import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Buffered page writes that trigger a flush during a long crawl
+COMMIT_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    record TEXT NOT NULL,
+    links TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    checked_at INTEGER NOT NULL
+);
+"""
+
+UPSERT_PAGE = """
+INSERT INTO http_cache (url, etag, last_modified, record, links, fetched_at, checked_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    etag = excluded.etag,
+    last_modified = excluded.last_modified,
+    record = excluded.record,
+    links = excluded.links,
+    fetched_at = excluded.fetched_at,
+    checked_at = excluded.checked_at
+"""
+
+# A 304 may carry fresh validators; keep the stored ones when it doesn't
+TOUCH_PAGE = """
+UPDATE http_cache SET
+    etag = COALESCE(?, etag),
+    last_modified = COALESCE(?, last_modified),
+    checked_at = ?
+WHERE url = ?
+"""
+
+
+@dataclass
+class CachedPage:
+    """What a crawl kept of a page: its validators, page record and outgoing links"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    record: Dict
+    links: List[str]
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers asking the server for the page only if it changed"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class SitemapHTTPCache:
+    """
+    SQLite-backed cache of crawled pages for conditional recrawls
+
+    Use as a context manager (or call close()) so the last batch of writes
+    is committed.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite database file (created if missing)
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self.pending_stores: List[tuple] = []
+        self.pending_touches: List[tuple] = []
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """The cached page for a URL (any spelling), or None"""
+        row = self.conn.execute(
+            "SELECT etag, last_modified, record, links FROM http_cache WHERE url = ?", (canonicalize_url(url),)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, record, links = row
+        return CachedPage(etag=etag, last_modified=last_modified, record=json.loads(record), links=json.loads(links))
+
+    def store(self, url: str, headers: Mapping[str, str], record: Dict, links: List[str]):
+        """
+        Remember a freshly parsed page (200 response)
+
+        Pages served without an ETag or Last-Modified can't be revalidated and
+        are not stored.
+        """
+        self.misses += 1
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        now = int(time.time())
+        self.pending_stores.append((canonicalize_url(url), etag, last_modified, json.dumps(record),
+                                    json.dumps(links), now, now))
+        self._written()
+
+    def revalidated(self, url: str, headers: Mapping[str, str]):
+        """Record a 304 for a cached page, taking any validators it sent"""
+        self.hits += 1
+        self.pending_touches.append((headers.get('ETag'), headers.get('Last-Modified'), int(time.time()),
+                                     canonicalize_url(url)))
+        self._written()
+
+    def _written(self):
+        if len(self.pending_stores) + len(self.pending_touches) >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        """Write buffered pages in one transaction"""
+        if not self.pending_stores and not self.pending_touches:
+            return
+        with self.conn:
+            self.conn.executemany(UPSERT_PAGE, self.pending_stores)
+            self.conn.executemany(TOUCH_PAGE, self.pending_touches)
+        self.pending_stores, self.pending_touches = [], []
+
+    def close(self):
+        """Commit pending writes and close the database"""
+        self.commit()
+        self.conn.close()
+        if self.hits or self.misses:
+            logger.info(f"🗄️ HTTP cache: {self.hits} pages unchanged (304), {self.misses} downloaded "
+                        f"({self.db_path})")
+
+    def __len__(self) -> int:
+        """Cached pages, not counting unflushed writes"""
+        return self.conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+    def __enter__(self) -> 'SitemapHTTPCache':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,858 @@
+#!/usr/bin/env python3
+"""
+Test AI Crawler Analytics - Log Parsing and Aggregation
+=======================================================
+
+Runs the crawler analytics pipeline against small generated access logs
+and checks the streaming results against the list-based analyzers.
+"""
+
+import asyncio
+import bz2
+import gzip
+import json
+import os
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ai_crawler_analytics import AICrawlerAnalytics, CrawlerStatsAggregator
+
+USER_AGENTS = [
+    "Mozilla/5.0 (compatible; GPTBot/1.0; +https://openai.com/gptbot)",
+    "PerplexityBot/1.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Google-Extended",
+    "ClaudeBot/1.0 Anthropic",
+]
+IPS = ["20.171.3.4", "35.89.1.1", "66.249.1.2", "10.0.0.1"]
+URLS = ["/", "/blog/post", "/blog/post.html", "/docs/guide/setup.PDF", "/about"]
+STATUSES = [200, 200, 404, 500, 301]
+
+
+def write_sample_log(path, lines=500, days=40, start=None):
+    """Write a deterministic combined-format access log spanning `days` (from `start`, default `days` ago)"""
+    start = start or datetime.now(timezone.utc) - timedelta(days=days)
+    step = timedelta(days=days) / lines
+    with open(path, 'w') as f:
+        for i in range(lines):
+            timestamp = (start + step * i).strftime('%d/%b/%Y:%H:%M:%S +0000')
+            f.write(
+                f'{IPS[i % len(IPS)]} - - [{timestamp}] "GET {URLS[i % len(URLS)]} HTTP/1.1" '
+                f'{STATUSES[i % 3]} {i * 7} "-" "{USER_AGENTS[i % len(USER_AGENTS)]}"\n'
+            )
+            if i % 50 == 0:
+                f.write("not a log line\n")
+    return path
+
+
+def comparable(results):
+    """Drop run-specific fields so two result dicts can be compared"""
+    results = dict(results)
+    results.pop('timestamp', None)
+    for page in results['top_crawled_pages']['pages']:
+        page['crawlers'] = sorted(page['crawlers'])
+    return results
+
+
+def test_streaming_matches_list_analysis(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log")
+    analytics = AICrawlerAnalytics()
+
+    streamed = analytics.parse_access_logs(str(log_file), days_back=30, streaming=True)
+    buffered = analytics.parse_access_logs(str(log_file), days_back=30, streaming=False)
+
+    assert "error" not in streamed
+    assert 0 < streamed['ai_requests'] < streamed['total_requests'] < 500
+    assert comparable(streamed) == comparable(buffered)
+
+
+def test_streaming_and_buffered_parses_return_the_same_dict(tmp_path):
+    ranges_file = tmp_path / "gptbot.json"
+    ranges_file.write_text(json.dumps({"prefixes": [{"ipv4Prefix": "20.171.3.0/24"}]}))
+    log_file = write_sample_log(tmp_path / "access.log", lines=800)
+    analytics = AICrawlerAnalytics(ip_range_files={"chatgpt": [str(ranges_file)]})
+
+    streamed = comparable(analytics.parse_access_logs(str(log_file), days_back=30, streaming=True))
+    buffered = comparable(analytics.parse_access_logs(str(log_file), days_back=30, streaming=False))
+    vectorized = comparable(analytics.parse_access_logs(str(log_file), days_back=30, streaming=False,
+                                                        patterns_backend='vectorized'))
+
+    assert streamed == buffered == vectorized
+    assert {'in_published_ranges', 'outside_published_ranges'} <= set(streamed['crawlers_detected']['chatgpt'])
+    page_keys = {'url', 'visits', 'crawlers', 'first_crawled', 'last_crawled', 'success_rate'}
+    assert all(set(page) == page_keys for page in buffered['top_crawled_pages']['pages'])
+
+
+def test_missing_log_file_returns_error(tmp_path):
+    results = AICrawlerAnalytics().parse_access_logs(str(tmp_path / "missing.log"))
+    assert results == {"error": "Log file not found"}
+
+
+def test_merged_partials_match_single_pass(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log")
+    analytics = AICrawlerAnalytics()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    lines = log_file.read_text().splitlines(keepends=True)
+
+    whole = CrawlerStatsAggregator()
+    first_half = CrawlerStatsAggregator()
+    second_half = CrawlerStatsAggregator()
+    for i, line in enumerate(lines):
+        analytics._aggregate_line(line, cutoff, whole)
+        analytics._aggregate_line(line, cutoff, first_half if i < len(lines) // 2 else second_half)
+    merged = first_half.merge(second_half)
+
+    assert merged.total_requests == whole.total_requests
+    assert merged.crawlers_detected() == whole.crawlers_detected()
+    assert merged.crawl_patterns() == whole.crawl_patterns()
+    merged_pages = {p['url']: p for p in merged.top_crawled_pages()['pages']}
+    for page in whole.top_crawled_pages()['pages']:
+        assert sorted(merged_pages[page['url']].pop('crawlers')) == sorted(page.pop('crawlers'))
+        assert merged_pages[page['url']] == page
+
+
+def test_parallel_chunks_match_sequential(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log", lines=2000)
+    analytics = AICrawlerAnalytics()
+
+    ranges = analytics._split_log_file(str(log_file), 7)
+    assert ranges[0][0] == 0 and ranges[-1][1] == log_file.stat().st_size
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+    sequential = analytics.parse_access_logs(str(log_file), days_back=30)
+    parallel = analytics.parse_access_logs(str(log_file), days_back=30, workers=2)
+    assert comparable(parallel) == comparable(sequential)
+
+
+def test_user_agent_classifier_keeps_signature_priority():
+    analytics = AICrawlerAnalytics(user_agent_cache_size=2)
+    identify = analytics._identify_ai_crawler
+
+    assert identify("Mozilla/5.0 GPTBot/1.0", "1.2.3.4")['type'] == 'chatgpt'
+    # Anthropic matches both claude and the generic `.*AI.*Bot`; claude comes first
+    assert identify("anthropic-ai Bot", "1.2.3.4")['type'] == 'claude'
+    # An earlier crawler's IP range outranks a later crawler's user agent
+    assert identify("PerplexityBot/1.0", "20.171.0.9")['type'] == 'chatgpt'
+    assert identify("Mozilla/5.0 (Windows NT 10.0)", "10.0.0.1") is None
+
+    cache = analytics.user_agent_classifier.classify.cache_info()
+    assert cache.maxsize == 2 and cache.currsize <= 2
+
+
+def test_published_ip_ranges_flag_spoofed_user_agents(tmp_path):
+    ranges_file = tmp_path / "gptbot.json"
+    ranges_file.write_text(json.dumps({
+        "creationTime": "2024-01-01T00:00:00",
+        "prefixes": [{"ipv4Prefix": "20.171.206.0/24"}, {"ipv6Prefix": "2a03:b0c0::/32"}]
+    }))
+    analytics = AICrawlerAnalytics(ip_range_files={"chatgpt": [str(ranges_file)]})
+    identify = analytics._identify_ai_crawler
+
+    assert identify("GPTBot/1.0", "20.171.206.10")['ip_verified'] is True
+    assert identify("GPTBot/1.0", "2a03:b0c0:1::5")['ip_verified'] is True
+    assert identify("GPTBot/1.0", "203.0.113.7")['ip_verified'] is False
+    # Legacy signature prefixes still identify crawlers by IP alone
+    assert identify("Mozilla/5.0", "35.89.10.10")['type'] == 'perplexity'
+    assert 'ip_verified' not in identify("PerplexityBot", "8.8.8.8")
+    assert identify("Mozilla/5.0", "not-an-ip") is None
+
+    log_file = tmp_path / "access.log"
+    timestamp = datetime.now(timezone.utc).strftime('%d/%b/%Y:%H:%M:%S +0000')
+    log_file.write_text(
+        f'20.171.206.10 - - [{timestamp}] "GET / HTTP/1.1" 200 10 "-" "GPTBot/1.0"\n'
+        f'203.0.113.7 - - [{timestamp}] "GET / HTTP/1.1" 200 10 "-" "GPTBot/1.0"\n'
+    )
+    chatgpt = analytics.parse_access_logs(str(log_file))['crawlers_detected']['chatgpt']
+    assert chatgpt['in_published_ranges'] == 1
+    assert chatgpt['outside_published_ranges'] == 1
+
+
+def test_seek_to_cutoff_skips_old_lines(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log", lines=4000, days=40)
+    analytics = AICrawlerAnalytics()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+
+    offset = analytics._find_cutoff_offset(str(log_file), cutoff)
+    size = log_file.stat().st_size
+    assert 0.75 * size < offset < 0.85 * size
+    with open(log_file, 'rb') as f:
+        f.seek(offset - 1)
+        assert f.read(1) == b"\n"
+
+    full_scan = analytics.parse_access_logs(str(log_file), days_back=7)
+    seeked = analytics.parse_access_logs(str(log_file), days_back=7, seek_to_cutoff=True)
+    parallel = analytics.parse_access_logs(str(log_file), days_back=7, seek_to_cutoff=True, workers=2)
+    assert comparable(seeked) == comparable(full_scan)
+    assert comparable(parallel) == comparable(full_scan)
+
+
+def test_fast_tokenizer_matches_regex_parser():
+    analytics = AICrawlerAnalytics()
+    lines = [
+        '1.2.3.4 - - [10/Oct/2024:13:55:36 -0700] "GET /a.html HTTP/1.1" 200 2326 "http://x/" "GPTBot/1.0"\n',
+        '1.2.3.4 - frank [10/Oct/2024:13:55:36 +0530] "POST /form HTTP/2.0" 302 - "-" "Mozilla/5.0 (X11)"\n',
+        # Quote inside the URL: the fast path can't split it, the regex can
+        '1.2.3.4 - - [10/Oct/2024:13:55:36 +0000] "GET /a"b HTTP/1.1" 404 0 "-" "curl/8.0"\n',
+        # Tab inside a token and a single-digit day both go through the regex fallback
+        '1.2.3.4\t - - [10/Oct/2024:13:55:36 +0000] "GET / HTTP/1.1" 200 1 "-" "ua"\n',
+        '1.2.3.4 - - [1/Oct/2024:13:55:36 +0000] "GET / HTTP/1.1" 200 1 "-" "ua"\n',
+        '1.2.3.4 - - [31/Feb/2024:13:55:36 +0000] "GET / HTTP/1.1" 200 1 "-" "ua"\n',
+        '1.2.3.4 - - [10/Oct/2024:13:55:36 +0000] "GET / HTTP/1.1" 200 1 "-"\n',
+        'garbage\n',
+    ]
+    for line in lines:
+        assert analytics._parse_log_entry(line) == analytics._parse_log_entry_regex(line), line
+
+    parsed = analytics._parse_log_entry(lines[0])
+    assert parsed['timestamp'].isoformat() == '2024-10-10T13:55:36-07:00'
+    assert analytics._parse_log_entry(lines[2])['url'] == '/a"b'
+
+
+def test_rotated_compressed_log_set(tmp_path):
+    source = write_sample_log(tmp_path / "source.log", lines=1200, days=40)
+    lines = source.read_text().splitlines(keepends=True)
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+
+    # Oldest lines go to the highest rotation number, newest to access.log
+    parts = [lines[:300], lines[300:600], lines[600:900], lines[900:]]
+    with gzip.open(log_dir / "access.log.3.gz", 'wt') as f:
+        f.writelines(parts[0])
+    with bz2.open(log_dir / "access.log.2.bz2", 'wt') as f:
+        f.writelines(parts[1])
+    (log_dir / "access.log.1").write_text(''.join(parts[2]))
+    (log_dir / "access.log").write_text(''.join(parts[3]))
+    (log_dir / "access.log.9.gz").write_bytes(b"not gzip at all")
+
+    # A file last written before the window is skipped without being opened
+    stale = time.time() - 60 * 86400
+    os.utime(log_dir / "access.log.9.gz", (stale, stale))
+
+    analytics = AICrawlerAnalytics()
+    assert [os.path.basename(p) for p in analytics._find_log_files(str(log_dir))] == [
+        "access.log.9.gz", "access.log.3.gz", "access.log.2.bz2", "access.log.1", "access.log"
+    ]
+
+    expected = comparable(analytics.parse_access_logs(str(source), days_back=30))
+    assert comparable(analytics.parse_access_logs(str(log_dir), days_back=30)) == expected
+    assert comparable(analytics.parse_access_logs(str(log_dir / "access.log*"), days_back=30, workers=2)) == expected
+
+
+def test_follow_mode_reads_only_new_bytes_across_rotation(tmp_path):
+    source = write_sample_log(tmp_path / "source.log", lines=900, days=20)
+    lines = source.read_text().splitlines(keepends=True)
+    log_file = tmp_path / "access.log"
+    checkpoint = str(tmp_path / "state" / "checkpoint.json")
+    analytics = AICrawlerAnalytics()
+
+    # First run, with a half-written line at the end
+    log_file.write_text(''.join(lines[:300]) + lines[300][:20])
+    first = analytics.follow_access_logs(str(log_file), checkpoint)
+    assert first['incremental']['new_bytes'] == len(''.join(lines[:300]))
+
+    # Writer finishes the line and appends more, then the log rotates
+    with open(log_file, 'a') as f:
+        f.write(lines[300][20:] + ''.join(lines[301:600]))
+    os.rename(log_file, tmp_path / "access.log.1")
+    log_file.write_text(''.join(lines[600:]))
+    second = analytics.follow_access_logs(str(log_file), checkpoint)
+    assert second['incremental']['new_bytes'] == len(''.join(lines[300:]))
+
+    # Nothing new: nothing parsed, same totals
+    third = analytics.follow_access_logs(str(log_file), checkpoint)
+    assert third['incremental']['new_bytes'] == 0
+
+    expected = analytics.parse_access_logs(str(source), days_back=30)
+    for results in (second, third):
+        assert results['total_requests'] == expected['total_requests']
+        assert results['crawlers_detected'] == expected['crawlers_detected']
+        assert results['crawl_patterns'] == expected['crawl_patterns']
+
+
+def test_follow_mode_windows_day_shards_and_detects_reused_files(tmp_path):
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    source = write_sample_log(tmp_path / "source.log", lines=1200, days=40, start=midnight - timedelta(days=40))
+    lines = source.read_text().splitlines(keepends=True)
+    log_file = tmp_path / "access.log"
+    checkpoint = tmp_path / "checkpoint.json"
+    analytics = AICrawlerAnalytics()
+
+    log_file.write_text(''.join(lines[:1000]))
+    first = analytics.follow_access_logs(str(log_file), str(checkpoint), days_back=30)
+    shards = {path.name for path in (tmp_path / "checkpoint.json.days").iterdir()}
+    assert len(shards) == first['incremental']['days'] <= 31
+    assert first['analysis_period'] == "30 days"
+
+    # Appending rewrites only the days the new lines fall on
+    with open(log_file, 'a') as f:
+        f.write(''.join(lines[1000:]))
+    second = analytics.follow_access_logs(str(log_file), str(checkpoint), days_back=30)
+    rewritten = {path.name for path in (tmp_path / "checkpoint.json.days").iterdir()} - shards
+    assert 0 < len(rewritten) <= 8
+    assert second['total_requests'] == analytics.parse_access_logs(str(source), days_back=30)['total_requests']
+
+    # A shorter window drops the older days from the checkpoint instead of carrying them
+    third = analytics.follow_access_logs(str(log_file), str(checkpoint), days_back=10)
+    assert third['incremental']['dropped_days'] > 0 and third['incremental']['days'] <= 11
+    assert len(list((tmp_path / "checkpoint.json.days").iterdir())) == third['incremental']['days']
+    assert (analytics.parse_access_logs(str(source), days_back=10)['total_requests'] <= third['total_requests']
+            <= analytics.parse_access_logs(str(source), days_back=11)['total_requests'])
+
+    # Same device and inode, different file (rewritten in place): read from the start, not the stale offset
+    reused = write_sample_log(tmp_path / "other.log", lines=1500, days=5).read_bytes()
+    with open(log_file, 'r+b') as f:
+        f.write(reused)
+        f.truncate()
+    fourth = analytics.follow_access_logs(str(log_file), str(checkpoint), days_back=10)
+    assert fourth['incremental']['new_bytes'] == len(reused)
+
+    # A longer window than the checkpoint has ingested reports the period it covers
+    fifth = analytics.follow_access_logs(str(log_file), str(checkpoint), days_back=30)
+    assert fifth['analysis_period'].startswith("10 days (since")
+
+
+def test_rollup_store_serves_parsed_results(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log", lines=1000, days=20)
+    rollup_db = str(tmp_path / "rollups.db")
+    analytics = AICrawlerAnalytics(rollup_db=rollup_db)
+
+    parsed = analytics.parse_access_logs(str(log_file), days_back=30)
+    # Re-parsing replaces the covered hours instead of double counting them
+    parsed = analytics.parse_access_logs(str(log_file), days_back=30)
+    from_rollups = analytics.analyze_rollups(days_back=30)
+
+    for key in ('total_requests', 'ai_requests', 'crawlers_detected', 'crawl_patterns'):
+        assert from_rollups[key] == parsed[key]
+    visits = {page['url']: page['visits'] for page in parsed['top_crawled_pages']['pages']}
+    assert {page['url']: page['visits'] for page in from_rollups['top_crawled_pages']['pages']} == visits
+
+    assert sum(point['requests'] for point in from_rollups['bot_activity']) == parsed['ai_requests']
+
+    # An upload cut off at both ends replaces only the hours strictly inside its lines
+    data = log_file.read_bytes()
+    log_stream = analytics.open_log_stream(days_back=30)
+    log_stream.feed(data[len(data) // 3:2 * len(data) // 3])
+    log_stream.finish()
+    after_upload = analytics.analyze_rollups(days_back=30)
+    for key in ('total_requests', 'ai_requests', 'crawlers_detected', 'crawl_patterns'):
+        assert after_upload[key] == parsed[key]
+    week = from_rollups['week_over_week']['chatgpt']
+    assert week['this_week'] > 0 and week['last_week'] > 0
+
+    # Follow-mode runs add only the newly ingested lines
+    follower = AICrawlerAnalytics(rollup_db=str(tmp_path / "follow.db"))
+    lines = log_file.read_text().splitlines(keepends=True)
+    followed = tmp_path / "followed.log"
+    followed.write_text(''.join(lines[:400]))
+    follower.follow_access_logs(str(followed), str(tmp_path / "checkpoint.json"))
+    with open(followed, 'a') as f:
+        f.write(''.join(lines[400:]))
+    follower.follow_access_logs(str(followed), str(tmp_path / "checkpoint.json"))
+    assert follower.analyze_rollups(days_back=30)['crawlers_detected'] == parsed['crawlers_detected']
+
+
+def test_sketch_mode_bounds_pages_and_estimates_distinct_counts(tmp_path):
+    from crawler_sketches import HyperLogLog, SpaceSavingCounter
+
+    log_file = write_sample_log(tmp_path / "access.log", lines=2000)
+    analytics = AICrawlerAnalytics()
+    exact = analytics.parse_access_logs(str(log_file), days_back=30)
+
+    # With room for every URL the sketches agree with the exact analysis
+    sketched = analytics.parse_access_logs(str(log_file), days_back=30, sketch_size=100, workers=2)
+    assert sketched['crawl_patterns'] == exact['crawl_patterns']
+    assert [(p['url'], p['visits'], p['visits_error']) for p in sketched['top_crawled_pages']['pages']] == [
+        (p['url'], p['visits'], 0) for p in exact['top_crawled_pages']['pages']
+    ]
+    for crawler_type, stats in exact['crawlers_detected'].items():
+        assert sketched['crawlers_detected'][crawler_type]['unique_pages'] == stats['unique_pages']
+        assert sketched['crawlers_detected'][crawler_type]['requests'] == stats['requests']
+
+    # Skewed stream over many distinct keys: heavy hitters survive with valid bounds
+    counts = {f"/page/{i}": 1 for i in range(20000)}
+    counts.update({f"/hot/{i}": 1000 - i * 50 for i in range(10)})
+    keys = [key for key, count in counts.items() for _ in range(count)]
+    random.Random(7).shuffle(keys)
+    # Keys seen more than N / capacity times per half are guaranteed to be kept
+    halves = [SpaceSavingCounter(100), SpaceSavingCounter(100)]
+    for i, key in enumerate(keys):
+        halves[i % 2].add(key)
+    summary = halves[0].merge(halves[1])
+    top = summary.top(10)
+    assert len(summary) == 100
+    assert sorted(key for key, _, _, _ in top) == sorted(f"/hot/{i}" for i in range(10))
+    for key, count, error, _ in top:
+        assert count - error <= counts[key] <= count
+
+    distinct = HyperLogLog(12)
+    for key in counts:
+        distinct.add(key)
+    assert abs(distinct.estimate() - len(counts)) <= distinct.error_bound()
+    assert len(distinct.registers) == 4096
+
+
+def test_sampling_mode_extrapolates_with_confidence_intervals(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log", lines=6000)
+    analytics = AICrawlerAnalytics()
+    exact = analytics.parse_access_logs(str(log_file), days_back=30)
+
+    # Keeping every line in reservoirs that hold them all is exact
+    full = analytics.parse_access_logs(str(log_file), days_back=30, sample_rate=1, reservoir_size=10000)
+    assert full['total_requests'] == exact['total_requests']
+    assert full['crawl_patterns']['hourly_distribution'] == exact['crawl_patterns']['hourly_distribution']
+    for crawler_type, stats in exact['crawlers_detected'].items():
+        sampled = full['crawlers_detected'][crawler_type]
+        assert sampled['requests_ci'] == [stats['requests'], stats['requests']]
+        assert sampled['success_rate_ci'] == [stats['success_rate'], stats['success_rate']]
+
+    # A 20% sample with small reservoirs: nearly all exact figures fall inside the 95% intervals
+    sampled = analytics.parse_access_logs(str(log_file), days_back=30, sample_rate=0.2,
+                                          reservoir_size=200, sample_seed=3)
+    assert sampled['sample']['sampled_lines'] < 0.3 * len(log_file.read_text().splitlines())
+    checks = [(sampled['sample']['total_requests_ci'], exact['total_requests'])]
+    for crawler_type, stats in exact['crawlers_detected'].items():
+        estimate = sampled['crawlers_detected'][crawler_type]
+        checks.append((estimate['requests_ci'], stats['requests']))
+        checks.append((estimate['success_rate_ci'], stats['success_rate']))
+    hourly_ci = sampled['crawl_patterns']['hourly_distribution_ci']
+    for hour, count in exact['crawl_patterns']['hourly_distribution'].items():
+        checks.append((hourly_ci.get(hour, [0, 0]), count))
+    covered = sum(low <= value <= high for (low, high), value in checks)
+    assert covered >= 0.85 * len(checks)
+    assert "Estimated" in analytics.generate_crawler_report()
+
+
+def test_log_stream_matches_file_parse_for_any_chunking(tmp_path):
+    log_file = write_sample_log(tmp_path / "access.log", lines=1500)
+    data = log_file.read_bytes()
+    analytics = AICrawlerAnalytics()
+    expected = comparable(analytics.parse_access_logs(str(log_file), days_back=30))
+
+    # Plain bytes split at random points, without the final newline
+    log_stream = analytics.open_log_stream(days_back=30)
+    rng = random.Random(5)
+    position = 0
+    while position < len(data) - 1:
+        step = rng.randint(1, 5000)
+        log_stream.feed(data[position:min(position + step, len(data) - 1)])
+        position += step
+    partial = log_stream.snapshot()
+    assert 0 < partial['progress']['bytes_received'] < len(data)
+    results = log_stream.finish()
+    results.pop('progress')
+    assert comparable(results) == expected
+
+    # Concatenated gzip members, fed in small chunks
+    middle = data.index(b"\n", len(data) // 2) + 1
+    compressed = gzip.compress(data[:middle]) + gzip.compress(data[middle:])
+    log_stream = analytics.open_log_stream(days_back=30)
+    for start in range(0, len(compressed), 997):
+        log_stream.feed(compressed[start:start + 997])
+    results = log_stream.finish()
+    assert results.pop('progress')['bytes_received'] == len(compressed)
+    assert comparable(results) == expected
+
+    # A gzip bomb (64 MB of junk lines from one small chunk) expands in bounded pieces
+    bomb = gzip.compress((b"x" * 1023 + b"\n") * 65536)
+    log_stream = analytics.open_log_stream(days_back=30)
+    tracemalloc.start()
+    log_stream.feed(bomb)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert log_stream.lines == 65536 and len(bomb) < 1 << 20
+    assert peak < 16 << 20
+
+
+def write_log_in_format(path, log_format, lines=600, days=20):
+    """Write the same deterministic requests as a combined, nginx JSON, ALB or CloudFront log"""
+    # Whole-second timestamps from midnight, so every format's file holds the same ones
+    start = (datetime.now(timezone.utc) - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    step = timedelta(seconds=days * 86400 // lines)
+    with open(path, 'w') as f:
+        if log_format == 'cloudfront':
+            f.write("#Version: 1.0\n#Fields: date time x-edge-location sc-bytes c-ip cs-method cs(Host) "
+                    "cs-uri-stem sc-status cs(Referer) cs(User-Agent) cs-uri-query\n")
+        for i in range(lines):
+            ts = start + step * i
+            ip, url, status = IPS[i % len(IPS)], URLS[i % len(URLS)], STATUSES[i % 3]
+            user_agent = USER_AGENTS[i % len(USER_AGENTS)]
+            if log_format == 'combined':
+                f.write(f'{ip} - - [{ts.strftime("%d/%b/%Y:%H:%M:%S +0000")}] "GET {url} HTTP/1.1" '
+                        f'{status} {i} "-" "{user_agent}"\n')
+            elif log_format == 'nginx_json':
+                f.write(json.dumps({
+                    "time_local": ts.strftime("%d/%b/%Y:%H:%M:%S +0000"), "remote_addr": ip,
+                    "request": f"GET {url} HTTP/1.1", "status": str(status), "body_bytes_sent": str(i),
+                    "http_referer": "-", "http_user_agent": user_agent
+                }) + "\n")
+            elif log_format == 'alb':
+                f.write(f'https {ts.strftime("%Y-%m-%dT%H:%M:%S.000000Z")} app/lb/1 {ip}:443 10.0.0.9:80 '
+                        f'0.001 0.002 0.000 {status} {status} 120 {i} "GET https://example.com:443{url} HTTP/1.1" '
+                        f'"{user_agent}" ECDHE TLSv1.2 arn:tg "Root=1" "example.com" "-" 0\n')
+            else:
+                f.write('\t'.join([
+                    ts.strftime("%Y-%m-%d"), ts.strftime("%H:%M:%S"), "IAD89", str(i), ip, "GET",
+                    "d1.cloudfront.net", url, str(status), "-", user_agent.replace(' ', '%20'), "-"
+                ]) + "\n")
+    return path
+
+
+def test_log_formats_are_detected_and_parse_alike(tmp_path):
+    from crawler_log_formats import LOG_FORMATS, detect_log_format
+
+    expected = None
+    for log_format in LOG_FORMATS:
+        log_file = write_log_in_format(tmp_path / f"{log_format}.log", log_format)
+        head = log_file.read_text().splitlines(keepends=True)[:20]
+        assert detect_log_format(head) == log_format
+
+        analytics = AICrawlerAnalytics()
+        results = comparable(analytics.parse_access_logs(str(log_file), days_back=30))
+        # Chunked workers and the upload stream sniff the format the same way
+        assert comparable(analytics.parse_access_logs(str(log_file), days_back=30, workers=2)) == results
+        log_stream = analytics.open_log_stream(days_back=30)
+        log_stream.feed(log_file.read_bytes())
+        streamed = log_stream.finish()
+        streamed.pop('progress')
+        assert comparable(streamed) == results
+
+        assert results['ai_requests'] > 0
+        if expected is None:
+            expected = results
+        assert results == expected, log_format
+
+    # An explicit format skips detection
+    log_file = tmp_path / "alb.log"
+    assert AICrawlerAnalytics(log_format='combined').parse_access_logs(str(log_file))['total_requests'] == 0
+    assert AICrawlerAnalytics(log_format='alb').parse_access_logs(str(log_file))['total_requests'] == 600
+
+
+def test_geoip_enrichment_counts_bot_hits_per_country_and_asn(tmp_path, monkeypatch):
+    import maxminddb
+    from types import SimpleNamespace
+
+    countries = {"20.171.3.4": "US", "35.89.1.1": "US", "66.249.1.2": "IE"}
+    asns = {"20.171.3.4": (8075, "MICROSOFT-CORP"), "66.249.1.2": (15169, "GOOGLE")}
+    lookups = []
+
+    class StubReader:
+        """Stands in for a MaxMind database file"""
+        def __init__(self, path, mode):
+            assert mode == maxminddb.MODE_AUTO
+            self.is_asn = "asn" in path
+
+        def metadata(self):
+            return SimpleNamespace(database_type="GeoLite2-ASN" if self.is_asn else "GeoLite2-City")
+
+        def get(self, ip):
+            if self.is_asn:
+                if ip not in asns:
+                    return None
+                number, organization = asns[ip]
+                return {"autonomous_system_number": number, "autonomous_system_organization": organization}
+            lookups.append(ip)
+            return {"city": {"names": {}}, "country": {"iso_code": countries[ip]}} if ip in countries else None
+
+    monkeypatch.setattr(maxminddb, "open_database", StubReader)
+    log_file = write_sample_log(tmp_path / "access.log", lines=1000)
+    timestamp = datetime.now(timezone.utc).strftime('%d/%b/%Y:%H:%M:%S +0000')
+    with open(log_file, 'a') as f:
+        f.write(f'198.51.100.7 - - [{timestamp}] "GET / HTTP/1.1" 200 10 "-" "Mozilla/5.0 (X11; Linux x86_64)"\n')
+    plain = AICrawlerAnalytics().parse_access_logs(str(log_file), days_back=30)
+    analytics = AICrawlerAnalytics(geoip_country_db="country.mmdb", geoip_asn_db="asn.mmdb")
+    results = analytics.parse_access_logs(str(log_file), days_back=30)
+    assert "Crawler Origins" in analytics.generate_crawler_report()
+
+    patterns = dict(results['crawl_patterns'])
+    assert sum(patterns.pop('countries').values()) == results['ai_requests']
+    asn_counts = patterns.pop('asns')
+    assert set(asn_counts) == {"AS8075 MICROSOFT-CORP", "AS15169 GOOGLE", "unknown"}
+    assert sum(asn_counts.values()) == results['ai_requests']
+    # Other sections are unchanged; only bot hits are looked up, once per distinct IP
+    assert patterns == plain['crawl_patterns']
+    assert sorted(lookups) == sorted(set(lookups))
+    assert "198.51.100.7" not in lookups
+
+
+class StubResolver:
+    """In-memory PTR and A records, recording lookups and peak concurrency"""
+
+    def __init__(self, ptr, forward):
+        self.ptr = ptr
+        self.addresses = forward
+        self.reversed = []
+        self.in_flight = self.peak = 0
+
+    async def reverse(self, ip):
+        self.reversed.append(ip)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if self.ptr.get(ip) is TimeoutError:
+                raise asyncio.TimeoutError()
+            return self.ptr.get(ip)
+        finally:
+            self.in_flight -= 1
+
+    async def forward(self, hostname):
+        return self.addresses.get(hostname, [])
+
+
+def test_reverse_dns_verification_counts_verified_and_spoofed(tmp_path):
+    from crawler_dns_verification import CrawlerDNSVerifier
+
+    resolver = StubResolver(
+        ptr={
+            "66.249.66.1": "crawl-66-249-66-1.googlebot.com.",
+            "20.171.1.1": "host.evil.example",
+            "20.171.1.2": "fake.openai.com",   # doesn't resolve back
+            "20.171.1.3": TimeoutError,
+        },
+        forward={"crawl-66-249-66-1.googlebot.com": ["66.249.66.1"], "fake.openai.com": ["192.0.2.1"]},
+    )
+    timestamp = datetime.now(timezone.utc).strftime('%d/%b/%Y:%H:%M:%S +0000')
+    hits = [("66.249.66.1", "Google-Extended")] * 3 + [("20.171.1.1", "GPTBot/1.0")] * 2 + [
+        ("20.171.1.2", "GPTBot/1.0"), ("20.171.1.3", "GPTBot/1.0"), ("198.51.100.9", "Some AI Bot"),
+        ("198.51.100.10", "Mozilla/5.0 (X11; Linux x86_64)")]
+    log_file = tmp_path / "access.log"
+    log_file.write_text("".join(f'{ip} - - [{timestamp}] "GET / HTTP/1.1" 200 10 "-" "{agent}"\n'
+                                for ip, agent in hits))
+
+    cache_path = tmp_path / "dns_cache.json"
+    analytics = AICrawlerAnalytics(verify_dns=True, dns_resolver=resolver, dns_cache_path=str(cache_path))
+    crawlers = analytics.parse_access_logs(str(log_file))['crawlers_detected']
+    assert (crawlers['google_ai']['verified'], crawlers['google_ai']['spoofed']) == (3, 0)
+    # The timed-out lookup counts as neither
+    assert (crawlers['chatgpt']['verified'], crawlers['chatgpt']['spoofed']) == (0, 3)
+    assert 'verified' not in crawlers['generic_ai']
+    assert "Reverse DNS" in analytics.generate_crawler_report()
+    # One lookup per distinct IP of a verifiable crawler; only bot traffic is resolved
+    assert sorted(resolver.reversed) == ["20.171.1.1", "20.171.1.2", "20.171.1.3", "66.249.66.1"]
+
+    # A later run is served from the persisted cache, retrying only the failed lookup
+    rerun = StubResolver(ptr={}, forward={})
+    crawlers = AICrawlerAnalytics(verify_dns=True, dns_resolver=rerun, dns_cache_path=str(cache_path)) \
+        .parse_access_logs(str(log_file))['crawlers_detected']
+    assert rerun.reversed == ["20.171.1.3"]
+    assert crawlers['chatgpt']['spoofed'] == 4
+
+    # Lookups run concurrently, up to the cap
+    capped = StubResolver(ptr={}, forward={})
+    verifier = CrawlerDNSVerifier({"chatgpt": [".openai.com"]}, resolver=capped, concurrency=4)
+    verification = verifier.verify(("chatgpt", f"20.171.2.{i}") for i in range(20))
+    assert set(verification.values()) == {False}
+    assert capped.peak == 4
+
+    # Verifiers sharing one cache file each write through their own temp file
+    from concurrent.futures import ThreadPoolExecutor
+    shared = [CrawlerDNSVerifier({"chatgpt": [".openai.com"]}, resolver=rerun, cache_path=str(cache_path))
+              for _ in range(8)]
+    for i, shared_verifier in enumerate(shared):
+        shared_verifier.cache = {f"20.171.5.{i}.{n}": ["host", time.time()] for n in range(2000)}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda shared_verifier: shared_verifier.save_cache(), shared * 4))
+    assert len(json.loads(cache_path.read_text())["entries"]) == 2000
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_event_export_round_trips_without_reparsing(tmp_path):
+    pytest.importorskip("pyarrow")
+    # Midnight-aligned, so the fixture doesn't shift with the time of day
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    log_file = write_sample_log(tmp_path / "access.log", lines=2000, start=midnight - timedelta(days=40))
+    direct = AICrawlerAnalytics().parse_access_logs(str(log_file), days_back=30)
+    first_full_day = midnight - timedelta(days=29)
+
+    for event_format, extension in (("parquet", "parquet"), ("arrow", "arrow")):
+        event_dir = tmp_path / f"events_{event_format}"
+        analytics = AICrawlerAnalytics(event_dir=str(event_dir), event_format=event_format)
+        analytics.parse_access_logs(str(log_file), days_back=30, workers=2)
+        # A second full parse replaces its partitions instead of duplicating them
+        analytics.parse_access_logs(str(log_file), days_back=30)
+
+        partitions = sorted(path.relative_to(event_dir / "events").parts[:2]
+                            for path in (event_dir / "events").rglob(f"*.{extension}"))
+        assert partitions and all(day.startswith("day=") and crawler.startswith("crawler_type=")
+                                  for day, crawler in partitions)
+
+        events = analytics.event_store.load_events()
+        # The export skips the partial first day of the window (which may hold no AI requests late in the day)
+        assert 0 < len(events) <= direct['ai_requests']
+        assert events['timestamp'].min() >= first_full_day
+        assert str(events['url'].dtype) == 'category'
+        assert set(events['crawler_type'].astype(str)) <= set(direct['crawlers_detected'])
+
+        window = 20
+        rebuilt = analytics.analyze_events(days_back=window)
+        reparsed = AICrawlerAnalytics().parse_access_logs(str(log_file), days_back=window)
+        assert rebuilt['ai_requests'] == reparsed['ai_requests']
+        assert comparable(rebuilt)['crawlers_detected'] == comparable(reparsed)['crawlers_detected']
+        assert rebuilt['crawl_patterns'] == reparsed['crawl_patterns']
+        assert abs(rebuilt['total_requests'] - reparsed['total_requests']) <= 10
+
+        chatgpt_only = analytics.event_store.load_events(crawler_types=["chatgpt"])
+        assert set(chatgpt_only['crawler_type'].astype(str)) == {"chatgpt"}
+
+
+def test_event_export_keeps_odd_sizes_and_statuses(tmp_path):
+    pytest.importorskip("pyarrow")
+    log_file = write_sample_log(tmp_path / "access.log", lines=200)
+    stamp = datetime.now(timezone.utc).strftime('%d/%b/%Y:%H:%M:%S +0000')
+    with open(log_file, 'a') as f:
+        for status, size in (("200", "abc"), ("40000", "12"), ("200", "\u00b2")):
+            f.write(f'20.171.2.9 - - [{stamp}] "GET /odd HTTP/1.1" {status} {size} "-" "{USER_AGENTS[0]}"\n')
+
+    direct = AICrawlerAnalytics().parse_access_logs(str(log_file), days_back=30)
+    analytics = AICrawlerAnalytics(event_dir=str(tmp_path / "events"))
+    exported = analytics.parse_access_logs(str(log_file), days_back=30)
+    assert exported['ai_requests'] == direct['ai_requests']
+
+    odd = analytics.event_store.load_events()
+    odd = odd[odd['url'].astype(str) == "/odd"]
+    assert sorted(zip(odd['status'], odd['size'])) == [(200, 0), (200, 0), (40000, 12)]
+
+
+def test_vectorized_crawl_patterns_match_python_loops(tmp_path):
+    analytics = AICrawlerAnalytics()
+    rng = random.Random(7)
+    zones = [timezone.utc, timezone(timedelta(hours=5, minutes=30)), timezone(timedelta(hours=-7))]
+    start = datetime(2024, 3, 9, 20, 0, tzinfo=timezone.utc)
+    requests = [{
+        'timestamp': (start + timedelta(minutes=rng.randint(0, 5000))).astimezone(rng.choice(zones)),
+        'status': rng.choice(STATUSES),
+        'url': rng.choice(URLS + ["/img/logo.PNG", "/feed.xml", "/a.b/c"])
+    } for _ in range(3000)]
+
+    loops = analytics._analyze_crawl_patterns(requests)
+    vectorized = analytics._analyze_crawl_patterns(requests, backend='vectorized')
+    # Same keys, counts and order, including file types tied on hits
+    for name, histogram in loops.items():
+        assert list(vectorized[name].items()) == list(histogram.items())
+    assert analytics._analyze_crawl_patterns([], backend='vectorized') == analytics._analyze_crawl_patterns([])
+    with pytest.raises(ValueError):
+        analytics._analyze_crawl_patterns(requests, backend='cython')
+
+    log_file = write_sample_log(tmp_path / "access.log", lines=2000)
+    assert (analytics.parse_access_logs(str(log_file), streaming=False, patterns_backend='vectorized')['crawl_patterns']
+            == analytics.parse_access_logs(str(log_file), streaming=False)['crawl_patterns'])
+    # The streaming paths count patterns as they go and can't honour the vectorized backend
+    for options in ({}, {"streaming": False, "workers": 2}, {"streaming": False, "sample_rate": 0.5}):
+        with pytest.raises(ValueError):
+            analytics.parse_access_logs(str(log_file), patterns_backend='vectorized', **options)
+
+    pytest.importorskip("pyarrow")
+    from crawler_vectorized import crawl_patterns_from_frame
+    stored = AICrawlerAnalytics(event_dir=str(tmp_path / "events"))
+    stored.parse_access_logs(str(log_file), days_back=30)
+    expected = stored.analyze_event_patterns(days_back=20, backend='python')
+    assert expected['hourly_distribution']
+    assert stored.analyze_event_patterns(days_back=20) == expected
+    assert crawl_patterns_from_frame(stored.event_store.load_events()) == \
+        stored.event_store.load_aggregator().crawl_patterns()
+
+
+def test_crawl_sessions_and_recrawl_intervals(tmp_path):
+    from crawler_sessions import CrawlerSessionizer
+
+    start = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+    hits = []
+    # Two sessions from one GPTBot IP, three hours apart; a single hit from another IP
+    for minutes, url in ((0, "/a"), (1, "/b"), (2, "/c"), (180, "/a"), (181, "/b"), (181.5, "/a")):
+        hits.append(("chatgpt", "20.171.3.4", url, start + timedelta(minutes=minutes)))
+    hits.append(("chatgpt", "20.171.9.9", "/c", start + timedelta(minutes=5)))
+    hits.append(("claude", "35.89.1.1", "/a", start + timedelta(minutes=7)))
+    hits.sort(key=lambda hit: hit[3])
+
+    whole = CrawlerSessionizer(gap=30 * 60)
+    for hit in hits:
+        whole.add(*hit)
+    report = whole.report()
+    chatgpt = report['crawlers']['chatgpt']
+    assert list(report['crawlers']) == ['chatgpt', 'claude']
+    assert chatgpt['sessions'] == 3
+    assert chatgpt['avg_pages_per_session'] == round(7 / 3, 1)
+    assert chatgpt['median_pages_per_session'] == 3
+    # /a: 180 and 1.5 minutes; /b: 180; /c: 3 minutes
+    assert chatgpt['recrawled_pages'] == 3 and chatgpt['recrawls'] == 4
+    # Median of all four intervals (1.5, 3, 180, 180 minutes), not of the per-page means
+    assert chatgpt['median_recrawl_hours'] == pytest.approx(3 / 60, abs=0.01)
+    assert chatgpt['mean_recrawl_hours'] == round((180 + 1.5 + 180 + 3) / 4 / 60, 2)
+    top = report['most_recrawled_pages'][0]
+    assert (top['url'], top['crawler_type'], top['recrawls']) == ("/a", "chatgpt", 2)
+    assert top['mean_interval_hours'] == round((180 + 1.5) / 2 / 60, 2)
+    assert report['crawlers']['claude']['sessions'] == 1
+
+    # Any split merges back to the single-pass result, in either order, and survives JSON
+    for split in range(len(hits) + 1):
+        early, late = CrawlerSessionizer(gap=30 * 60), CrawlerSessionizer(gap=30 * 60)
+        for hit in hits[:split]:
+            early.add(*hit)
+        for hit in hits[split:]:
+            late.add(*hit)
+        assert early.merge(late).report() == report
+        late, early = CrawlerSessionizer.from_dict(json.loads(json.dumps(late.to_dict()))), CrawlerSessionizer(gap=30 * 60)
+        for hit in hits[:split]:
+            early.add(*hit)
+        assert late.merge(early).report() == report
+
+    capped = CrawlerSessionizer(max_keys=1)
+    for hit in hits:
+        capped.add(*hit)
+    assert capped.report()['untracked_hits'] > 0
+
+    log_file = write_sample_log(tmp_path / "access.log", lines=2000)
+    rollup_db = str(tmp_path / "rollups.db")
+    analytics = AICrawlerAnalytics(rollup_db=rollup_db, session_gap_minutes=60)
+    parsed = analytics.parse_access_logs(str(log_file), days_back=30)
+    assert parsed['crawl_sessions']['session_gap_minutes'] == 60
+    assert sum(stats['sessions'] for stats in parsed['crawl_sessions']['crawlers'].values()) > 0
+    assert "Crawl Sessions" in analytics.generate_crawler_report()
+    # Hourly rollups carry no per-hit timestamps
+    assert 'crawl_sessions' not in analytics.analyze_rollups(days_back=30)
+
+
+def test_synthetic_log_generator_and_benchmark_suite(tmp_path):
+    from crawler_benchmarks import benchmark_suite, suite_regressions
+    from crawler_log_generator import SyntheticLogConfig, SyntheticLogGenerator
+
+    config = SyntheticLogConfig(lines=6000, seed=3, ai_share=0.4, urls=300)
+    first = SyntheticLogGenerator(config).write(str(tmp_path / "a.log"))
+    SyntheticLogGenerator(config).write(str(tmp_path / "b.log"))
+    # Same seed, same file (timestamps aside, which end at generation time)
+    def strip(path):
+        return [line.split('[', 1)[0] + line.split(']', 1)[1] for line in open(path)]
+    assert first == 6000 and strip(tmp_path / "a.log") == strip(tmp_path / "b.log")
+
+    analytics = AICrawlerAnalytics()
+    results = analytics.parse_access_logs(str(tmp_path / "a.log"), days_back=30)
+    assert results['total_requests'] == 6000
+    assert 0.35 < results['ai_requests'] / 6000 < 0.45
+    # Every signature's crawler type is generated and detected, humans are not misread as bots
+    assert set(results['crawlers_detected']) == set(analytics._get_ai_crawler_signatures())
+    assert len({line.split('"')[1] for line in open(tmp_path / "a.log")}) <= 300
+
+    mixed = SyntheticLogGenerator(SyntheticLogConfig(lines=2000, crawler_mix={"claude": 1}))
+    mixed.write(str(tmp_path / "claude.log"))
+    assert set(analytics.parse_access_logs(str(tmp_path / "claude.log"))['crawlers_detected']) == {"claude"}
+    with pytest.raises(ValueError):
+        SyntheticLogGenerator(SyntheticLogConfig(crawler_mix={"altavista": 1}))
+
+    suite = benchmark_suite(sizes=(3000,), data_dir=str(tmp_path))
+    run = suite["3000"]
+    assert run['lines'] == 3000 and run['lines_per_sec'] > 0
+    assert run['parse_seconds'] > 0 and run['classify_seconds'] > 0 and run['aggregate_seconds'] > 0
+    assert not list(tmp_path.glob("synthetic-3000-42-*.log"))
+    assert suite_regressions(suite, {"3000": {"lines_per_sec": run['lines_per_sec']}}) == []
+    assert suite_regressions(suite, {"3000": {"lines_per_sec": run['lines_per_sec'] * 2}})
+
+    # A kept log from long ago is still parsed in full, not left outside a 30-day window
+    old_end = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    SyntheticLogGenerator(SyntheticLogConfig(lines=2000, seed=42, end=old_end)).write(
+        str(tmp_path / "synthetic-2000-42-20240101.log"))
+    kept = benchmark_suite(sizes=(2000,), data_dir=str(tmp_path), stages=False)["2000"]
+    assert kept['lines'] == 2000 and kept['log_end'] == "2024-01-01" and kept['generate_seconds'] is None
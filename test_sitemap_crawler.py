@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Test Sitemap Crawler - Concurrent Site Crawling
+===============================================
+
+Crawls a small generated site served from localhost and checks the async
+crawler's budget, deduplication and concurrency limits, the frontier's
+ordering and URL canonicalization, the single-pass page extractor, and
+conditional recrawls through the HTTP cache.
+"""
+
+import asyncio
+import os
+import re
+from urllib.parse import urljoin, urlsplit
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from sitemap_crawler import AsyncSiteCrawler
+from sitemap_frontier import BloomFilter, URLFrontier, canonicalize_url
+from sitemap_http_cache import SitemapHTTPCache
+
+PAGE_COUNT = 60
+
+
+def site_app(in_flight):
+    """Pages /p/0 ... /p/59, each linking to the next three pages and back home; /p/7 is missing"""
+    async def page(request):
+        number = int(request.match_info['number'])
+        in_flight['now'] += 1
+        in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        try:
+            await asyncio.sleep(0.01)
+            if number == 7 or number >= PAGE_COUNT:
+                raise web.HTTPNotFound()
+            links = ''.join(f'<a href="/p/{n}#top">{n}</a>' for n in range(number + 1, number + 4))
+            return web.Response(text=f'<html><title>Page {number}</title><a href="/p/0">home</a>{links}</html>',
+                                content_type='text/html', headers={'Last-Modified': 'Tue, 01 Oct 2024 00:00:00 GMT'})
+        finally:
+            in_flight['now'] -= 1
+
+    app = web.Application()
+    app.router.add_get('/p/{number}', page)
+    return app
+
+
+def parse_page(fetched):
+    title = re.search(r'<title>(.*?)</title>', fetched.text).group(1)
+    links = [urljoin(fetched.url, href).split('#')[0] for href in re.findall(r'href="([^"]+)"', fetched.text)]
+    return {'url': fetched.url, 'title': title, 'last_modified': fetched.headers['Last-Modified']}, links
+
+
+def parse_page_with_pid(fetched):
+    record, links = parse_page(fetched)
+    return dict(record, pid=os.getpid()), links
+
+
+async def crawl_site(max_pages, concurrency, per_host, parse=parse_page, **options):
+    in_flight = {'now': 0, 'peak': 0}
+    async with TestServer(site_app(in_flight)) as server:
+        crawler = AsyncSiteCrawler(parse, concurrency=concurrency, per_host=per_host, **options)
+        pages = await crawler.crawl(str(server.make_url('/p/0')), max_pages=max_pages)
+    return pages, in_flight['peak']
+
+
+def test_async_crawler_respects_budget_dedup_and_limits():
+    pages, peak = asyncio.run(crawl_site(max_pages=1000, concurrency=16, per_host=4))
+    urls = [page['url'] for page in pages]
+    # Every page but the missing one, each once, fragments stripped
+    assert len(urls) == len(set(urls)) == PAGE_COUNT - 1
+    assert not any(url.endswith('/p/7') for url in urls)
+    assert {page['title'] for page in pages} == {f'Page {n}' for n in range(PAGE_COUNT) if n != 7}
+    assert pages[0]['last_modified'] == 'Tue, 01 Oct 2024 00:00:00 GMT'
+    # All requests go to one host, so the per-host limit caps concurrency
+    assert 1 < peak <= 4
+
+    pages, _ = asyncio.run(crawl_site(max_pages=10, concurrency=8, per_host=8))
+    assert len(pages) == 10
+
+    pages, peak = asyncio.run(crawl_site(max_pages=5, concurrency=1, per_host=4))
+    assert len(pages) == 5 and peak == 1
+
+
+def test_process_pool_parsing_matches_inline_parsing():
+    inline, _ = asyncio.run(crawl_site(max_pages=1000, concurrency=8, per_host=8))
+    pooled, _ = asyncio.run(crawl_site(max_pages=1000, concurrency=8, per_host=8, parse=parse_page_with_pid,
+                                       parse_workers=2, parse_queue_size=2))
+    # Same records (each server has its own port), parsed outside the crawl's process
+    def by_path(pages):
+        return sorted((urlsplit(page['url']).path, page['title'], page['last_modified']) for page in pages)
+    assert by_path(inline) == by_path(pooled)
+    assert os.getpid() not in {page['pid'] for page in pooled}
+
+    budgeted, _ = asyncio.run(crawl_site(max_pages=10, concurrency=8, per_host=8, parse=parse_page_with_pid,
+                                         parse_workers=2, parse_queue_size=1))
+    assert len(budgeted) == 10
+
+
+def test_crawler_resolves_links_against_served_urls():
+    # /start redirects to the directory /docs/, whose relative links must resolve inside it
+    async def handler(request):
+        if request.path == '/start':
+            raise web.HTTPFound('/docs/')
+        pages = {'/docs/': '<title>Docs</title><a href="intro">i</a><a href="guide/">g</a>',
+                 '/docs/intro': '<title>Intro</title><a href="../docs/">up</a>',
+                 '/docs/guide/': '<title>Guide</title><a href="setup#top">s</a>',
+                 '/docs/guide/setup': '<title>Setup</title>'}
+        if request.path not in pages:
+            raise web.HTTPNotFound()
+        return web.Response(text=pages[request.path], content_type='text/html',
+                            headers={'Last-Modified': 'Tue, 01 Oct 2024 00:00:00 GMT'})
+
+    async def crawl():
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', handler)
+        async with TestServer(app) as server:
+            pages = await AsyncSiteCrawler(parse_page, concurrency=2).crawl(str(server.make_url('/start')))
+        return sorted((urlsplit(page['url']).path, page['title']) for page in pages)
+
+    assert asyncio.run(crawl()) == [('/docs/', 'Docs'), ('/docs/guide/', 'Guide'), ('/docs/guide/setup', 'Setup'),
+                                    ('/docs/intro', 'Intro')]
+
+
+def test_frontier_canonicalizes_prioritizes_and_dedups():
+    assert canonicalize_url("HTTPS://Example.COM:443/Docs/?b=2&a=1#top") == "https://example.com/Docs?a=1&b=2"
+    assert canonicalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert canonicalize_url("http://example.com/a%2fb/") == "http://example.com/a%2Fb"
+
+    frontier = URLFrontier()
+    for url, depth in [("https://example.com/blog/2024/01/post", 1), ("https://example.com/blog/archive", 1),
+                       ("https://example.com/about/", 1), ("https://Example.com/", 0),
+                       ("https://example.com/pricing", 2), ("https://example.com/about", 3)]:
+        frontier.add(url, depth)
+    assert not frontier.add("https://example.com:443/about#team")
+    order = [frontier.pop() for _ in range(len(frontier))]
+    # Home, then top-level pages (shallower link depth first), then deeper paths (ties in order found);
+    # each URL comes back as first discovered, so relative links still resolve against it
+    assert order == [("https://Example.com/", 0), ("https://example.com/about/", 1), ("https://example.com/pricing", 2),
+                     ("https://example.com/blog/2024/01/post", 1), ("https://example.com/blog/archive", 1)]
+
+    bloom = BloomFilter(capacity=20000, error_rate=0.01)
+    for i in range(20000):
+        bloom.add(f"https://example.com/p/{i}")
+    assert all(f"https://example.com/p/{i}" in bloom for i in range(20000))
+    false_positives = sum(f"https://example.com/q/{i}" in bloom for i in range(20000))
+    assert false_positives < 20000 * 0.02
+    assert len(bloom.bits) < 30000
+
+    bloomed = URLFrontier(bloom_capacity=1000)
+    assert bloomed.add("https://example.com/a") and not bloomed.add("https://EXAMPLE.com/a/")
+
+
+EXTRACTOR_PAGES = [
+    # Content in <article>: its header, nav and script go, with their links and headings
+    """<!DOCTYPE html><html><head><title> Caf&eacute; &amp; Bar </title>
+    <meta name="description" content="Best coffee"><link rel="canonical" href="/menu/">
+    <meta property="article:modified_time" content="2024-05-01T10:00:00Z">
+    <script type="application/ld+json">{"@type": "Restaurant", "name": "Cafe"}</script></head>
+    <body><header><h1>Site</h1><a href="/home">Home</a></header>
+    <article><header><nav><a href="/n">n</a></nav><h1>Menu</h1></header>
+    <h2>Drinks <span>hot</span></h2><p>Espresso&nbsp;and na&iuml;ve<!-- x -->latte <b>bold</b>text</p>
+    <aside itemscope itemtype="https://schema.org/WPSideBar"><h3>Related</h3></aside>
+    <a href="/menu/tea#top">Tea</a><script>track()</script></article>
+    <footer><a href="/privacy">Privacy</a></footer></body></html>""",
+    # No article/main: .content wins over #main; a header that is the container itself stays
+    """<html><body><div id="main">m</div><header class="x content"><h1>In header</h1><nav>nv</nav>
+    <p>one<p>two<h2>T <a href="x">l</a></h2></header>
+    <div itemscope itemtype="http://schema.org/Organization">Org</div></body></html>""",
+    # Only body: every nav/header/footer block in it goes
+    """<html><head><title>t</title></head><body><nav><a href="/a">a</a></nav>text &amp; more<br>line
+    <ul><li>a<li>b</ul><footer>f</footer></body></html>""",
+]
+
+
+@pytest.mark.parametrize("html", EXTRACTOR_PAGES)
+def test_single_pass_extractor_matches_beautifulsoup(html):
+    pytest.importorskip("lxml")
+    pytest.importorskip("bs4")
+    from sitemap_extractor import extract_page_features
+
+    fast, soup = extract_page_features(html, 'lxml'), extract_page_features(html, 'soup')
+    assert fast == soup
+    assert fast.content and fast.links is not None
+
+
+def test_single_pass_extractor_features():
+    pytest.importorskip("lxml")
+    from sitemap_extractor import extract_page_features
+
+    features = extract_page_features(EXTRACTOR_PAGES[0])
+    assert features.title == "Café & Bar"
+    assert features.description == "Best coffee"
+    assert features.canonical == "/menu/" and features.modified_time == "2024-05-01T10:00:00Z"
+    assert features.json_ld == [{"@type": "Restaurant", "name": "Cafe"}]
+    # The site header's h1 and link are outside the article, so they stay
+    assert features.headings == {'h1': ['Site'], 'h2': ['Drinkshot']}
+    assert features.links == ["/home", "/menu/tea#top", "/privacy"]
+    assert features.content == "Drinks hot Espresso and naïve latte bold text Tea"
+    # The schema.org sidebar was inside the article, so it is dropped
+    assert not features.has_schema_org
+    with pytest.raises(ValueError):
+        extract_page_features("<p>x</p>", 'regex')
+
+
+def versioned_site_app(versions, served):
+    """Pages /v/0 ... /v/n-1 linking to the next page, with ETags from `versions` and 304s for matching ones"""
+    async def page(request):
+        number = int(request.match_info['number'])
+        if number >= len(versions):
+            raise web.HTTPNotFound()
+        etag = f'"v{versions[number]}"'
+        if request.headers.get('If-None-Match') == etag:
+            served[304] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        served[200] += 1
+        return web.Response(text=f'<title>Page {number} v{versions[number]}</title><a href="/v/{number + 1}">next</a>',
+                            content_type='text/html', headers={'ETag': etag})
+
+    app = web.Application()
+    app.router.add_get('/v/{number}', page)
+    return app
+
+
+def test_http_cache_revalidates_unchanged_pages(tmp_path):
+    versions, served, parsed = [1] * 8, {200: 0, 304: 0}, []
+
+    def parse(fetched):
+        parsed.append(fetched.url)
+        title = re.search(r'<title>(.*?)</title>', fetched.text).group(1)
+        return {'url': fetched.url, 'title': title}, [urljoin(fetched.url, href)
+                                                      for href in re.findall(r'href="([^"]+)"', fetched.text)]
+
+    def title_of(pages):
+        return sorted(page['title'] for page in pages)
+
+    async def crawl(server):
+        with SitemapHTTPCache(str(tmp_path / 'cache' / 'http.db')) as cache:
+            crawler = AsyncSiteCrawler(parse, concurrency=4, cache=cache)
+            return await crawler.crawl(str(server.make_url('/v/0')), max_pages=100)
+
+    async def crawl_three_times():
+        async with TestServer(versioned_site_app(versions, served)) as server:
+            first = await crawl(server)
+            assert served == {200: 8, 304: 0} and len(parsed) == 8
+            # Nothing changed: every page is a 304 and nothing is parsed
+            second = await crawl(server)
+            assert served == {200: 8, 304: 8} and len(parsed) == 8
+            assert title_of(second) == title_of(first)
+            # One page changed: only it is downloaded and parsed again
+            versions[3] = 2
+            third = await crawl(server)
+            assert served == {200: 9, 304: 15} and parsed[-1].endswith('/v/3')
+            return third
+
+    third = asyncio.run(crawl_three_times())
+    assert 'Page 3 v2' in title_of(third) and len(third) == 8
+
+    with SitemapHTTPCache(str(tmp_path / 'cache' / 'http.db')) as cache:
+        # Looked up by canonical URL
+        cached = cache.get(third[0]['url'] + '#top')
+        assert len(cache) == 8 and cached is not None
+        assert cached.conditional_headers() == {'If-None-Match': cached.etag}
@@ -7,6 +7,8 @@ import os
 import asyncio
 from datetime import datetime, timedelta
 import tempfile
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from streamlit_option_menu import option_menu
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -111,6 +113,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Bytes read from an uploaded log at a time
+CRAWLER_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Hourly crawler rollups kept when "Keep hourly rollups" is checked
+CRAWLER_ROLLUP_DB = os.path.join('aio_output', 'crawler_rollups.db')
+
 class AIOWebApp:
     def __init__(self):
         """Initialize the AIO Web Application"""
@@ -139,6 +147,8 @@ class AIOWebApp:
             st.session_state.sitemap_results = None
         if 'crawler_results' not in st.session_state:
             st.session_state.crawler_results = None
+        if 'crawler_exact_job' not in st.session_state:
+            st.session_state.crawler_exact_job = None
 
     def render_header(self):
         """Render the main header"""
@@ -972,43 +982,109 @@ class AIOWebApp:
         with col1:
             days_back = st.slider("Analyze last N days", 1, 30, 7, key="crawler_days_back")
             generate_report = st.checkbox("Generate detailed report", value=True, key="crawler_generate_report")
+            quick_preview = st.checkbox(
+                "Quick sampled preview", value=False, key="crawler_quick_preview",
+                help="Show estimates from a 5% line sample in seconds while the exact analysis runs in the background"
+            )
+            use_rollups = st.checkbox(
+                "Keep hourly rollups", value=False, key="crawler_use_rollups",
+                help="Store hourly rollups in aio_output/, so later visits can load them without reparsing"
+            )
+        rollup_db = CRAWLER_ROLLUP_DB if use_rollups else None
+        
+        # Uploads and rollup queries go through a store-backed instance when rollups are kept
+        analytics = AICrawlerAnalytics(rollup_db=rollup_db) if rollup_db else self.crawler_analytics
         
         with col2:
+            if rollup_db and st.button("Load From Rollups", key="crawler_rollups_button"):
+                with st.spinner("Loading crawler rollups..."):
+                    try:
+                        analysis_result = analytics.analyze_rollups(days_back=days_back)
+                        
+                        if generate_report and analysis_result and not analysis_result.get('error'):
+                            report_md = analytics.generate_crawler_report()
+                            analysis_result['report_preview'] = report_md[:800]
+                        
+                        st.session_state.crawler_results = analysis_result
+                        st.success("Loaded crawler rollups!")
+                    except Exception as e:
+                        st.error(f"Error loading rollups: {str(e)}")
+            
             if st.button("Analyze Logs", type="primary", key="crawler_analyze_button"):
                 if log_file:
                     with st.spinner("Analyzing crawler activity..."):
                         try:
-                            # Save uploaded file temporarily
-                            with tempfile.NamedTemporaryFile(delete=False, suffix='.log') as tmp_file:
-                                tmp_file.write(log_file.getvalue())
+                            if quick_preview:
+                                # Sampling and the background run read a temporary copy
+                                tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.log')
                                 tmp_file_path = tmp_file.name
-                            
-                            # Real analysis using AICrawlerAnalytics
-                            analysis_result = self.crawler_analytics.parse_access_logs(
-                                tmp_file_path,
-                                days_back=days_back
-                            )
-
-                            if generate_report and analysis_result and not analysis_result.get('error'):
-                                report_md = self.crawler_analytics.generate_crawler_report()
-                                analysis_result['report_preview'] = report_md[:800]
-
-                            st.session_state.crawler_results = analysis_result
-                            st.success("Log analysis completed!")
-                            
-                            # Clean up temporary file
-                            os.unlink(tmp_file_path)
+                                try:
+                                    with tmp_file:
+                                        log_file.seek(0)
+                                        shutil.copyfileobj(log_file, tmp_file, CRAWLER_UPLOAD_CHUNK_BYTES)
+                                    
+                                    # Sampled estimates now, exact results from a background thread
+                                    preview = AICrawlerAnalytics().parse_access_logs(
+                                        tmp_file_path,
+                                        days_back=days_back,
+                                        sample_rate=0.05
+                                    )
+                                    executor = ThreadPoolExecutor(max_workers=1)
+                                    st.session_state.crawler_exact_job = executor.submit(
+                                        self._run_crawler_analysis, tmp_file_path, days_back, rollup_db, generate_report
+                                    )
+                                    executor.shutdown(wait=False)
+                                except Exception:
+                                    # The background run deletes the copy; without one, nothing else would
+                                    os.unlink(tmp_file_path)
+                                    raise
+                                st.session_state.crawler_results = preview
+                                st.success("Sampled preview ready, exact analysis running...")
+                            else:
+                                # Feed the upload to the parser in chunks instead of copying it to disk
+                                st.session_state.crawler_exact_job = None
+                                log_stream = analytics.open_log_stream(days_back=days_back)
+                                log_file.seek(0)
+                                for chunk in iter(lambda: log_file.read(CRAWLER_UPLOAD_CHUNK_BYTES), b''):
+                                    log_stream.feed(chunk)
+                                analysis_result = log_stream.finish()
+                                
+                                if generate_report and analysis_result and not analysis_result.get('error'):
+                                    report_md = analytics.generate_crawler_report()
+                                    analysis_result['report_preview'] = report_md[:800]
+                                
+                                st.session_state.crawler_results = analysis_result
+                                st.success("Log analysis completed!")
                             
                         except Exception as e:
                             st.error(f"Error analyzing logs: {str(e)}")
                 else:
                     st.warning("Please upload a log file")
         
+        # Swap in the exact results once the background analysis finishes
+        exact_job = st.session_state.crawler_exact_job
+        if exact_job is not None:
+            if exact_job.done():
+                st.session_state.crawler_exact_job = None
+                try:
+                    st.session_state.crawler_results = exact_job.result()
+                except Exception as e:
+                    st.error(f"Error analyzing logs: {str(e)}")
+            else:
+                st.info("Showing a sampled preview; the exact analysis is still running.")
+                st.button("Refresh Results", key="crawler_refresh_button")
+        
         # Results Display
         if st.session_state.crawler_results:
             st.markdown("### Analysis Results")
             
             results = st.session_state.crawler_results
+            if results.get('sample'):
+                low, high = results['sample']['ai_requests_ci']
+                st.caption(
+                    f"Estimated from a {results['sample']['sample_rate']:.0%} line sample; "
+                    f"AI bot requests 95% interval: {low:,} to {high:,}"
+                )
             
             # Summary metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -1075,7 +1151,16 @@ class AIOWebApp:
                         title="AI Bot Distribution"
                     )
                     st.plotly_chart(fig, use_container_width=True)
-            
+
+            # Week-over-week change (rollup store results only)
+            if results.get('week_over_week'):
+                st.markdown("### Week over Week")
+
+                wow_df = pd.DataFrame([
+                    {'bot_name': bot_type, **change} for bot_type, change in results['week_over_week'].items()
+                ])
+                st.dataframe(wow_df, use_container_width=True)
+
             # Recommendations
             if 'recommendations' in results and results['recommendations']:
                 st.markdown("### Optimization Recommendations")
@@ -1084,6 +1169,21 @@ class AIOWebApp:
                     title = rec.get('title') or rec.get('description')
                     st.markdown(f"- **{rec.get('category','Recommendation')}**: {title}")
 
+    def _run_crawler_analysis(self, log_file_path: str, days_back: int, rollup_db: str,
+                              generate_report: bool) -> dict:
+        """Exact log analysis on its own analytics instance, deleting the uploaded copy afterwards"""
+        analytics = AICrawlerAnalytics(rollup_db=rollup_db or None)
+        try:
+            analysis_result = analytics.parse_access_logs(log_file_path, days_back=days_back)
+            
+            if generate_report and analysis_result and not analysis_result.get('error'):
+                report_md = analytics.generate_crawler_report()
+                analysis_result['report_preview'] = report_md[:800]
+            return analysis_result
+        finally:
+            # Clean up temporary file
+            os.unlink(log_file_path)
+
     def render_settings(self):
         """Render the Settings module"""
         st.header("⚙️ Settings")